@@ -0,0 +1,52 @@
+"""add ingestion_jobs table
+
+Revision ID: 3b9e4f1a7c2d
+Revises: c280cdc625c2
+Create Date: 2026-10-18 09:12:40.118204
+
+"""
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy.dialects import postgresql
+from pyapp.config.settings import settings
+
+
+# revision identifiers, used by Alembic.
+revision = '3b9e4f1a7c2d'
+down_revision = 'c280cdc625c2'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.create_table(
+        'ingestion_jobs',
+        sa.Column('id', sa.Integer(), primary_key=True),
+        sa.Column('user_id', sa.Integer(), sa.ForeignKey(f'{settings.DATABASE_SCHEMA}.users.id', ondelete='CASCADE'), nullable=False),
+        sa.Column('kind', sa.String(length=10), nullable=False),
+        sa.Column('source', sa.String(), nullable=False),
+        sa.Column('filename', sa.String(), nullable=True),
+        sa.Column('status', sa.String(length=20), nullable=False, server_default='queued'),
+        sa.Column('stage', sa.String(length=30), nullable=True),
+        sa.Column('progress', postgresql.JSONB(), nullable=False, server_default=sa.text("'{}'::jsonb")),
+        sa.Column('error', sa.Text(), nullable=True),
+        sa.Column('attempts', sa.Integer(), nullable=False, server_default='0'),
+        sa.Column('max_attempts', sa.Integer(), nullable=False, server_default='4'),
+        sa.Column('next_attempt_at', sa.DateTime(), nullable=False, server_default=sa.text('now()')),
+        sa.Column('lease_expires_at', sa.DateTime(), nullable=True),
+        sa.Column('library_item_id', sa.Integer(), sa.ForeignKey(f'{settings.DATABASE_SCHEMA}.library_items.id', ondelete='SET NULL'), nullable=True),
+        sa.Column('created_at', sa.DateTime(), nullable=False, server_default=sa.text('now()')),
+        sa.Column('updated_at', sa.DateTime(), nullable=False, server_default=sa.text('now()')),
+        schema=settings.DATABASE_SCHEMA
+    )
+    op.create_index(op.f('ix_ingestion_jobs_id'), 'ingestion_jobs', ['id'], unique=False, schema=settings.DATABASE_SCHEMA)
+    op.create_index(op.f('ix_ingestion_jobs_user_id'), 'ingestion_jobs', ['user_id'], unique=False, schema=settings.DATABASE_SCHEMA)
+    # Workers poll for the next runnable job by (status, next_attempt_at)
+    op.create_index('ix_ingestion_jobs_status_next_attempt_at', 'ingestion_jobs', ['status', 'next_attempt_at'], unique=False, schema=settings.DATABASE_SCHEMA)
+
+
+def downgrade():
+    op.drop_index('ix_ingestion_jobs_status_next_attempt_at', table_name='ingestion_jobs', schema=settings.DATABASE_SCHEMA)
+    op.drop_index(op.f('ix_ingestion_jobs_user_id'), table_name='ingestion_jobs', schema=settings.DATABASE_SCHEMA)
+    op.drop_index(op.f('ix_ingestion_jobs_id'), table_name='ingestion_jobs', schema=settings.DATABASE_SCHEMA)
+    op.drop_table('ingestion_jobs', schema=settings.DATABASE_SCHEMA)
@@ -0,0 +1,48 @@
+"""add documents registry
+
+Revision ID: 5f2a9c7d3e18
+Revises: 3b9e4f1a7c2d
+Create Date: 2026-10-18 15:42:03.527194
+
+"""
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy.dialects import postgresql
+from pyapp.config.settings import settings
+
+
+# revision identifiers, used by Alembic.
+revision = '5f2a9c7d3e18'
+down_revision = '3b9e4f1a7c2d'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.create_table(
+        'documents',
+        sa.Column('id', sa.Integer(), primary_key=True),
+        sa.Column('sha256', sa.String(length=64), nullable=False),
+        sa.Column('size_bytes', sa.BigInteger(), nullable=False),
+        sa.Column('storage_url', sa.String(), nullable=True),
+        sa.Column('extracted_text', sa.Text(), nullable=True),
+        sa.Column('generated', postgresql.JSONB(), nullable=True),
+        sa.Column('created_at', sa.DateTime(), nullable=False, server_default=sa.text('now()')),
+        sa.Column('updated_at', sa.DateTime(), nullable=False, server_default=sa.text('now()')),
+        schema=settings.DATABASE_SCHEMA
+    )
+    op.create_index(op.f('ix_documents_id'), 'documents', ['id'], unique=False, schema=settings.DATABASE_SCHEMA)
+    op.create_index(op.f('ix_documents_sha256'), 'documents', ['sha256'], unique=True, schema=settings.DATABASE_SCHEMA)
+
+    op.add_column('library_items', sa.Column('document_id', sa.Integer(), sa.ForeignKey(f'{settings.DATABASE_SCHEMA}.documents.id', ondelete='SET NULL'), nullable=True), schema=settings.DATABASE_SCHEMA)
+    op.create_index(op.f('ix_library_items_document_id'), 'library_items', ['document_id'], unique=False, schema=settings.DATABASE_SCHEMA)
+    op.add_column('ingestion_jobs', sa.Column('document_id', sa.Integer(), sa.ForeignKey(f'{settings.DATABASE_SCHEMA}.documents.id', ondelete='SET NULL'), nullable=True), schema=settings.DATABASE_SCHEMA)
+
+
+def downgrade():
+    op.drop_column('ingestion_jobs', 'document_id', schema=settings.DATABASE_SCHEMA)
+    op.drop_index(op.f('ix_library_items_document_id'), table_name='library_items', schema=settings.DATABASE_SCHEMA)
+    op.drop_column('library_items', 'document_id', schema=settings.DATABASE_SCHEMA)
+    op.drop_index(op.f('ix_documents_sha256'), table_name='documents', schema=settings.DATABASE_SCHEMA)
+    op.drop_index(op.f('ix_documents_id'), table_name='documents', schema=settings.DATABASE_SCHEMA)
+    op.drop_table('documents', schema=settings.DATABASE_SCHEMA)
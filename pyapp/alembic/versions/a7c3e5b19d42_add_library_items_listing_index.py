@@ -0,0 +1,32 @@
+"""add library_items listing index
+
+Revision ID: a7c3e5b19d42
+Revises: 5f2a9c7d3e18
+Create Date: 2026-10-18 16:20:47.881306
+
+"""
+from alembic import op
+import sqlalchemy as sa
+from pyapp.config.settings import settings
+
+
+# revision identifiers, used by Alembic.
+revision = 'a7c3e5b19d42'
+down_revision = '5f2a9c7d3e18'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    # Library listing: a user's items newest first, paginated by (created_at, id)
+    op.create_index(
+        'ix_library_items_user_id_created_at',
+        'library_items',
+        ['user_id', sa.text('created_at DESC'), sa.text('id DESC')],
+        unique=False,
+        schema=settings.DATABASE_SCHEMA,
+    )
+
+
+def downgrade():
+    op.drop_index('ix_library_items_user_id_created_at', table_name='library_items', schema=settings.DATABASE_SCHEMA)
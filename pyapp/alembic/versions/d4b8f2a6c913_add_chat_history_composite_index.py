@@ -0,0 +1,31 @@
+"""add chat_history composite index
+
+Revision ID: d4b8f2a6c913
+Revises: a7c3e5b19d42
+Create Date: 2026-10-18 17:03:29.640158
+
+"""
+from alembic import op
+from pyapp.config.settings import settings
+
+
+# revision identifiers, used by Alembic.
+revision = 'd4b8f2a6c913'
+down_revision = 'a7c3e5b19d42'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    # Chat history pages for one user and item, by (created_at, id)
+    op.create_index(
+        'ix_chat_history_user_item_created_at',
+        'chat_history',
+        ['user_id', 'library_item_id', 'created_at', 'id'],
+        unique=False,
+        schema=settings.DATABASE_SCHEMA,
+    )
+
+
+def downgrade():
+    op.drop_index('ix_chat_history_user_item_created_at', table_name='chat_history', schema=settings.DATABASE_SCHEMA)
@@ -1,24 +1,37 @@
 from fastapi import APIRouter, Depends, HTTPException, status
-from sqlalchemy.orm import Session
+from sqlalchemy.ext.asyncio import AsyncSession
 from fastapi.security import OAuth2PasswordRequestForm
 from pyapp.schemas.user import UserCreate, UserRead, Token
 from pyapp.crud.user import create_user, authenticate_user, get_user_by_email
-from pyapp.db.session import get_db
-from pyapp.utils.auth import create_access_token
+from pyapp.db.async_session import get_async_db
+from pyapp.utils.auth import HashingBusy, create_access_token
 
 router = APIRouter()
 
+def _too_busy() -> HTTPException:
+    return HTTPException(
+        status_code=status.HTTP_429_TOO_MANY_REQUESTS,
+        detail="Too many sign-ins right now, please retry shortly",
+        headers={"Retry-After": "1"},
+    )
+
 @router.post("/signup", response_model=UserRead)
-def signup(user_in: UserCreate, db: Session = Depends(get_db)):
-    user = get_user_by_email(db, user_in.email)
+async def signup(user_in: UserCreate, db: AsyncSession = Depends(get_async_db)):
+    user = await get_user_by_email(db, user_in.email)
     if user:
         raise HTTPException(status_code=400, detail="Email already registered")
-    user = create_user(db, user_in.email, user_in.password)
+    try:
+        user = await create_user(db, user_in.email, user_in.password)
+    except HashingBusy:
+        raise _too_busy()
     return user
 
 @router.post("/login", response_model=Token)
-def login(form_data: OAuth2PasswordRequestForm = Depends(), db: Session = Depends(get_db)):
-    user = authenticate_user(db, form_data.username, form_data.password)
+async def login(form_data: OAuth2PasswordRequestForm = Depends(), db: AsyncSession = Depends(get_async_db)):
+    try:
+        user = await authenticate_user(db, form_data.username, form_data.password)
+    except HashingBusy:
+        raise _too_busy()
     if not user:
         raise HTTPException(status_code=401, detail="Incorrect email or password")
     access_token = create_access_token(data={"sub": str(user.id), "email": user.email})
@@ -0,0 +1,39 @@
+from fastapi import APIRouter, Depends, HTTPException
+from sqlalchemy.orm import Session
+from pyapp.utils.auth import CurrentUser, get_token_user
+from pyapp.db.session import get_db
+from pyapp.models.ingestion_job import IngestionJob
+
+router = APIRouter()
+
+
+@router.get("/jobs/{job_id}")
+def get_ingestion_job(
+    job_id: int,
+    current_user: CurrentUser = Depends(get_token_user),
+    db: Session = Depends(get_db)
+):
+    job = (
+        db.query(IngestionJob)
+        .filter(IngestionJob.id == job_id, IngestionJob.user_id == current_user.id)
+        .first()
+    )
+
+    if not job:
+        raise HTTPException(status_code=404, detail="Job not found")
+
+    return {
+        "id": job.id,
+        "kind": job.kind,
+        "source": job.filename or job.source,
+        "status": job.status,
+        "stage": job.stage,
+        "progress": job.progress or {},
+        "attempts": job.attempts,
+        "max_attempts": job.max_attempts,
+        "next_attempt_at": job.next_attempt_at.isoformat() if job.next_attempt_at else None,
+        "error": job.error,
+        "library_item_id": job.library_item_id,
+        "created_at": job.created_at.isoformat(),
+        "updated_at": job.updated_at.isoformat(),
+    }
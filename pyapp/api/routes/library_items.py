@@ -1,40 +1,60 @@
-from fastapi import APIRouter, Depends, HTTPException, status
-from sqlalchemy.orm import Session
-from pyapp.utils.auth import get_current_user
+from typing import Optional
+from fastapi import APIRouter, Depends, HTTPException, Query, status
+from sqlalchemy import tuple_
+from sqlalchemy.orm import Session, load_only
+from pyapp.config.settings import settings
+from pyapp.utils.auth import CurrentUser, get_current_user, get_token_user
+from pyapp.utils.pagination import decode_cursor, encode_cursor
 from pyapp.db.session import get_db
 from pyapp.models.library_item import LibraryItem
-from pyapp.models.user import User  # for typing
+from pyapp.services.answer_cache import answer_cache
+from pyapp.services.vector_cleanup import delete_item_vectors
 
 router = APIRouter()
 
+
 @router.get("/library")
 def get_library_items(
-    current_user: User = Depends(get_current_user),
+    limit: int = Query(settings.LIBRARY_PAGE_SIZE, ge=1, le=settings.LIBRARY_MAX_PAGE_SIZE),
+    cursor: Optional[str] = Query(None),
+    current_user: CurrentUser = Depends(get_token_user),
     db: Session = Depends(get_db)
 ):
-    items = (
+    """
+    Newest first, one page at a time. Pass back `next_cursor` to get the
+    following page; it is null on the last one. Keyset pagination on
+    (created_at, id) keeps every page an index range scan, however deep.
+    """
+    query = (
         db.query(LibraryItem)
+        # Summary, flashcards and MCQs are large and not shown in the listing
+        .options(load_only(LibraryItem.id, LibraryItem.title, LibraryItem.url_or_path, LibraryItem.created_at))
         .filter(LibraryItem.user_id == current_user.id)
-        .order_by(LibraryItem.created_at.desc())
-        .all()
     )
+    if cursor:
+        query = query.filter(tuple_(LibraryItem.created_at, LibraryItem.id) < decode_cursor(cursor))
 
-    response = [
-        {
-            "id": item.id,
-            "title": item.title or "Untitled",
-            "source": item.url_or_path,
-            "created_at": item.created_at.isoformat(),
-        }
-        for item in items
-    ]
+    items = query.order_by(LibraryItem.created_at.desc(), LibraryItem.id.desc()).limit(limit + 1).all()
+    has_more = len(items) > limit
+    items = items[:limit]
 
-    return response
+    return {
+        "items": [
+            {
+                "id": item.id,
+                "title": item.title or "Untitled",
+                "source": item.url_or_path,
+                "created_at": item.created_at.isoformat(),
+            }
+            for item in items
+        ],
+        "next_cursor": encode_cursor(items[-1].created_at, items[-1].id) if has_more else None,
+    }
 
 @router.get("/library/{item_id}")
 def get_library_item(
     item_id: int,
-    current_user: User = Depends(get_current_user),
+    current_user: CurrentUser = Depends(get_token_user),
     db: Session = Depends(get_db)
 ):
     item = (
@@ -60,7 +80,7 @@ def get_library_item(
 @router.delete("/library/{item_id}", status_code=status.HTTP_204_NO_CONTENT)
 def delete_library_item(
     item_id: int,
-    current_user: User = Depends(get_current_user),
+    current_user: CurrentUser = Depends(get_current_user),
     db: Session = Depends(get_db),
 ):
     item = db.query(LibraryItem).filter(
@@ -73,4 +93,6 @@ def delete_library_item(
 
     db.delete(item)
     db.commit()
+    answer_cache.invalidate(item_id)
+    delete_item_vectors(item_id)
     return None  # 204 No Content means successful delete, no response body
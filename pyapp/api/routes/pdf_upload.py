@@ -1,118 +1,98 @@
 from fastapi import APIRouter, File, UploadFile, Depends, HTTPException
-from sqlalchemy.orm import Session
-from pyapp.services.b2_s3 import upload_pdf_to_b2
+from sqlalchemy.ext.asyncio import AsyncSession
+from pyapp.config.settings import settings
+from pyapp.services.b2_s3 import MB, UploadTooLarge, document_object_key, spool_upload, upload_spooled_pdf_to_b2
+from pyapp.services.document_registry import fill_document, register_upload, set_storage_url
 from pyapp.utils.auth import get_current_user
-from pyapp.db.session import get_db
+from pyapp.db.async_session import get_async_db
+import asyncio
 
 router = APIRouter()
 
+
+async def _spool_pdf(file: UploadFile):
+    """Copies the upload to a named temp file, enforcing MAX_UPLOAD_MB without reading it into memory."""
+    max_bytes = settings.MAX_UPLOAD_MB * MB
+    if file.size is not None and file.size > max_bytes:
+        raise HTTPException(status_code=413, detail=f"PDF exceeds the {settings.MAX_UPLOAD_MB} MB limit")
+    try:
+        spooled = await asyncio.to_thread(spool_upload, file.file, max_bytes)
+    except UploadTooLarge:
+        raise HTTPException(status_code=413, detail=f"PDF exceeds the {settings.MAX_UPLOAD_MB} MB limit")
+    if spooled.size == 0:
+        spooled.remove()
+        raise HTTPException(status_code=400, detail="Uploaded file is empty")
+    return spooled
+
+
 @router.post("/upload-pdf")
 async def upload_pdf(
     file: UploadFile = File(...),
     user: dict = Depends(get_current_user),
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_async_db),
 ):
     if file.content_type != "application/pdf":
         raise HTTPException(status_code=400, detail="Only PDF files are supported")
 
-    file_bytes = await file.read()
-    if len(file_bytes) == 0:
-        raise HTTPException(status_code=400, detail="Uploaded file is empty")
-
+    spooled = await _spool_pdf(file)
     try:
-        pdf_url = upload_pdf_to_b2(file_bytes, file.filename, user.id)
-    except Exception as e:
-        raise HTTPException(status_code=500, detail=f"Upload failed: {str(e)}")
+        document = await register_upload(db, spooled.sha256, spooled.size)
+        if document.storage_url:
+            pdf_url = document.storage_url
+        else:
+            try:
+                pdf_url = await asyncio.to_thread(
+                    upload_spooled_pdf_to_b2, spooled, file.filename, user.id, document_object_key(spooled.sha256)
+                )
+            except Exception as e:
+                raise HTTPException(status_code=500, detail=f"Upload failed: {str(e)}")
+            pdf_url = await set_storage_url(db, document.id, pdf_url)
+    finally:
+        spooled.remove()
 
     return {"url": pdf_url, "filename": file.filename}
 
 
-from pyapp.services.b2_s3 import download_file_from_s3
+from pyapp.services.ingestion_queue import enqueue_ingestion_job
 from pyapp.utils.pdf_utils import extract_text_from_pdf
-from pyapp.utils.text_chunker import chunk_text
-from pyapp.services.qdrant_client import get_qdrant_client
-from pyapp.utils.text_chunker import chunk_text
-from pyapp.utils.embedding import get_openai_embeddings
-from pyapp.services.content_generator import generate_summary_and_flashcards
-import json
-from datetime import datetime
-from pyapp.models.library_item import LibraryItem
-from uuid import uuid4
-import os
 
-@router.post("/upload_pdf/process", status_code=201)
+@router.post("/upload_pdf/process", status_code=202)
 async def upload_and_process_pdf(
     file: UploadFile = File(...),
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_async_db),
     user: dict = Depends(get_current_user)
 ):
-    try:
-        file_bytes = await file.read()
-        original_filename = file.filename or "uploaded.pdf"
-
-        # Step 1: Upload to S3
-        s3_url = upload_pdf_to_b2(file_bytes, original_filename, user.id)
-
-        # Step 2: Download from S3 to temp file
-        temp_path = download_file_from_s3(s3_url)
-
-        # Step 3: Extract text
-        text = extract_text_from_pdf(temp_path)
-        if not text.strip():
-            raise HTTPException(status_code=400, detail="Empty or unreadable PDF")
-
-        # Step 4: Chunk and embed
-        chunks = chunk_text(text, chunk_size=500)
-        embeddings = await get_openai_embeddings(chunks)
-
-        # Step 5: Generate summary, flashcards, mcqs
-        result = generate_summary_and_flashcards(text)
-        result_dict = json.loads(result["output"])
-        summary = result_dict.get("summary", "")
-        flashcards = result_dict.get("flashcards", [])
-        mcqs = result_dict.get("mcqs", [])
-
-        # Step 6: Save library item to DB
-        now = datetime.utcnow()
-        new_item = LibraryItem(
-            user_id=user.id,
-            url_or_path=s3_url,
-            content_type="pdf",
-            title=result_dict.get("title", original_filename),
-            created_at=now,
-            updated_at=now,
-            summary=summary,
-            flashcards=flashcards,
-            mcqs=mcqs
-        )
-        db.add(new_item)
-        db.flush()
-
-        # Step 7: Store in Qdrant
-        client = get_qdrant_client()
-        points = []
-        for chunk, embedding in zip(chunks, embeddings):
-            points.append({
-                "id": str(uuid4()),
-                "vector": embedding,
-                "payload": {
-                    "user_id": int(user.id),
-                    "library_item_id": int(new_item.id),
-                    "text_chunk": chunk
-                }
-            })
-
-        client.upsert(collection_name="skimzy_vectors", points=points)
-        db.commit()
-
-        return {"success": True, "library_item_id": new_item.id}
-
-    except Exception as e:
-        db.rollback()
-        import traceback
-        traceback.print_exc()
-        raise HTTPException(status_code=500, detail=f"Upload & Processing failed: {str(e)}")
+    original_filename = file.filename or "uploaded.pdf"
+    spooled = await _spool_pdf(file)
 
+    try:
+        # A file seen before (from any user) is neither stored nor extracted again;
+        # the worker also reuses its generated content and vectors
+        document = await register_upload(db, spooled.sha256, spooled.size)
+        if document.storage_url:
+            s3_url = document.storage_url
+        else:
+            # Text is extracted from the local copy while B2 stores it, so the worker
+            # doesn't have to download the object again. The upload must still
+            # succeed before the job is queued: the library item links to it.
+            s3_url, text = await asyncio.gather(
+                asyncio.to_thread(
+                    upload_spooled_pdf_to_b2, spooled, original_filename, user.id, document_object_key(spooled.sha256)
+                ),
+                asyncio.to_thread(extract_text_from_pdf, spooled.path),
+                return_exceptions=True,
+            )
+            if isinstance(s3_url, BaseException):
+                raise HTTPException(status_code=500, detail=f"Upload failed: {str(s3_url)}")
+            s3_url = await set_storage_url(db, document.id, s3_url)
+            if isinstance(text, BaseException):
+                print(f"[WARN] In-request PDF extraction failed for {original_filename}, worker will retry from B2: {text}")
+            else:
+                await asyncio.to_thread(fill_document, document.id, extracted_text=text)
     finally:
-        if 'temp_path' in locals() and os.path.exists(temp_path):
-            os.remove(temp_path)
\ No newline at end of file
+        spooled.remove()
+
+    job = await enqueue_ingestion_job(
+        db, user.id, kind="pdf", source=s3_url, filename=original_filename, document_id=document.id
+    )
+    return {"job_id": job.id, "status": job.status}
@@ -0,0 +1,146 @@
+"""
+DB queries per request and latency percentiles of an authenticated endpoint
+under concurrent load, resolving the caller three ways: a User query on every
+request (before), the TTL user cache in get_current_user, and signed token
+claims only (get_token_user with AUTH_TRUST_TOKEN_CLAIMS). The endpoint itself
+does no work, so the numbers are the cost of authentication alone. Seeds a
+throwaway user in the configured database and removes it afterwards.
+
+Usage (from the repo root):
+    python -m pyapp.benchmarks.auth_bench --requests 2000 --concurrency 50
+"""
+import argparse
+import asyncio
+import statistics
+import threading
+import time
+import uuid
+
+import httpx
+from fastapi import Depends, FastAPI, HTTPException
+from sqlalchemy import event
+from sqlalchemy.orm import Session
+
+from pyapp.config.settings import settings
+from pyapp.db.async_session import async_engine, dispose_async_engine
+from pyapp.db.session import SessionLocal, engine, get_db
+from pyapp.models.user import User
+from pyapp.utils import auth
+from pyapp.utils.auth import create_access_token, get_current_user, get_token_user, oauth2_scheme
+
+
+class QueryCounter:
+    def __init__(self):
+        self.count = 0
+        self._lock = threading.Lock()
+
+    def __call__(self, conn, cursor, statement, parameters, context, executemany):
+        with self._lock:
+            self.count += 1
+
+
+def uncached_user(token: str = Depends(oauth2_scheme), db: Session = Depends(get_db)) -> User:
+    # get_current_user as it was: one User query per request
+    payload = auth.decode_access_token(token)
+    if not payload or not payload.get("sub"):
+        raise HTTPException(status_code=401, detail="Invalid token")
+    user = db.query(User).filter(User.id == payload["sub"]).first()
+    if not user:
+        raise HTTPException(status_code=401, detail="User not found")
+    return user
+
+
+def build_app() -> FastAPI:
+    app = FastAPI()
+
+    @app.get("/uncached")
+    def uncached(user=Depends(uncached_user)):
+        return {"id": user.id}
+
+    @app.get("/cached")
+    def cached(user=Depends(get_current_user)):
+        return {"id": user.id}
+
+    @app.get("/claims")
+    def claims(user=Depends(get_token_user)):
+        return {"id": user.id}
+
+    return app
+
+
+async def load(app: FastAPI, path: str, token: str, requests: int, concurrency: int) -> list:
+    latencies = []
+    queue = asyncio.Queue()
+    for _ in range(requests):
+        queue.put_nowait(None)
+
+    transport = httpx.ASGITransport(app=app)
+    async with httpx.AsyncClient(transport=transport, base_url="http://bench") as client:
+        headers = {"Authorization": f"Bearer {token}"}
+
+        async def worker():
+            while not queue.empty():
+                queue.get_nowait()
+                started = time.perf_counter()
+                response = await client.get(path, headers=headers)
+                latencies.append(time.perf_counter() - started)
+                response.raise_for_status()
+
+        await asyncio.gather(*(worker() for _ in range(concurrency)))
+    # Pooled asyncpg connections belong to this event loop
+    await dispose_async_engine()
+    return latencies
+
+
+def percentile(samples: list, pct: float) -> float:
+    ordered = sorted(samples)
+    return ordered[min(len(ordered) - 1, int(round(pct / 100 * (len(ordered) - 1))))]
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--requests", type=int, default=2000)
+    parser.add_argument("--concurrency", type=int, default=50)
+    args = parser.parse_args()
+
+    db = SessionLocal()
+    user = User(email=f"bench-{uuid.uuid4().hex[:8]}@example.com", hashed_password="x")
+    db.add(user)
+    db.commit()
+    user_id = user.id
+    token = create_access_token({"sub": str(user_id), "email": user.email})
+
+    app = build_app()
+    counter = QueryCounter()
+    # The old dependency used the sync engine, the current ones the async one
+    for bind in (engine, async_engine.sync_engine):
+        event.listen(bind, "before_cursor_execute", counter)
+    results = []
+    try:
+        for label, path, trust_claims in (
+            ("before (query per request)", "/uncached", False),
+            ("after  (user cache)", "/cached", False),
+            ("after  (token claims)", "/claims", True),
+        ):
+            settings.AUTH_TRUST_TOKEN_CLAIMS = trust_claims
+            auth.user_cache.invalidate(user_id)
+            counter.count = 0
+            started = time.perf_counter()
+            latencies = asyncio.run(load(app, path, token, args.requests, args.concurrency))
+            elapsed = time.perf_counter() - started
+            results.append((label, counter.count / args.requests, latencies, args.requests / elapsed))
+    finally:
+        for bind in (engine, async_engine.sync_engine):
+            event.remove(bind, "before_cursor_execute", counter)
+        db.query(User).filter(User.id == user_id).delete()
+        db.commit()
+        db.close()
+
+    print(f"requests={args.requests} concurrency={args.concurrency} cache_ttl={settings.AUTH_USER_CACHE_TTL_SECONDS}s")
+    for label, queries, latencies, throughput in results:
+        print(f"{label:28s} queries/req={queries:5.3f}  p50={statistics.median(latencies) * 1000:6.1f}ms  "
+              f"p99={percentile(latencies, 99) * 1000:6.1f}ms  {throughput:7.0f} req/s")
+
+
+if __name__ == "__main__":
+    main()
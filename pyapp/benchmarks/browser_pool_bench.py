@@ -0,0 +1,106 @@
+"""
+Latency of a cold Chromium launch per URL (the old extract_main_content
+behaviour) versus a page in a fresh context on the pooled browser, both
+loading pages from a local static HTTP server.
+
+Usage (from the repo root, after `playwright install chromium`):
+    python -m pyapp.benchmarks.browser_pool_bench --pages 30
+"""
+import argparse
+import asyncio
+import functools
+import statistics
+import tempfile
+import threading
+import time
+from http.server import SimpleHTTPRequestHandler, ThreadingHTTPServer
+
+from playwright.async_api import async_playwright
+
+from pyapp.services.browser_pool import BrowserPool, LAUNCH_ARGS
+
+
+class QuietHandler(SimpleHTTPRequestHandler):
+    def log_message(self, *args):
+        pass
+
+
+def start_static_server(pages: int) -> ThreadingHTTPServer:
+    root = tempfile.mkdtemp(prefix="skimzy-bench-")
+    paragraph = "<p>" + "Skimzy benchmark paragraph text. " * 40 + "</p>"
+    for i in range(pages):
+        with open(f"{root}/article-{i}.html", "w") as f:
+            f.write(f"<html><head><title>Article {i}</title></head>"
+                    f"<body><article><h1>Article {i}</h1>{paragraph * 20}</article></body></html>")
+
+    server = ThreadingHTTPServer(("127.0.0.1", 0), functools.partial(QuietHandler, directory=root))
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server
+
+
+async def cold_launch(url: str) -> str:
+    async with async_playwright() as p:
+        browser = await p.chromium.launch(headless=True, args=LAUNCH_ARGS)
+        page = await browser.new_page()
+        await page.goto(url, timeout=20000)
+        await page.wait_for_selector("body", timeout=10000)
+        html = await page.content()
+        await browser.close()
+        return html
+
+
+async def pooled(pool: BrowserPool, url: str) -> str:
+    async with pool.page() as page:
+        await page.goto(url, timeout=20000)
+        await page.wait_for_selector("body", timeout=10000)
+        return await page.content()
+
+
+def report(label: str, samples: list) -> None:
+    samples = sorted(samples)
+    p95 = samples[min(len(samples) - 1, int(0.95 * (len(samples) - 1)))]
+    print(f"{label:8s} mean={statistics.mean(samples) * 1000:8.1f}ms "
+          f"p50={statistics.median(samples) * 1000:8.1f}ms p95={p95 * 1000:8.1f}ms")
+
+
+async def run(pages: int, concurrency: int) -> None:
+    server = start_static_server(pages)
+    urls = [f"http://127.0.0.1:{server.server_port}/article-{i}.html" for i in range(pages)]
+
+    cold_samples = []
+    for url in urls:
+        started = time.perf_counter()
+        await cold_launch(url)
+        cold_samples.append(time.perf_counter() - started)
+
+    pool = BrowserPool(size=1, max_concurrent_pages=concurrency, pages_per_browser=1000, max_rss_mb=4096)
+    await pooled(pool, urls[0])  # the one-off launch is paid at startup, not per request
+
+    pooled_samples = []
+    for url in urls:
+        started = time.perf_counter()
+        await pooled(pool, url)
+        pooled_samples.append(time.perf_counter() - started)
+
+    started = time.perf_counter()
+    await asyncio.gather(*(pooled(pool, url) for url in urls))
+    concurrent_s = time.perf_counter() - started
+    await pool.close()
+    server.shutdown()
+
+    print(f"pages={pages}")
+    report("cold", cold_samples)
+    report("pooled", pooled_samples)
+    print(f"pooled, {concurrency} concurrent pages: {pages} pages in {concurrent_s:.2f}s")
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--pages", type=int, default=30)
+    parser.add_argument("--concurrency", type=int, default=4)
+    args = parser.parse_args()
+    asyncio.run(run(args.pages, args.concurrency))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,103 @@
+"""
+Throughput, peak memory and chunk-size spread of the word-window chunk_text
+against the token-budgeted iter_token_chunks, on generated prose. The
+streaming variant is fed 64KB pieces from a generator, the way a large file
+or a page-by-page PDF would be, so the full text never exists as one string.
+
+Usage (from the repo root):
+    python -m pyapp.benchmarks.chunker_bench --mb 5 --mb 20
+"""
+import argparse
+import random
+import statistics
+import time
+import tracemalloc
+
+from pyapp.config.settings import settings
+from pyapp.utils.text_chunker import chunk_text, iter_token_chunks
+from pyapp.utils.tokens import get_encoding
+
+WORDS = (
+    "the model retrieval index vector chunk document reader summary question answer context "
+    "library article paragraph sentence embedding search token budget latency memory stream "
+    "throughput server client request response cache worker queue page browser extraction"
+).split()
+PIECE_CHARS = 64 * 1024
+
+
+def generate_pieces(total_chars: int, seed: int = 0):
+    """Yields ~PIECE_CHARS pieces of paragraphs of sentences, adding up to total_chars."""
+    rng = random.Random(seed)
+    produced = 0
+    piece = []
+    piece_chars = 0
+    while produced < total_chars:
+        sentences = []
+        for _ in range(rng.randint(2, 9)):
+            words = [rng.choice(WORDS) for _ in range(rng.randint(6, 30))]
+            sentences.append(" ".join(words).capitalize() + rng.choice(".!?"))
+        paragraph = " ".join(sentences) + "\n\n"
+        piece.append(paragraph)
+        piece_chars += len(paragraph)
+        produced += len(paragraph)
+        if piece_chars >= PIECE_CHARS:
+            yield "".join(piece)
+            piece, piece_chars = [], 0
+    if piece:
+        yield "".join(piece)
+
+
+def measure(label: str, run, size_bytes: int) -> list:
+    tracemalloc.start()
+    started = time.perf_counter()
+    chunks = run()
+    elapsed = time.perf_counter() - started
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    print(f"  {label:24s} {size_bytes / elapsed / 1e6:6.2f} MB/s  peak={peak / 1e6:8.1f} MB  chunks={len(chunks)}")
+    return chunks
+
+
+def token_spread(label: str, chunks: list) -> None:
+    encoding = get_encoding(settings.EMBEDDINGS_MODEL)
+    counts = sorted(len(tokens) for tokens in encoding.encode_ordinary_batch(chunks))
+    print(f"  {label:24s} tokens/chunk min={counts[0]} p50={counts[len(counts) // 2]} "
+          f"max={counts[-1]} stdev={statistics.pstdev(counts):.1f}")
+
+
+def run(mb: float) -> None:
+    total_chars = int(mb * 1e6)
+    text = "".join(generate_pieces(total_chars))
+    size_bytes = len(text.encode("utf-8"))
+    print(f"input: {size_bytes / 1e6:.1f} MB, max_tokens={settings.CHUNK_MAX_TOKENS} "
+          f"overlap={settings.CHUNK_OVERLAP_TOKENS}")
+
+    # Measured peaks exclude the input string itself, which exists before tracing starts
+    words = measure("chunk_text (500 words)", lambda: chunk_text(text, chunk_size=500), size_bytes)
+    tokens = measure("iter_token_chunks (str)", lambda: list(iter_token_chunks(text)), size_bytes)
+    del text
+
+    # Streaming: chunks are consumed as produced and only their count is kept
+    def streamed():
+        count = 0
+        for _ in iter_token_chunks(generate_pieces(total_chars)):
+            count += 1
+        return [None] * count
+
+    measure("iter_token_chunks (stream)", streamed, size_bytes)
+
+    token_spread("chunk_text", words)
+    token_spread("iter_token_chunks", tokens)
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--mb", type=float, action="append", help="input size in MB, repeatable")
+    args = parser.parse_args()
+    get_encoding(settings.EMBEDDINGS_MODEL)  # load the BPE ranks outside the measured runs
+    for mb in args.mb or [5, 20]:
+        run(mb)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,165 @@
+"""
+Recall@k, query latency and estimated RAM of the chunk collection under
+different layouts (services/collection_schema.py), on clustered synthetic
+embeddings spread over several users, querying the way the app does (filter
+by user, `search_params()` from the layout).
+
+Qdrant's local mode (the default here) stores the layout but always does
+exact search, ignoring quantization and HNSW. Its recall is therefore 1.0
+and its latencies are not representative. The "sim" recall column fills the
+gap: it reproduces the quantized first pass (int8 or 1-bit) plus rescoring
+of the top `k x oversampling` with the originals, in numpy. Pass --url to
+run the same comparison against a real Qdrant server.
+
+Usage (from the repo root):
+    python -m pyapp.benchmarks.collection_layout_bench --points 20000
+    python -m pyapp.benchmarks.collection_layout_bench --url http://localhost:6333
+"""
+import argparse
+import statistics
+import time
+from dataclasses import replace
+
+import numpy as np
+from qdrant_client import QdrantClient
+from qdrant_client.http.models import FieldCondition, Filter, MatchValue, PointStruct
+
+from pyapp.config.settings import settings
+from pyapp.services.collection_schema import CollectionLayout, create_collection, search_params
+
+LAYOUTS = {
+    "float32, RAM, global HNSW": dict(quantization="none", on_disk_vectors=False, tenant_hnsw=False),
+    "scalar int8, on-disk, per-user": dict(quantization="scalar", on_disk_vectors=True, tenant_hnsw=True),
+    "binary, on-disk, per-user": dict(quantization="binary", on_disk_vectors=True, tenant_hnsw=True),
+}
+
+
+def make_data(points: int, dim: int, users: int, queries: int, seed: int = 0):
+    rng = np.random.default_rng(seed)
+    centers = rng.standard_normal((max(8, points // 100), dim)).astype(np.float32)
+    vectors = centers[rng.integers(0, len(centers), points)] + 0.6 * rng.standard_normal((points, dim)).astype(np.float32)
+    vectors /= np.linalg.norm(vectors, axis=1, keepdims=True)
+    owners = rng.integers(0, users, points)
+    # Questions land near some chunk of the asker's own documents
+    sources = rng.integers(0, points, queries)
+    query_vectors = vectors[sources] + 0.5 * rng.standard_normal((queries, dim)).astype(np.float32) / np.sqrt(dim)
+    query_vectors /= np.linalg.norm(query_vectors, axis=1, keepdims=True)
+    return vectors, owners, query_vectors, owners[sources]
+
+
+def exact_top(vectors, candidates, query, k):
+    scores = vectors[candidates] @ query
+    return candidates[np.argsort(-scores)[:k]]
+
+
+def simulated_top(vectors, quantized, candidates, query, query_quantized, k, layout, oversampling):
+    """Quantized first pass over the user's points, then rescoring with the originals."""
+    if layout.quantization == "none":
+        return exact_top(vectors, candidates, query, k)
+    if layout.quantization == "scalar":
+        rough = quantized[candidates].astype(np.int32) @ query_quantized.astype(np.int32)
+    else:
+        # Matching bits count; ranking by it is ranking by Hamming distance
+        rough = (quantized[candidates] == query_quantized).sum(axis=1)
+    shortlist = candidates[np.argsort(-rough)[:int(k * oversampling)]]
+    return exact_top(vectors, shortlist, query, k)
+
+
+def quantize(vectors, layout, bounds=None):
+    if layout.quantization == "scalar":
+        low, high = bounds if bounds is not None else np.quantile(vectors, [0.005, 0.995])
+        scaled = np.clip((vectors - low) / (high - low), 0, 1) * 255 - 128
+        return np.round(scaled).astype(np.int8), (low, high)
+    if layout.quantization == "binary":
+        return vectors > 0, None
+    return None, None
+
+
+def estimated_ram_bytes(points: int, layout: CollectionLayout) -> int:
+    total = 0 if layout.on_disk_vectors else points * layout.vector_size * 4
+    if layout.quantization == "scalar":
+        total += points * layout.vector_size
+    elif layout.quantization == "binary":
+        total += points * layout.vector_size // 8
+    # HNSW links: ~2m neighbours per point on layer 0, 4 bytes each (per-user graphs use payload_m)
+    total += points * layout.hnsw_m * 2 * 4
+    return total
+
+
+def wait_indexed(client: QdrantClient, collection: str) -> None:
+    while client.get_collection(collection).status != "green":
+        time.sleep(0.5)
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--points", type=int, default=20000)
+    parser.add_argument("--dim", type=int, default=1536)
+    parser.add_argument("--users", type=int, default=20)
+    parser.add_argument("--queries", type=int, default=200)
+    parser.add_argument("--k", type=int, default=5)
+    parser.add_argument("--url", help="Qdrant server to benchmark instead of local mode")
+    args = parser.parse_args()
+
+    vectors, owners, queries, query_owners = make_data(args.points, args.dim, args.users, args.queries)
+    candidates_by_user = {user: np.flatnonzero(owners == user) for user in range(args.users)}
+    truth = [exact_top(vectors, candidates_by_user[user], query, args.k) for query, user in zip(queries, query_owners)]
+
+    client = QdrantClient(url=args.url) if args.url else QdrantClient(":memory:")
+    print(f"points={args.points} dim={args.dim} users={args.users} queries={args.queries} k={args.k} "
+          f"oversampling={settings.QDRANT_SEARCH_OVERSAMPLING} mode={'server ' + args.url if args.url else 'local (exact search)'}")
+    print(f"{'layout':32s} {'est. RAM MB':>11} {'recall':>7} {'sim':>6} {'p50 ms':>7} {'p95 ms':>7}")
+
+    for label, overrides in LAYOUTS.items():
+        layout = replace(CollectionLayout(), vector_size=args.dim, **overrides)
+        collection = f"layout_bench_{layout.quantization}"
+        if client.collection_exists(collection):
+            client.delete_collection(collection)
+        create_collection(client, collection, layout)
+        for start in range(0, args.points, 512):
+            client.upsert(
+                collection_name=collection,
+                points=[
+                    PointStruct(id=i, vector=vectors[i].tolist(), payload={"user_id": int(owners[i]), "library_item_id": int(i // 50)})
+                    for i in range(start, min(start + 512, args.points))
+                ],
+            )
+        if args.url:
+            wait_indexed(client, collection)
+
+        params = search_params(layout)
+        latencies, hits = [], 0
+        for query, user, expected in zip(queries, query_owners, truth):
+            started = time.perf_counter()
+            result = client.query_points(
+                collection_name=collection,
+                query=query.tolist(),
+                query_filter=Filter(must=[FieldCondition(key="user_id", match=MatchValue(value=int(user)))]),
+                search_params=params,
+                limit=args.k,
+                with_payload=False,
+            )
+            latencies.append(time.perf_counter() - started)
+            hits += len({point.id for point in result.points} & set(expected.tolist()))
+
+        quantized, bounds = quantize(vectors, layout)
+        simulated_hits = 0
+        for query, user, expected in zip(queries, query_owners, truth):
+            query_quantized, _ = quantize(query[None, :], layout, bounds)
+            top = simulated_top(
+                vectors, quantized, candidates_by_user[user], query,
+                None if query_quantized is None else query_quantized[0],
+                args.k, layout, settings.QDRANT_SEARCH_OVERSAMPLING,
+            )
+            simulated_hits += len(set(top.tolist()) & set(expected.tolist()))
+
+        total = args.k * len(queries)
+        ordered = sorted(latencies)
+        print(f"{label:32s} {estimated_ram_bytes(args.points, layout) / 1e6:11.1f} {hits / total:7.3f} "
+              f"{simulated_hits / total:6.3f} {statistics.median(ordered) * 1000:7.2f} "
+              f"{ordered[int(0.95 * (len(ordered) - 1))] * 1000:7.2f}")
+        client.delete_collection(collection)
+
+
+if __name__ == "__main__":
+    main()
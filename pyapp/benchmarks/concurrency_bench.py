@@ -0,0 +1,99 @@
+"""
+Throughput of one API process as concurrent clients are added, for a request
+that waits on the database and on an upstream API (OpenAI, Qdrant...), done
+the old way and the new way:
+
+  blocking  async handler, sync Session and a sync upstream client called
+            directly: each request holds the event loop for its whole wait
+  async     async handler, AsyncSession (asyncpg) and an awaited upstream call
+
+The database wait is a real `SELECT pg_sleep(...)` against the configured
+database, so the async run goes through the actual pool settings
+(DB_POOL_SIZE, DB_MAX_OVERFLOW). The upstream wait is simulated with a sleep.
+
+Usage (from the repo root):
+    python -m pyapp.benchmarks.concurrency_bench --db-ms 5 --upstream-ms 50 --clients 1 --clients 64
+"""
+import argparse
+import asyncio
+import time
+
+import httpx
+from fastapi import Depends, FastAPI
+from sqlalchemy import text
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import Session
+
+from pyapp.config.settings import settings
+from pyapp.db.async_session import dispose_async_engine, get_async_db
+from pyapp.db.session import get_db
+
+DB_WAIT = text("SELECT pg_sleep(:seconds)")
+
+
+def build_app(db_seconds: float, upstream_seconds: float) -> FastAPI:
+    app = FastAPI()
+
+    @app.get("/blocking")
+    async def blocking(db: Session = Depends(get_db)):
+        db.execute(DB_WAIT, {"seconds": db_seconds})
+        # Ends the transaction, handing the connection back before the upstream call
+        db.commit()
+        time.sleep(upstream_seconds)
+        return {"ok": True}
+
+    @app.get("/async")
+    async def non_blocking(db: AsyncSession = Depends(get_async_db)):
+        await db.execute(DB_WAIT, {"seconds": db_seconds})
+        await db.commit()
+        await asyncio.sleep(upstream_seconds)
+        return {"ok": True}
+
+    return app
+
+
+async def measure(app: FastAPI, path: str, clients: int, duration: float) -> float:
+    """Requests per second with `clients` clients each sending back-to-back requests."""
+    completed = 0
+    deadline = time.perf_counter() + duration
+    transport = httpx.ASGITransport(app=app)
+    async with httpx.AsyncClient(transport=transport, base_url="http://bench", timeout=None) as client:
+
+        async def run_client():
+            nonlocal completed
+            while time.perf_counter() < deadline:
+                response = await client.get(path)
+                response.raise_for_status()
+                completed += 1
+
+        started = time.perf_counter()
+        await asyncio.gather(*(run_client() for _ in range(clients)))
+        elapsed = time.perf_counter() - started
+    # Pooled asyncpg connections belong to this event loop
+    await dispose_async_engine()
+    return completed / elapsed
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--db-ms", type=float, default=5, help="time each request waits on the database")
+    parser.add_argument("--upstream-ms", type=float, default=50, help="time each request waits on an upstream API")
+    parser.add_argument("--clients", type=int, action="append", help="concurrent clients, repeatable")
+    parser.add_argument("--duration", type=float, default=5, help="seconds per measurement")
+    args = parser.parse_args()
+
+    app = build_app(args.db_ms / 1000, args.upstream_ms / 1000)
+    levels = args.clients or [1, 4, 16, 64]
+    ideal = 1000 / (args.db_ms + args.upstream_ms)
+
+    print(f"db={args.db_ms}ms upstream={args.upstream_ms}ms pool={settings.DB_POOL_SIZE}+{settings.DB_MAX_OVERFLOW} "
+          f"(one client alone: ~{ideal:.0f} req/s)")
+    print(f"{'clients':>8} {'blocking req/s':>15} {'async req/s':>12} {'speedup':>8}")
+    for clients in levels:
+        blocking = asyncio.run(measure(app, "/blocking", clients, args.duration))
+        non_blocking = asyncio.run(measure(app, "/async", clients, args.duration))
+        print(f"{clients:>8} {blocking:>15.1f} {non_blocking:>12.1f} {non_blocking / blocking:>7.1f}x")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,100 @@
+"""
+Prompt context before and after context packing (utils/context_packing.py).
+The document is chunked with iter_token_chunks as ingestion does. Retrieval
+is simulated: a question's top k chunks cluster around one spot of the
+document, with each neighbour returned with probability --neighbour-rate,
+padded with random chunks.
+
+Reports, per question on average:
+  tokens    context tokens: the top chunks joined as before, against packed
+  coverage  share of the retrieved chunks' sentences present in the packed
+            context; below 1.0 only when the budget cut something
+  ms        time spent packing
+
+The document is a text file (--text), or by default the passages of the
+benchmark question sets.
+
+Usage (from the repo root):
+    python -m pyapp.benchmarks.context_packing_bench --questions 500
+    python -m pyapp.benchmarks.context_packing_bench --text some_article.txt --budget 1500
+"""
+import argparse
+import glob
+import json
+import os
+import random
+import re
+import statistics
+import time
+
+from pyapp.config.settings import settings
+from pyapp.utils.context_packing import assemble_context
+from pyapp.utils.text_chunker import iter_token_chunks
+from pyapp.utils.tokens import count_tokens
+
+_SENTENCE = re.compile(r"[^.!?]+[.!?]")
+
+
+def default_text() -> str:
+    paragraphs = []
+    for path in sorted(glob.glob(os.path.join(os.path.dirname(__file__), "data", "*_eval_set.json"))):
+        with open(path) as f:
+            paragraphs.extend(passage["text"] for passage in json.load(f)["passages"])
+    return "\n\n".join(paragraphs)
+
+
+def simulated_retrieval(chunk_count: int, k: int, neighbour_rate: float, rng: random.Random) -> list:
+    center = rng.randrange(chunk_count)
+    picked = [center]
+    for offset in (1, -1, 2, -2):
+        if 0 <= center + offset < chunk_count and rng.random() < neighbour_rate:
+            picked.append(center + offset)
+    others = [i for i in range(chunk_count) if i not in picked]
+    picked += rng.sample(others, max(0, min(len(others), k - len(picked))))
+    picked = picked[:k]
+    rng.shuffle(picked)
+    return picked
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--text", help="document to chunk; defaults to the benchmark question sets' passages")
+    parser.add_argument("--questions", type=int, default=300)
+    parser.add_argument("--k", type=int, default=settings.RETRIEVAL_TOP_K)
+    parser.add_argument("--neighbour-rate", type=float, default=0.5)
+    parser.add_argument("--chunk-tokens", type=int, default=settings.CHUNK_MAX_TOKENS)
+    parser.add_argument("--budget", type=int, default=settings.LLM_CONTEXT_TOKEN_BUDGET)
+    args = parser.parse_args()
+
+    if args.text:
+        with open(args.text) as f:
+            text = f.read()
+    else:
+        text = default_text()
+    chunks = list(iter_token_chunks(text, max_tokens=args.chunk_tokens))
+    rng = random.Random(0)
+
+    before, after, coverage, timings = [], [], [], []
+    for _ in range(args.questions):
+        retrieved = [chunks[i] for i in simulated_retrieval(len(chunks), args.k, args.neighbour_rate, rng)]
+        before.append(count_tokens("\n\n".join(retrieved), settings.LLM_MODEL))
+
+        started = time.perf_counter()
+        packed = "\n\n".join(assemble_context(retrieved, token_budget=args.budget))
+        timings.append(time.perf_counter() - started)
+        after.append(count_tokens(packed, settings.LLM_MODEL))
+
+        flat = " ".join(packed.split())
+        sentences = {" ".join(s.split()) for chunk in retrieved for s in _SENTENCE.findall(chunk)}
+        coverage.append(sum(sentence in flat for sentence in sentences) / max(1, len(sentences)))
+
+    print(f"chunks={len(chunks)} chunk_tokens={args.chunk_tokens} overlap={settings.CHUNK_OVERLAP_TOKENS} "
+          f"k={args.k} neighbour_rate={args.neighbour_rate} budget={args.budget} questions={args.questions}")
+    print(f"tokens before={statistics.mean(before):.0f} after={statistics.mean(after):.0f} "
+          f"({1 - statistics.mean(after) / statistics.mean(before):.1%} fewer)")
+    print(f"coverage={statistics.mean(coverage):.3f} min={min(coverage):.3f}")
+    print(f"packing p50={statistics.median(timings) * 1000:.2f}ms max={max(timings) * 1000:.2f}ms")
+
+
+if __name__ == "__main__":
+    main()
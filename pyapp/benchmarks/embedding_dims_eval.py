@@ -0,0 +1,93 @@
+"""
+Retrieval quality of shortened embeddings (EMBEDDINGS_DIMENSIONS) against
+the full-size baseline, on a fixed question set: labelled passages and
+questions in benchmarks/data/dims_eval_set.json, or another file in the
+same format passed with --set.
+
+For each size it reports:
+  recall@k  share of the baseline's top-k passages that the shortened vectors
+            also return: what changes for the app when the size changes
+  hit@k     share of questions whose labelled passage is in the top k
+  MB/1M     raw float32 storage per million chunks
+
+Passages and questions are embedded through get_openai_embeddings with the
+cache off, so this needs OPENAI_API_KEY. With --truncate, only the baseline
+is embedded. The smaller sizes are then cut from it and renormalized, which
+is how text-embedding-3 models shorten vectors. That is cheaper for large
+sets.
+
+Usage (from the repo root):
+    python -m pyapp.benchmarks.embedding_dims_eval
+    python -m pyapp.benchmarks.embedding_dims_eval --dims 256 --dims 512 --truncate
+"""
+import argparse
+import asyncio
+import json
+import os
+
+import numpy as np
+
+from pyapp.config.settings import settings
+from pyapp.utils.embedding import get_openai_embeddings
+
+DEFAULT_SET = os.path.join(os.path.dirname(__file__), "data", "dims_eval_set.json")
+_FLOAT32_BYTES = 4
+
+
+def normalized(vectors) -> np.ndarray:
+    matrix = np.asarray(vectors, dtype=np.float32)
+    return matrix / np.linalg.norm(matrix, axis=1, keepdims=True)
+
+
+def top_k(passages: np.ndarray, questions: np.ndarray, k: int) -> np.ndarray:
+    scores = questions @ passages.T
+    return np.argsort(-scores, axis=1)[:, :k]
+
+
+async def embed(texts, model: str, dimensions: int) -> np.ndarray:
+    return normalized(await get_openai_embeddings(texts, model=model, dimensions=dimensions, use_cache=False))
+
+
+async def run(args) -> None:
+    with open(args.set) as f:
+        data = json.load(f)
+    passage_ids = [passage["id"] for passage in data["passages"]]
+    passage_texts = [passage["text"] for passage in data["passages"]]
+    questions = [item["question"] for item in data["questions"]]
+    gold = np.array([passage_ids.index(item["passage"]) for item in data["questions"]])
+
+    base_passages = await embed(passage_texts, args.model, args.baseline)
+    base_questions = await embed(questions, args.model, args.baseline)
+    baseline = top_k(base_passages, base_questions, args.k)
+
+    print(f"model={args.model} passages={len(passage_texts)} questions={len(questions)} k={args.k} "
+          f"baseline={args.baseline} dims, smaller sizes {'truncated' if args.truncate else 'from the API'}")
+    print(f"{'dims':>6} {f'recall@{args.k}':>9} {f'hit@{args.k}':>7} {'MB/1M':>7}")
+    for dims in sorted(set(args.dims or [256, 512, 768, 1024]) | {args.baseline}):
+        if dims == args.baseline:
+            passages, asked = base_passages, base_questions
+        elif args.truncate:
+            passages, asked = normalized(base_passages[:, :dims]), normalized(base_questions[:, :dims])
+        else:
+            passages = await embed(passage_texts, args.model, dims)
+            asked = await embed(questions, args.model, dims)
+        top = top_k(passages, asked, args.k)
+        recall = np.mean([len(set(row) & set(expected)) / args.k for row, expected in zip(top, baseline)])
+        hits = np.mean([answer in row for row, answer in zip(top, gold)])
+        print(f"{dims:>6} {recall:>9.3f} {hits:>7.3f} {dims * _FLOAT32_BYTES:>7d}")
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--set", default=DEFAULT_SET, help="question set: {passages: [{id, text}], questions: [{question, passage}]}")
+    parser.add_argument("--model", default=settings.EMBEDDINGS_MODEL)
+    parser.add_argument("--baseline", type=int, default=1536, help="full vector size of the model")
+    parser.add_argument("--dims", type=int, action="append", help="size to compare, repeatable")
+    parser.add_argument("--k", type=int, default=5)
+    parser.add_argument("--truncate", action="store_true", help="cut smaller sizes from the baseline instead of asking the API")
+    args = parser.parse_args()
+    asyncio.run(run(args))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,111 @@
+"""
+Wall-clock comparison of the old one-request-per-chunk embedding loop against
+the batched, concurrent get_openai_embeddings, both talking to a local fake
+OpenAI embeddings server.
+
+Usage (from the repo root):
+    python -m pyapp.benchmarks.embeddings_bench --chunks 200 --latency-ms 80
+"""
+import argparse
+import asyncio
+import json
+import os
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+DIMENSIONS = 1536
+
+
+class FakeEmbeddingsHandler(BaseHTTPRequestHandler):
+    # Per-request latency plus a small per-input cost, roughly shaped like the real API
+    base_latency = 0.08
+    per_input_latency = 0.0005
+
+    def do_POST(self):
+        length = int(self.headers.get("Content-Length", 0))
+        body = json.loads(self.rfile.read(length))
+        inputs = body["input"]
+        if isinstance(inputs, str):
+            inputs = [inputs]
+
+        time.sleep(self.base_latency + self.per_input_latency * len(inputs))
+
+        data = [
+            {"object": "embedding", "index": i, "embedding": [(len(text) % 97) / 97.0] * DIMENSIONS}
+            for i, text in enumerate(inputs)
+        ]
+        payload = json.dumps({
+            "object": "list",
+            "data": data,
+            "model": body.get("model"),
+            "usage": {"prompt_tokens": 0, "total_tokens": 0},
+        }).encode()
+
+        self.send_response(200)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(payload)))
+        self.end_headers()
+        self.wfile.write(payload)
+
+    def log_message(self, *args):
+        pass
+
+
+def start_server(latency_ms: float) -> ThreadingHTTPServer:
+    FakeEmbeddingsHandler.base_latency = latency_ms / 1000
+    server = ThreadingHTTPServer(("127.0.0.1", 0), FakeEmbeddingsHandler)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server
+
+
+def serial_embeddings(texts, model):
+    """The previous implementation: one blocking request per chunk."""
+    from openai import OpenAI
+
+    sync_client = OpenAI()
+    embeddings = []
+    for text in texts:
+        response = sync_client.embeddings.create(input=text, model=model)
+        embeddings.append(response.data[0].embedding)
+    return embeddings
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--chunks", type=int, default=200)
+    parser.add_argument("--latency-ms", type=float, default=80)
+    args = parser.parse_args()
+
+    server = start_server(args.latency_ms)
+    os.environ["OPENAI_BASE_URL"] = f"http://127.0.0.1:{server.server_port}/v1"
+    os.environ.setdefault("OPENAI_API_KEY", "bench")
+
+    # Imported after the env is set so the module-level client targets the fake server
+    from pyapp.config.settings import settings
+    from pyapp.utils.embedding import get_openai_embeddings
+
+    texts = [f"chunk {i} " + "lorem ipsum dolor sit amet " * 80 for i in range(args.chunks)]
+    model = settings.EMBEDDINGS_MODEL
+
+    start = time.perf_counter()
+    serial = serial_embeddings(texts, model)
+    serial_s = time.perf_counter() - start
+
+    start = time.perf_counter()
+    batched = asyncio.run(get_openai_embeddings(texts, model))
+    batched_s = time.perf_counter() - start
+
+    assert serial == batched, "batched results must match serial results in order"
+
+    print(f"chunks={args.chunks} latency={args.latency_ms}ms "
+          f"batch_size={settings.EMBEDDINGS_BATCH_SIZE} batch_tokens={settings.EMBEDDINGS_BATCH_TOKENS} "
+          f"concurrency={settings.EMBEDDINGS_CONCURRENCY}")
+    print(f"serial:  {serial_s:8.3f}s")
+    print(f"batched: {batched_s:8.3f}s  ({serial_s / batched_s:.1f}x faster)")
+
+    server.shutdown()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,190 @@
+"""
+In-process S3 stand-in for benchmarks: enough of the S3 REST API for boto3's
+put_object / get_object / head_object / delete_object (ranged GETs included)
+and multipart uploads (upload_file / upload_fileobj), with a fixed
+per-request latency and an optional bandwidth cap so transfers cost roughly
+what they would against B2. Path-style addressing only. SHA-256 request
+checksums are verified and reported back the way S3 does (composite for
+multipart uploads); other checksum algorithms are ignored.
+
+    server = start_fake_s3(latency_ms=40, mbps=200)
+    os.environ["B2_S3_ENDPOINT_URL"] = server.url
+"""
+import base64
+import hashlib
+import re
+import threading
+import time
+import uuid
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, unquote, urlparse
+
+_RANGE = re.compile(r"bytes=(\d+)-(\d*)")
+_CHECKSUM_HEADER = "x-amz-checksum-sha256"
+
+
+def _sha256_b64(data: bytes) -> str:
+    return base64.b64encode(hashlib.sha256(data).digest()).decode("ascii")
+
+
+class FakeS3Handler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+    latency = 0.0
+    bytes_per_second = 0.0
+    objects: dict = {}  # key -> (body, metadata)
+    uploads: dict = {}  # upload id -> (key, metadata, {part number: body})
+    lock = threading.Lock()
+
+    def _key(self) -> str:
+        return unquote(urlparse(self.path).path).lstrip("/")
+
+    def _query(self) -> dict:
+        return {name: values[0] for name, values in parse_qs(urlparse(self.path).query, keep_blank_values=True).items()}
+
+    def _metadata(self) -> dict:
+        return {name: value for name, value in self.headers.items() if name.lower().startswith("x-amz-meta-")}
+
+    def _throttle(self, size: int) -> None:
+        delay = self.latency
+        if self.bytes_per_second:
+            delay += size / self.bytes_per_second
+        time.sleep(delay)
+
+    def _reply(self, status: int, body: bytes = b"", headers: dict = None) -> None:
+        self.send_response(status)
+        for name, value in (headers or {}).items():
+            self.send_header(name, value)
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        if self.command != "HEAD":
+            self.wfile.write(body)
+
+    def _read_body(self) -> bytes:
+        if self.headers.get("Transfer-Encoding", "").lower() == "chunked":
+            data = bytearray()
+            while True:
+                size = int(self.rfile.readline().split(b";")[0], 16)
+                if size == 0:
+                    self.rfile.readline()
+                    return bytes(data)
+                data += self.rfile.read(size)
+                self.rfile.readline()
+        return self.rfile.read(int(self.headers.get("Content-Length", 0)))
+
+    def do_PUT(self):
+        body = self._read_body()
+        self._throttle(len(body))
+        query = self._query()
+        sent_checksum = self.headers.get(_CHECKSUM_HEADER)
+        if sent_checksum is not None and sent_checksum != _sha256_b64(body):
+            self._reply(400, b"<Error><Code>BadDigest</Code></Error>", {"Content-Type": "application/xml"})
+            return
+        with self.lock:
+            if "uploadId" in query:
+                upload = self.uploads.get(query["uploadId"])
+                if upload is None:
+                    self._reply(404, b"<Error><Code>NoSuchUpload</Code></Error>", {"Content-Type": "application/xml"})
+                    return
+                upload[2][int(query["partNumber"])] = body
+            else:
+                metadata = self._metadata()
+                if sent_checksum is not None:
+                    metadata[_CHECKSUM_HEADER] = sent_checksum
+                self.objects[self._key()] = (body, metadata)
+        self._reply(200, headers={"ETag": f'"{hashlib.md5(body).hexdigest()}"'})
+
+    def do_POST(self):
+        self._read_body()
+        query = self._query()
+        key = self._key()
+        bucket, _, object_key = key.partition("/")
+        if "uploads" in query:
+            upload_id = uuid.uuid4().hex
+            with self.lock:
+                self.uploads[upload_id] = (key, self._metadata(), {})
+            body = (
+                "<InitiateMultipartUploadResult>"
+                f"<Bucket>{bucket}</Bucket><Key>{object_key}</Key><UploadId>{upload_id}</UploadId>"
+                "</InitiateMultipartUploadResult>"
+            )
+        else:
+            with self.lock:
+                _, metadata, parts = self.uploads.pop(query["uploadId"])
+                data = b"".join(parts[number] for number in sorted(parts))
+                # Composite checksum: of the parts' digests, suffixed with the part count
+                part_digests = b"".join(hashlib.sha256(parts[number]).digest() for number in sorted(parts))
+                metadata[_CHECKSUM_HEADER] = f"{_sha256_b64(part_digests)}-{len(parts)}"
+                self.objects[key] = (data, metadata)
+            body = (
+                "<CompleteMultipartUploadResult>"
+                f"<Bucket>{bucket}</Bucket><Key>{object_key}</Key>"
+                f"<ETag>\"{hashlib.md5(data).hexdigest()}-{len(parts)}\"</ETag>"
+                "</CompleteMultipartUploadResult>"
+            )
+        self._throttle(0)
+        self._reply(200, body.encode(), {"Content-Type": "application/xml"})
+
+    def do_GET(self):
+        with self.lock:
+            body, _ = self.objects.get(self._key(), (None, None))
+        if body is None:
+            self._reply(404, b"<Error><Code>NoSuchKey</Code></Error>", {"Content-Type": "application/xml"})
+            return
+        headers = {"ETag": f'"{hashlib.md5(body).hexdigest()}"', "Content-Type": "application/pdf"}
+        status = 200
+        match = _RANGE.match(self.headers.get("Range", ""))
+        if match:
+            start = int(match.group(1))
+            end = int(match.group(2)) if match.group(2) else len(body) - 1
+            headers["Content-Range"] = f"bytes {start}-{end}/{len(body)}"
+            body = body[start:end + 1]
+            status = 206
+        self._throttle(len(body))
+        self._reply(status, body, headers)
+
+    def do_HEAD(self):
+        with self.lock:
+            body, metadata = self.objects.get(self._key(), (None, None))
+        if body is None:
+            self._reply(404)
+            return
+        self._throttle(0)
+        self.send_response(200)
+        self.send_header("Content-Length", str(len(body)))
+        self.send_header("ETag", f'"{hashlib.md5(body).hexdigest()}"')
+        for name, value in metadata.items():
+            # S3 reports stored checksums only when asked for them
+            if name != _CHECKSUM_HEADER or self.headers.get("x-amz-checksum-mode") == "ENABLED":
+                self.send_header(name, value)
+        self.end_headers()
+
+    def do_DELETE(self):
+        query = self._query()
+        with self.lock:
+            if "uploadId" in query:
+                self.uploads.pop(query["uploadId"], None)
+            else:
+                self.objects.pop(self._key(), None)
+        self._reply(204)
+
+    def log_message(self, *args):
+        pass
+
+
+class FakeS3Server(ThreadingHTTPServer):
+    daemon_threads = True
+
+    @property
+    def url(self) -> str:
+        return f"http://127.0.0.1:{self.server_port}"
+
+
+def start_fake_s3(latency_ms: float = 0, mbps: float = 0) -> FakeS3Server:
+    """Starts the stand-in on a free port; `mbps` caps each transfer in megabits/s (0 = unlimited)."""
+    FakeS3Handler.latency = latency_ms / 1000
+    FakeS3Handler.bytes_per_second = mbps * 1e6 / 8
+    FakeS3Handler.objects = {}
+    FakeS3Handler.uploads = {}
+    server = FakeS3Server(("127.0.0.1", 0), FakeS3Handler)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server
@@ -0,0 +1,101 @@
+"""
+Dense-only against hybrid (dense + BM25, fused with RRF) retrieval, using
+the app's own query (services/retrieval.py). Runs offline on a fixed
+question set: benchmarks/data/hybrid_eval_set.json by default, which is
+heavy on error codes, formulas, names and acronyms. Passage ids are
+`<document>-<n>`. Each question is searched within its passage's document,
+as the app searches within one library item.
+
+For each mode and k it reports:
+  hit@k       share of questions whose labelled passage is retrieved
+  MRR         mean reciprocal rank of that passage (0 when missed)
+  ctx tokens  average tokens of the retrieved chunks, i.e. the context sent to the LLM
+
+The points live in an in-memory local Qdrant, which searches exactly and
+computes the same IDF as a server. Embeddings go through
+get_openai_embeddings and its cache, so only the first run needs
+OPENAI_API_KEY.
+
+Usage (from the repo root):
+    python -m pyapp.benchmarks.hybrid_retrieval_eval
+    python -m pyapp.benchmarks.hybrid_retrieval_eval --set pyapp/benchmarks/data/dims_eval_set.json --k 3 --k 5
+"""
+import argparse
+import asyncio
+import json
+import os
+from dataclasses import replace
+
+from qdrant_client import QdrantClient
+from qdrant_client.http.models import PointStruct
+
+from pyapp.config.settings import settings
+from pyapp.services.collection_schema import CollectionLayout, create_collection, point_vector
+from pyapp.services.retrieval import chunk_query
+from pyapp.utils.embedding import get_openai_embeddings
+from pyapp.utils.tokens import count_tokens
+
+DEFAULT_SET = os.path.join(os.path.dirname(__file__), "data", "hybrid_eval_set.json")
+COLLECTION = "hybrid_eval"
+
+
+def document_of(passage_id: str) -> str:
+    return passage_id.rsplit("-", 1)[0]
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--set", default=DEFAULT_SET, help="question set: {passages: [{id, text}], questions: [{question, passage}]}")
+    parser.add_argument("--k", type=int, action="append", help="chunks retrieved per question, repeatable")
+    args = parser.parse_args()
+
+    with open(args.set) as f:
+        data = json.load(f)
+    passage_ids = [passage["id"] for passage in data["passages"]]
+    passage_texts = [passage["text"] for passage in data["passages"]]
+    questions = [item["question"] for item in data["questions"]]
+    gold = [passage_ids.index(item["passage"]) for item in data["questions"]]
+    documents = sorted({document_of(passage_id) for passage_id in passage_ids})
+    item_of = [documents.index(document_of(passage_id)) for passage_id in passage_ids]
+
+    vectors = asyncio.run(get_openai_embeddings(passage_texts + questions))
+    passage_vectors, question_vectors = vectors[:len(passage_texts)], vectors[len(passage_texts):]
+
+    client = QdrantClient(":memory:")
+    create_collection(client, COLLECTION, replace(CollectionLayout(), vector_size=len(vectors[0]), sparse_vectors=True))
+    client.upsert(
+        collection_name=COLLECTION,
+        points=[
+            PointStruct(
+                id=i,
+                vector=point_vector(vector, text, sparse=True),
+                payload={"user_id": 1, "library_item_id": item_of[i], "text_chunk": text},
+            )
+            for i, (vector, text) in enumerate(zip(passage_vectors, passage_texts))
+        ],
+    )
+    chunk_tokens = [count_tokens(text, settings.LLM_MODEL) for text in passage_texts]
+
+    print(f"passages={len(passage_texts)} documents={len(documents)} questions={len(questions)} "
+          f"prefetch={settings.RETRIEVAL_PREFETCH}")
+    print(f"{'mode':>7} {'k':>3} {'hit@k':>6} {'MRR':>6} {'ctx tokens':>11}")
+    for hybrid in (False, True):
+        for k in sorted(args.k or [2, 3, 4, 5]):
+            hits, reciprocal_ranks, context_tokens = 0, 0.0, 0
+            for question, vector, answer in zip(questions, question_vectors, gold):
+                result = client.query_points(
+                    collection_name=COLLECTION,
+                    **chunk_query(question, vector, 1, item_of[answer], limit=k, hybrid=hybrid),
+                    with_payload=False,
+                )
+                ids = [point.id for point in result.points]
+                if answer in ids:
+                    hits += 1
+                    reciprocal_ranks += 1 / (ids.index(answer) + 1)
+                context_tokens += sum(chunk_tokens[i] for i in ids)
+            print(f"{'hybrid' if hybrid else 'dense':>7} {k:>3} {hits / len(questions):6.3f} "
+                  f"{reciprocal_ranks / len(questions):6.3f} {context_tokens / len(questions):11.1f}")
+
+
+if __name__ == "__main__":
+    main()
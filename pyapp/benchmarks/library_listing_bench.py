@@ -0,0 +1,124 @@
+"""
+Latency of the library listing for a user with many items, before (.all()
+over full rows, summary/flashcards/mcqs included) and after (keyset pages of
+listing columns only). Seeds a throwaway user in the configured database and
+removes it afterwards; run `alembic upgrade head` first so the listing index
+exists.
+
+Usage (from the repo root):
+    python -m pyapp.benchmarks.library_listing_bench --items 10000
+"""
+import argparse
+import statistics
+import time
+import uuid
+from datetime import datetime, timedelta
+
+from sqlalchemy import insert, tuple_
+from sqlalchemy.orm import load_only
+
+from pyapp.db.session import SessionLocal
+from pyapp.models.library_item import ContentType, LibraryItem
+from pyapp.models.user import User
+
+SUMMARY = "## Section\n" + "- a fairly long bullet point about the article content\n" * 80
+FLASHCARDS = [{"question": f"Question {i}?", "answer": "An answer of moderate length. " * 4} for i in range(12)]
+MCQS = [{"question": f"MCQ {i}?", "options": ["A", "B", "C", "D"], "answer": "B"} for i in range(12)]
+
+
+def seed(db, items: int) -> int:
+    user = User(email=f"bench-{uuid.uuid4().hex[:8]}@example.com", hashed_password="x")
+    db.add(user)
+    db.commit()
+    start = datetime.utcnow() - timedelta(days=365)
+    rows = [
+        {
+            "user_id": user.id,
+            "url_or_path": f"https://example.com/article/{i}",
+            "content_type": ContentType.url,
+            "title": f"Article {i}",
+            "summary": SUMMARY,
+            "flashcards": FLASHCARDS,
+            "mcqs": MCQS,
+            "created_at": start + timedelta(minutes=i),
+            "updated_at": start + timedelta(minutes=i),
+        }
+        for i in range(items)
+    ]
+    for offset in range(0, items, 1000):
+        db.execute(insert(LibraryItem), rows[offset:offset + 1000])
+    db.commit()
+    return user.id
+
+
+def listing_before(db, user_id: int) -> int:
+    items = db.query(LibraryItem).filter(LibraryItem.user_id == user_id).order_by(LibraryItem.created_at.desc()).all()
+    return len([(i.id, i.title, i.url_or_path, i.created_at.isoformat()) for i in items])
+
+
+def listing_page(db, user_id: int, limit: int, cursor=None):
+    query = (
+        db.query(LibraryItem)
+        .options(load_only(LibraryItem.id, LibraryItem.title, LibraryItem.url_or_path, LibraryItem.created_at))
+        .filter(LibraryItem.user_id == user_id)
+    )
+    if cursor:
+        query = query.filter(tuple_(LibraryItem.created_at, LibraryItem.id) < cursor)
+    items = query.order_by(LibraryItem.created_at.desc(), LibraryItem.id.desc()).limit(limit + 1).all()
+    page = items[:limit]
+    next_cursor = (page[-1].created_at, page[-1].id) if len(items) > limit else None
+    return [(i.id, i.title, i.url_or_path, i.created_at.isoformat()) for i in page], next_cursor
+
+
+def timed(func, runs: int) -> float:
+    samples = []
+    for _ in range(runs):
+        started = time.perf_counter()
+        func()
+        samples.append(time.perf_counter() - started)
+    return statistics.median(samples)
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--items", type=int, default=10000)
+    parser.add_argument("--limit", type=int, default=50)
+    parser.add_argument("--runs", type=int, default=10)
+    args = parser.parse_args()
+
+    db = SessionLocal()
+    user_id = seed(db, args.items)
+    try:
+        def walk():
+            cursor = None
+            while True:
+                _, cursor = listing_page(db, user_id, args.limit, cursor)
+                db.expunge_all()
+                if cursor is None:
+                    return
+
+        def deep_page():
+            # A page from the very end of the listing still uses the index directly
+            listing_page(db, user_id, args.limit, (datetime.utcnow() - timedelta(days=364), 0))
+            db.expunge_all()
+
+        before = timed(lambda: (listing_before(db, user_id), db.expunge_all()), args.runs)
+        first = timed(lambda: (listing_page(db, user_id, args.limit), db.expunge_all()), args.runs)
+        deep = timed(deep_page, args.runs)
+        full = timed(walk, max(1, args.runs // 5))
+    finally:
+        db.rollback()
+        db.query(LibraryItem).filter(LibraryItem.user_id == user_id).delete()
+        db.query(User).filter(User.id == user_id).delete()
+        db.commit()
+        db.close()
+
+    print(f"items={args.items} page_size={args.limit}")
+    print(f"before (all rows, all columns): {before * 1000:8.1f}ms")
+    print(f"after  first page:              {first * 1000:8.1f}ms  ({before / first:.0f}x faster)")
+    print(f"after  deep page:               {deep * 1000:8.1f}ms")
+    print(f"after  walk all pages:          {full * 1000:8.1f}ms")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,124 @@
+"""
+A login burst against the auth routes, with a probe hitting a cheap sync
+endpoint throughout to show what the burst does to everyone else. Before:
+the old sync login, bcrypt inline on the default thread pool. After: the
+async login, bcrypt on its own bounded executor with 429 past
+AUTH_HASH_MAX_PENDING. Reports successful logins/s, rejected logins and the
+probe's latency. Seeds a throwaway user in the configured database and
+removes it afterwards.
+
+Usage (from the repo root):
+    python -m pyapp.benchmarks.login_bench --logins 300 --rounds 12
+"""
+import argparse
+import asyncio
+import statistics
+import time
+import uuid
+
+import httpx
+from fastapi import Depends, FastAPI, HTTPException
+from fastapi.security import OAuth2PasswordRequestForm
+from passlib.context import CryptContext
+from sqlalchemy.orm import Session
+
+from pyapp.api.routes import auth as auth_routes
+from pyapp.db.async_session import dispose_async_engine
+from pyapp.db.session import SessionLocal, get_db
+from pyapp.models.user import User
+from pyapp.utils import auth
+
+PASSWORD = "correct horse battery staple"
+
+
+def build_app() -> FastAPI:
+    app = FastAPI()
+    app.include_router(auth_routes.router, prefix="/after")
+
+    @app.post("/before/login")
+    def login_before(form_data: OAuth2PasswordRequestForm = Depends(), db: Session = Depends(get_db)):
+        # The login route as it was: sync handler, bcrypt inline on the shared thread pool
+        user = db.query(User).filter(User.email == form_data.username).first()
+        if not user or not auth.pwd_context.verify(form_data.password, user.hashed_password):
+            raise HTTPException(status_code=401, detail="Incorrect email or password")
+        return {"access_token": auth.create_access_token({"sub": str(user.id)}), "token_type": "bearer"}
+
+    @app.get("/probe")
+    def probe():
+        return {"ok": True}
+
+    return app
+
+
+async def burst(app: FastAPI, prefix: str, email: str, logins: int) -> dict:
+    transport = httpx.ASGITransport(app=app)
+    async with httpx.AsyncClient(transport=transport, base_url="http://bench", timeout=None) as client:
+        done = asyncio.Event()
+        probe_latencies = []
+
+        async def probe():
+            while not done.is_set():
+                started = time.perf_counter()
+                await client.get("/probe")
+                probe_latencies.append(time.perf_counter() - started)
+                await asyncio.sleep(0.01)
+
+        async def login():
+            response = await client.post(f"{prefix}/login", data={"username": email, "password": PASSWORD})
+            return response.status_code
+
+        probe_task = asyncio.create_task(probe())
+        await asyncio.sleep(0.05)
+        started = time.perf_counter()
+        statuses = await asyncio.gather(*(login() for _ in range(logins)))
+        elapsed = time.perf_counter() - started
+        done.set()
+        await probe_task
+    # Pooled asyncpg connections belong to this event loop
+    await dispose_async_engine()
+
+    ordered = sorted(probe_latencies)
+    return {
+        "ok": statuses.count(200),
+        "rejected": statuses.count(429),
+        "elapsed": elapsed,
+        "probe_p50": statistics.median(ordered),
+        "probe_p99": ordered[min(len(ordered) - 1, int(round(0.99 * (len(ordered) - 1))))],
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--logins", type=int, default=300, help="concurrent logins in the burst")
+    parser.add_argument("--rounds", type=int, default=12, help="bcrypt work factor of the seeded hash")
+    args = parser.parse_args()
+
+    context = CryptContext(schemes=["bcrypt"], bcrypt__rounds=args.rounds)
+    db = SessionLocal()
+    user = User(email=f"bench-{uuid.uuid4().hex[:8]}@example.com", hashed_password=context.hash(PASSWORD))
+    db.add(user)
+    db.commit()
+    user_id, email = user.id, user.email
+    # Keep the stored hash's rounds current so the "after" run measures logins, not one-off rehashes
+    auth.pwd_context.update(bcrypt__rounds=args.rounds)
+
+    app = build_app()
+    try:
+        before = asyncio.run(burst(app, "/before", email, args.logins))
+        after = asyncio.run(burst(app, "/after", email, args.logins))
+    finally:
+        db.query(User).filter(User.id == user_id).delete()
+        db.commit()
+        db.close()
+        auth.shutdown_hash_executor()
+
+    print(f"logins={args.logins} rounds={args.rounds} hash_workers={auth.settings.AUTH_HASH_WORKERS} "
+          f"max_pending={auth.settings.AUTH_HASH_MAX_PENDING}")
+    for label, result in (("before (inline, shared pool)", before), ("after  (bcrypt executor)", after)):
+        print(f"{label:30s} ok={result['ok']:4d} 429={result['rejected']:4d} "
+              f"{result['ok'] / result['elapsed']:6.1f} logins/s  "
+              f"probe p50={result['probe_p50'] * 1000:7.1f}ms p99={result['probe_p99'] * 1000:7.1f}ms")
+
+
+if __name__ == "__main__":
+    main()
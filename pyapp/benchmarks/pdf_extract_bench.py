@@ -0,0 +1,77 @@
+"""
+Text extraction time for generated multi-hundred-page PDFs: the serial page
+loop against iter_pdf_pages with 1..N process-pool workers. Also reports the
+time to the first page, which is when downstream chunking can start.
+
+Usage (from the repo root):
+    python -m pyapp.benchmarks.pdf_extract_bench --pages 300 --pages 600 --workers 1,2,4,8
+"""
+import argparse
+import os
+import statistics
+import tempfile
+import time
+
+import fitz
+
+from pyapp.utils.pdf_utils import iter_pdf_pages, shutdown_pdf_pool
+
+WORDS = "gradient descent converges when the learning rate is small enough relative to curvature".split()
+
+
+def make_pdf(path: str, pages: int) -> None:
+    doc = fitz.open()
+    for number in range(pages):
+        page = doc.new_page()
+        lines = [" ".join(WORDS[(number + i + j) % len(WORDS)] for j in range(14)) for i in range(70)]
+        page.insert_textbox(fitz.Rect(36, 36, 576, 806), f"Page {number + 1}\n" + "\n".join(lines), fontsize=7)
+    doc.save(path)
+    doc.close()
+
+
+def timed(path: str, workers: int, runs: int):
+    totals, firsts = [], []
+    for _ in range(runs):
+        started = time.perf_counter()
+        first = None
+        pages = 0
+        for _ in iter_pdf_pages(path, workers=workers, min_parallel_pages=1):
+            if first is None:
+                first = time.perf_counter() - started
+            pages += 1
+        totals.append(time.perf_counter() - started)
+        firsts.append(first)
+    return statistics.median(totals), statistics.median(firsts)
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--pages", type=int, action="append", help="page count, repeatable")
+    parser.add_argument("--workers", default=",".join(str(w) for w in (1, 2, 4, os.cpu_count() or 1)))
+    parser.add_argument("--runs", type=int, default=3)
+    args = parser.parse_args()
+    worker_counts = sorted({int(w) for w in args.workers.split(",")})
+
+    print(f"cpu_count={os.cpu_count()}")
+    try:
+        for pages in args.pages or [300, 600]:
+            with tempfile.TemporaryDirectory() as tmp:
+                path = os.path.join(tmp, "bench.pdf")
+                make_pdf(path, pages)
+                print(f"pages={pages} size={os.path.getsize(path) / 1e6:.1f} MB")
+
+                serial, serial_first = timed(path, 1, args.runs)
+                print(f"  serial      total={serial:6.2f}s first_page={serial_first * 1000:7.1f}ms")
+                for workers in worker_counts:
+                    if workers < 2:
+                        continue
+                    timed(path, workers, 1)  # spawn the pool's processes outside the measurement
+                    total, first = timed(path, workers, args.runs)
+                    print(f"  workers={workers:<3d} total={total:6.2f}s first_page={first * 1000:7.1f}ms "
+                          f"speedup={serial / total:.2f}x")
+    finally:
+        shutdown_pdf_pool()
+
+
+if __name__ == "__main__":
+    main()
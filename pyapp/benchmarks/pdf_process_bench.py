@@ -0,0 +1,99 @@
+"""
+Time from "upload bytes in hand" to "text extracted" for an uploaded PDF,
+before (upload to B2, download the object back to a temp file, extract) and
+after (spool to disk, then upload and extract from the spooled copy
+concurrently, as the upload route does), against the local S3 stand-in in
+fake_s3.
+
+Usage (from the repo root):
+    python -m pyapp.benchmarks.pdf_process_bench --pages 200 --latency-ms 40 --mbps 200
+"""
+import argparse
+import asyncio
+import io
+import os
+import statistics
+import time
+
+from pyapp.benchmarks.fake_s3 import start_fake_s3
+
+
+def make_pdf(pages: int) -> bytes:
+    import fitz
+
+    doc = fitz.open()
+    paragraph = "Retrieval augmented generation grounds answers in source documents. " * 12
+    # Incompressible figure every 5 pages, so file sizes look like real scanned/illustrated PDFs
+    for number in range(pages):
+        page = doc.new_page()
+        page.insert_textbox(fitz.Rect(50, 50, 550, 500), f"Page {number + 1}\n\n" + paragraph * 3, fontsize=9)
+        if number % 5 == 0:
+            figure = fitz.Pixmap(fitz.csRGB, 256, 256, os.urandom(256 * 256 * 3), False)
+            page.insert_image(fitz.Rect(50, 520, 306, 776), pixmap=figure)
+    data = doc.tobytes()
+    doc.close()
+    return data
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--pages", type=int, default=200)
+    parser.add_argument("--runs", type=int, default=5)
+    parser.add_argument("--latency-ms", type=float, default=40)
+    parser.add_argument("--mbps", type=float, default=200, help="simulated link speed to B2")
+    args = parser.parse_args()
+
+    server = start_fake_s3(args.latency_ms, args.mbps)
+    os.environ["B2_S3_ENDPOINT_URL"] = server.url
+    os.environ.setdefault("B2_APPLICATION_KEY_ID", "bench")
+    os.environ.setdefault("B2_APPLICATION_KEY", "bench")
+    os.environ.setdefault("B2_S3_REGION", "us-west-004")
+    os.environ.setdefault("B2_S3_ENDPOINT", "s3.us-west-004.backblazeb2.com")
+    os.environ.setdefault("B2_BUCKET_NAME", "bench")
+    os.environ.setdefault("B2_USERS_FOLDER", "users")
+
+    # Imported after the env is set so the module-level S3 client targets the stand-in
+    from pyapp.services.b2_s3 import download_file_from_s3, spool_upload, upload_pdf_to_b2, upload_spooled_pdf_to_b2
+    from pyapp.utils.pdf_utils import extract_text_from_pdf
+
+    data = make_pdf(args.pages)
+
+    def before() -> str:
+        s3_url = upload_pdf_to_b2(data, "bench.pdf", 1)
+        temp_path = download_file_from_s3(s3_url)
+        try:
+            return extract_text_from_pdf(temp_path)
+        finally:
+            os.remove(temp_path)
+
+    async def after() -> str:
+        spooled = spool_upload(io.BytesIO(data), len(data))
+        try:
+            _, text = await asyncio.gather(
+                asyncio.to_thread(upload_spooled_pdf_to_b2, spooled, "bench.pdf", 1),
+                asyncio.to_thread(extract_text_from_pdf, spooled.path),
+            )
+        finally:
+            spooled.remove()
+        return text
+
+    before_samples, after_samples = [], []
+    for _ in range(args.runs):
+        started = time.perf_counter()
+        expected = before()
+        before_samples.append(time.perf_counter() - started)
+
+        started = time.perf_counter()
+        text = asyncio.run(after())
+        after_samples.append(time.perf_counter() - started)
+        assert text == expected, "in-memory extraction must match the downloaded-file path"
+
+    server.shutdown()
+    before_s, after_s = statistics.median(before_samples), statistics.median(after_samples)
+    print(f"pdf={len(data) / 1e6:.1f} MB pages={args.pages} latency={args.latency_ms}ms link={args.mbps} Mbit/s")
+    print(f"before (upload, download, extract): {before_s:7.3f}s")
+    print(f"after  (spool, upload || extract):   {after_s:7.3f}s  ({before_s / after_s:.1f}x faster)")
+
+
+if __name__ == "__main__":
+    main()
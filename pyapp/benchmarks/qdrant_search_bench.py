@@ -0,0 +1,134 @@
+"""
+Per-query latency and response size of the ask-question Qdrant search,
+before (a new QdrantClient per query, with_vectors=True, full payload) and
+after (one shared AsyncQdrantClient, payload restricted to text_chunk, no
+vectors). Runs against the Qdrant server from settings, in a throwaway
+collection.
+
+Usage (from the repo root):
+    python -m pyapp.benchmarks.qdrant_search_bench --points 2000 --queries 200
+    QDRANT_PREFER_GRPC=true python -m pyapp.benchmarks.qdrant_search_bench
+"""
+import argparse
+import asyncio
+import statistics
+import time
+import uuid
+
+import httpx
+import numpy as np
+from qdrant_client import QdrantClient
+from qdrant_client.models import Distance, FieldCondition, Filter, MatchValue, PointStruct, VectorParams
+
+from pyapp.config.settings import settings
+from pyapp.services.qdrant_client import _client_kwargs, close_qdrant_clients, get_async_qdrant_client
+
+DIMENSIONS = 1536
+COLLECTION = f"bench_search_{uuid.uuid4().hex[:8]}"
+
+
+def seed(client: QdrantClient, points: int, items: int) -> None:
+    client.create_collection(COLLECTION, vectors_config=VectorParams(size=DIMENSIONS, distance=Distance.COSINE))
+    rng = np.random.default_rng(0)
+    for start in range(0, points, 256):
+        batch = [
+            PointStruct(
+                id=str(uuid.uuid4()),
+                vector=rng.standard_normal(DIMENSIONS).astype(np.float32).tolist(),
+                payload={"user_id": 1, "library_item_id": i % items, "text_chunk": "lorem ipsum " * 250},
+            )
+            for i in range(start, min(points, start + 256))
+        ]
+        client.upsert(COLLECTION, points=batch, wait=True)
+
+
+def item_filter(item_id: int) -> Filter:
+    return Filter(must=[
+        FieldCondition(key="user_id", match=MatchValue(value=1)),
+        FieldCondition(key="library_item_id", match=MatchValue(value=item_id)),
+    ])
+
+
+def before(query: list, item_id: int) -> None:
+    client = QdrantClient(**_client_kwargs())
+    client.query_points(COLLECTION, query=query, limit=5, query_filter=item_filter(item_id),
+                        with_payload=True, with_vectors=True)
+    client.close()
+
+
+async def after(query: list, item_id: int) -> None:
+    await get_async_qdrant_client().query_points(
+        COLLECTION, query=query, limit=5, query_filter=item_filter(item_id),
+        with_payload=["text_chunk"], with_vectors=False,
+    )
+
+
+def response_bytes(query: list, item_id: int, with_payload, with_vector: bool) -> int:
+    """Size of the equivalent REST response body (gRPC sizes are similar in proportion)."""
+    scheme = "https" if settings.QDRANT_USE_HTTPS else "http"
+    headers = {"api-key": settings.QDRANT_API_KEY} if settings.QDRANT_API_KEY else {}
+    body = {
+        "query": query,
+        "limit": 5,
+        "filter": item_filter(item_id).model_dump(exclude_none=True),
+        "with_payload": with_payload,
+        "with_vector": with_vector,
+    }
+    url = f"{scheme}://{settings.QDRANT_HOST}:{settings.QDRANT_PORT}/collections/{COLLECTION}/points/query"
+    response = httpx.post(url, json=body, headers=headers)
+    response.raise_for_status()
+    return len(response.content)
+
+
+def report(label: str, samples: list) -> None:
+    samples = sorted(samples)
+    p95 = samples[min(len(samples) - 1, int(0.95 * (len(samples) - 1)))]
+    print(f"{label:7s} mean={statistics.mean(samples) * 1000:7.2f}ms "
+          f"p50={statistics.median(samples) * 1000:7.2f}ms p95={p95 * 1000:7.2f}ms")
+
+
+async def run(points: int, queries: int, items: int) -> None:
+    admin = QdrantClient(**_client_kwargs())
+    seed(admin, points, items)
+    rng = np.random.default_rng(1)
+    workload = [(rng.standard_normal(DIMENSIONS).astype(np.float32).tolist(), i % items) for i in range(queries)]
+
+    try:
+        before_samples = []
+        for query, item_id in workload:
+            started = time.perf_counter()
+            before(query, item_id)
+            before_samples.append(time.perf_counter() - started)
+
+        await after(*workload[0])  # connection setup happens once at startup
+        after_samples = []
+        for query, item_id in workload:
+            started = time.perf_counter()
+            await after(query, item_id)
+            after_samples.append(time.perf_counter() - started)
+
+        query, item_id = workload[0]
+        bytes_before = response_bytes(query, item_id, True, True)
+        bytes_after = response_bytes(query, item_id, ["text_chunk"], False)
+    finally:
+        admin.delete_collection(COLLECTION)
+        admin.close()
+        await close_qdrant_clients()
+
+    print(f"points={points} queries={queries} prefer_grpc={settings.QDRANT_PREFER_GRPC}")
+    report("before", before_samples)
+    report("after", after_samples)
+    print(f"response bytes: before={bytes_before} after={bytes_after} ({bytes_before / bytes_after:.1f}x smaller)")
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--points", type=int, default=2000)
+    parser.add_argument("--queries", type=int, default=200)
+    parser.add_argument("--items", type=int, default=20)
+    args = parser.parse_args()
+    asyncio.run(run(args.points, args.queries, args.items))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,151 @@
+"""
+Peak RSS growth while handling concurrent PDF uploads, before (whole file read
+into bytes, single put_object) and after (spooled to disk block by block,
+hashed, multipart upload_file with TransferConfig), against the local S3
+stand-in in fake_s3. Each mode runs in a fresh interpreter so one doesn't
+inherit the other's heap.
+
+Exits non-zero if the streaming path grows RSS by more than --max-rss-mb, so
+it can gate a change to the upload settings.
+
+Usage (from the repo root):
+    python -m pyapp.benchmarks.upload_memory_bench --size-mb 50 --uploads 4
+"""
+import argparse
+import io
+import os
+import subprocess
+import sys
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from pyapp.benchmarks.fake_s3 import start_fake_s3
+
+MB = 1024 * 1024
+
+
+def _rss_bytes() -> int:
+    with open("/proc/self/status") as f:
+        for line in f:
+            if line.startswith("VmRSS:"):
+                return int(line.split()[1]) * 1024
+    return 0
+
+
+class RssSampler:
+    def __init__(self, interval: float = 0.005):
+        self.interval = interval
+        self.baseline = _rss_bytes()
+        self.peak = self.baseline
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target=self._run, daemon=True)
+
+    def _run(self):
+        while not self._stop.is_set():
+            self.peak = max(self.peak, _rss_bytes())
+            time.sleep(self.interval)
+
+    def __enter__(self):
+        self._thread.start()
+        return self
+
+    def __exit__(self, *exc):
+        self._stop.set()
+        self._thread.join()
+
+
+def make_upload(path: str, size_mb: int) -> None:
+    """Random bytes behind a PDF header: the content doesn't matter to the upload path."""
+    with open(path, "wb") as f:
+        f.write(b"%PDF-1.7\n")
+        for _ in range(size_mb):
+            f.write(os.urandom(MB))
+
+
+def run_mode(mode: str, path: str, uploads: int) -> None:
+    from pyapp.config.settings import settings
+    from pyapp.services.b2_s3 import spool_upload, upload_pdf_to_b2, upload_spooled_pdf_to_b2
+
+    def before(_):
+        # What the routes used to do: UploadFile.read() into bytes, then one put_object
+        with open(path, "rb") as incoming:
+            file_bytes = incoming.read()
+        upload_pdf_to_b2(file_bytes, "bench.pdf", 1)
+
+    def after(_):
+        with open(path, "rb") as incoming:
+            spooled = spool_upload(incoming, settings.MAX_UPLOAD_MB * MB)
+        try:
+            upload_spooled_pdf_to_b2(spooled, "bench.pdf", 1)
+        finally:
+            spooled.remove()
+
+    # Warm up imports and connection pools outside the measurement
+    with io.BytesIO(b"%PDF-1.7\n") as tiny:
+        spooled = spool_upload(tiny, MB)
+    upload_spooled_pdf_to_b2(spooled, "warmup.pdf", 1)
+    spooled.remove()
+
+    started = time.perf_counter()
+    with RssSampler() as sampler, ThreadPoolExecutor(max_workers=uploads) as executor:
+        list(executor.map(before if mode == "before" else after, range(uploads)))
+    elapsed = time.perf_counter() - started
+    print(f"{(sampler.peak - sampler.baseline) / MB:.1f} {elapsed:.3f}")
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--size-mb", type=int, default=50)
+    parser.add_argument("--uploads", type=int, default=4, help="concurrent uploads")
+    parser.add_argument("--mbps", type=float, default=400, help="simulated link speed to B2")
+    parser.add_argument("--max-rss-mb", type=float, default=0,
+                        help="fail if the streaming path exceeds this (default: part size x concurrency x uploads)")
+    parser.add_argument("--mode", choices=["before", "after"], help=argparse.SUPPRESS)
+    parser.add_argument("--path", help=argparse.SUPPRESS)
+    parser.add_argument("--endpoint", help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.mode:
+        os.environ["B2_S3_ENDPOINT_URL"] = args.endpoint
+        run_mode(args.mode, args.path, args.uploads)
+        return
+
+    server = start_fake_s3(latency_ms=20, mbps=args.mbps)
+    env = dict(os.environ)
+    for name, value in {
+        "B2_APPLICATION_KEY_ID": "bench", "B2_APPLICATION_KEY": "bench", "B2_S3_REGION": "us-west-004",
+        "B2_S3_ENDPOINT": "s3.us-west-004.backblazeb2.com", "B2_BUCKET_NAME": "bench", "B2_USERS_FOLDER": "users",
+    }.items():
+        env.setdefault(name, value)
+    env["MAX_UPLOAD_MB"] = str(args.size_mb + 1)
+
+    path = f"/tmp/upload_bench_{os.getpid()}.pdf"
+    make_upload(path, args.size_mb)
+    results = {}
+    try:
+        for mode in ("before", "after"):
+            output = subprocess.run(
+                [sys.executable, "-m", "pyapp.benchmarks.upload_memory_bench", "--mode", mode, "--path", path,
+                 "--uploads", str(args.uploads), "--endpoint", server.url],
+                env=env, check=True, capture_output=True, text=True,
+            ).stdout.split()
+            results[mode] = (float(output[-2]), float(output[-1]))
+    finally:
+        os.remove(path)
+        server.shutdown()
+
+    part_mb = int(env.get("B2_MULTIPART_PART_MB", 8))
+    concurrency = int(env.get("B2_UPLOAD_CONCURRENCY", 4))
+    bound = args.max_rss_mb or part_mb * concurrency * args.uploads
+    print(f"uploads={args.uploads} x {args.size_mb} MB, part={part_mb} MB concurrency={concurrency}")
+    for mode, (peak_mb, seconds) in results.items():
+        print(f"{mode:7s} peak RSS growth={peak_mb:7.1f} MB  time={seconds:6.2f}s")
+    if results["after"][0] > bound:
+        print(f"FAIL: streaming upload grew RSS by more than {bound} MB")
+        sys.exit(1)
+    print(f"OK: streaming upload stayed under {bound} MB")
+
+
+if __name__ == "__main__":
+    main()
@@ -1,4 +1,5 @@
 import os
+from typing import Optional
 from pydantic_settings import BaseSettings
 from dotenv import load_dotenv
 
@@ -9,22 +10,123 @@ class Settings(BaseSettings):
     OPENAI_API_KEY: str = os.getenv("OPENAI_API_KEY")
 
     LLM_MODEL: str = os.getenv("LLM_MODEL", "gpt-4o-mini")
+    # Cap on the context (retrieved passages) sent with a question, in LLM_MODEL tokens
+    LLM_CONTEXT_TOKEN_BUDGET: int = int(os.getenv("LLM_CONTEXT_TOKEN_BUDGET", 2000))
     EMBEDDINGS_MODEL: str = os.getenv("EMBEDDINGS_MODEL", "text-embedding-3-small")
+    # Vector size asked of the model and expected by the collection; text-embedding-3
+    # models shorten natively (1536 is the full size of -small). Changing it needs
+    # `python -m pyapp.reembed_vectors`.
+    EMBEDDINGS_DIMENSIONS: int = int(os.getenv("EMBEDDINGS_DIMENSIONS", 1536))
+    SUMMARY_MAP_REDUCE_THRESHOLD_TOKENS: int = int(os.getenv("SUMMARY_MAP_REDUCE_THRESHOLD_TOKENS", 12000))
+    SUMMARY_SECTION_TOKENS: int = int(os.getenv("SUMMARY_SECTION_TOKENS", 6000))
+    SUMMARY_MAP_CONCURRENCY: int = int(os.getenv("SUMMARY_MAP_CONCURRENCY", 4))
+    EMBEDDINGS_BATCH_SIZE: int = int(os.getenv("EMBEDDINGS_BATCH_SIZE", 256))
+    EMBEDDINGS_BATCH_TOKENS: int = int(os.getenv("EMBEDDINGS_BATCH_TOKENS", 100000))
+    EMBEDDINGS_CONCURRENCY: int = int(os.getenv("EMBEDDINGS_CONCURRENCY", 4))
+    CHUNK_MAX_TOKENS: int = int(os.getenv("CHUNK_MAX_TOKENS", 500))
+    CHUNK_OVERLAP_TOKENS: int = int(os.getenv("CHUNK_OVERLAP_TOKENS", 60))
+
+    EMBEDDING_CACHE_ENABLED: bool = os.getenv("EMBEDDING_CACHE_ENABLED", "true").lower() == "true"
+    EMBEDDING_CACHE_PATH: str = os.getenv("EMBEDDING_CACHE_PATH", "/tmp/skimzy/embedding_cache.sqlite3")
+    EMBEDDING_CACHE_MEMORY_ITEMS: int = int(os.getenv("EMBEDDING_CACHE_MEMORY_ITEMS", 2000))
+    EMBEDDING_CACHE_DISK_ITEMS: int = int(os.getenv("EMBEDDING_CACHE_DISK_ITEMS", 50000))
 
     DATABASE_URL: str = os.getenv("DATABASE_URL")
     DATABASE_SCHEMA: str = os.getenv("DATABASE_SCHEMA", "public")
+    # Async (request path) engine pool, per API process
+    DB_POOL_SIZE: int = int(os.getenv("DB_POOL_SIZE", 10))
+    DB_MAX_OVERFLOW: int = int(os.getenv("DB_MAX_OVERFLOW", 10))
+    DB_POOL_TIMEOUT_SECONDS: float = float(os.getenv("DB_POOL_TIMEOUT_SECONDS", 10))
+    DB_POOL_RECYCLE_SECONDS: int = int(os.getenv("DB_POOL_RECYCLE_SECONDS", 1800))
     
     QDRANT_HOST: str = os.getenv("QDRANT_HOST", "localhost")
     QDRANT_PORT: int = int(os.getenv("QDRANT_PORT", 6333))
+    QDRANT_GRPC_PORT: int = int(os.getenv("QDRANT_GRPC_PORT", 6334))
+    QDRANT_PREFER_GRPC: bool = os.getenv("QDRANT_PREFER_GRPC", "false").lower() == "true"
     QDRANT_API_KEY: str = os.getenv("QDRANT_API_KEY", None)
     QDRANT_USE_HTTPS: bool = os.getenv("QDRANT_USE_HTTPS", "false").lower() == "true"
     QDRANT_APP_VECTOR: str = os.getenv("QDRANT_APP_VECTOR", "skimzy_vectors")
+    # Chunk collection layout (see services/collection_schema.py); applied by create_collection.py
+    QDRANT_QUANTIZATION: str = os.getenv("QDRANT_QUANTIZATION", "scalar")
+    QDRANT_ON_DISK_VECTORS: bool = os.getenv("QDRANT_ON_DISK_VECTORS", "true").lower() == "true"
+    QDRANT_TENANT_HNSW: bool = os.getenv("QDRANT_TENANT_HNSW", "true").lower() == "true"
+    QDRANT_HNSW_M: int = int(os.getenv("QDRANT_HNSW_M", 16))
+    QDRANT_HNSW_EF_CONSTRUCT: int = int(os.getenv("QDRANT_HNSW_EF_CONSTRUCT", 100))
+    QDRANT_SEARCH_HNSW_EF: int = int(os.getenv("QDRANT_SEARCH_HNSW_EF", 128))
+    QDRANT_SEARCH_RESCORE: bool = os.getenv("QDRANT_SEARCH_RESCORE", "true").lower() == "true"
+    QDRANT_SEARCH_OVERSAMPLING: float = float(os.getenv("QDRANT_SEARCH_OVERSAMPLING", 2.0))
+    # BM25 sparse vectors written next to the dense ones; with RETRIEVAL_HYBRID searches fuse both (RRF)
+    QDRANT_SPARSE_VECTORS: bool = os.getenv("QDRANT_SPARSE_VECTORS", "true").lower() == "true"
+    RETRIEVAL_HYBRID: bool = os.getenv("RETRIEVAL_HYBRID", "true").lower() == "true"
+    # Chunks given to the LLM per question, and candidates each retriever contributes to the fusion
+    RETRIEVAL_TOP_K: int = int(os.getenv("RETRIEVAL_TOP_K", 4))
+    RETRIEVAL_PREFETCH: int = int(os.getenv("RETRIEVAL_PREFETCH", 20))
+    # Removal of points whose library item no longer exists; 0 disables the periodic run
+    VECTOR_RECONCILE_INTERVAL_SECONDS: int = int(os.getenv("VECTOR_RECONCILE_INTERVAL_SECONDS", 6 * 3600))
+    VECTOR_RECONCILE_BATCH: int = int(os.getenv("VECTOR_RECONCILE_BATCH", 1000))
+    # Collection optimizer settings: segments with more than this fraction of deleted points get vacuumed
+    VECTOR_VACUUM_DELETED_THRESHOLD: float = float(os.getenv("VECTOR_VACUUM_DELETED_THRESHOLD", 0.1))
+    VECTOR_VACUUM_MIN_VECTORS: int = int(os.getenv("VECTOR_VACUUM_MIN_VECTORS", 1000))
+
+    INGESTION_WORKERS: int = int(os.getenv("INGESTION_WORKERS", 2))
+    INGESTION_MAX_ATTEMPTS: int = int(os.getenv("INGESTION_MAX_ATTEMPTS", 4))
+    INGESTION_RETRY_BASE_SECONDS: float = float(os.getenv("INGESTION_RETRY_BASE_SECONDS", 5))
+    INGESTION_RETRY_MAX_SECONDS: float = float(os.getenv("INGESTION_RETRY_MAX_SECONDS", 300))
+    INGESTION_POLL_SECONDS: float = float(os.getenv("INGESTION_POLL_SECONDS", 2))
+    INGESTION_LEASE_SECONDS: int = int(os.getenv("INGESTION_LEASE_SECONDS", 300))
+
+    BROWSER_POOL_SIZE: int = int(os.getenv("BROWSER_POOL_SIZE", 1))
+    BROWSER_MAX_CONCURRENT_PAGES: int = int(os.getenv("BROWSER_MAX_CONCURRENT_PAGES", 4))
+    BROWSER_PAGES_PER_BROWSER: int = int(os.getenv("BROWSER_PAGES_PER_BROWSER", 50))
+    BROWSER_MAX_RSS_MB: int = int(os.getenv("BROWSER_MAX_RSS_MB", 600))
+
+    EXTRACT_MIN_TEXT_CHARS: int = int(os.getenv("EXTRACT_MIN_TEXT_CHARS", 500))
+    EXTRACT_MIN_TEXT_RATIO: float = float(os.getenv("EXTRACT_MIN_TEXT_RATIO", 0.003))
+    EXTRACT_DOMAIN_MEMORY_SIZE: int = int(os.getenv("EXTRACT_DOMAIN_MEMORY_SIZE", 5000))
+    EXTRACT_STATIC_REPROBE_EVERY: int = int(os.getenv("EXTRACT_STATIC_REPROBE_EVERY", 25))
+
+    EXTRACTION_CACHE_ENABLED: bool = os.getenv("EXTRACTION_CACHE_ENABLED", "true").lower() == "true"
+    EXTRACTION_CACHE_PATH: str = os.getenv("EXTRACTION_CACHE_PATH", "/tmp/skimzy/extraction_cache.sqlite3")
+    EXTRACTION_CACHE_TTL_SECONDS: int = int(os.getenv("EXTRACTION_CACHE_TTL_SECONDS", 86400))
+    EXTRACTION_CACHE_MAX_MB: int = int(os.getenv("EXTRACTION_CACHE_MAX_MB", 256))
+
+    ANSWER_CACHE_ENABLED: bool = os.getenv("ANSWER_CACHE_ENABLED", "true").lower() == "true"
+    ANSWER_CACHE_THRESHOLD: float = float(os.getenv("ANSWER_CACHE_THRESHOLD", 0.95))
+    ANSWER_CACHE_MAX_PER_ITEM: int = int(os.getenv("ANSWER_CACHE_MAX_PER_ITEM", 100))
+    ANSWER_CACHE_MAX_ENTRIES: int = int(os.getenv("ANSWER_CACHE_MAX_ENTRIES", 5000))
+
+    AUTH_USER_CACHE_TTL_SECONDS: int = int(os.getenv("AUTH_USER_CACHE_TTL_SECONDS", 60))
+    AUTH_USER_CACHE_SIZE: int = int(os.getenv("AUTH_USER_CACHE_SIZE", 10000))
+    AUTH_TRUST_TOKEN_CLAIMS: bool = os.getenv("AUTH_TRUST_TOKEN_CLAIMS", "false").lower() == "true"
+    # bcrypt work factor; stored hashes with a different one are rehashed on the next login
+    AUTH_BCRYPT_ROUNDS: int = int(os.getenv("AUTH_BCRYPT_ROUNDS", 12))
+    AUTH_HASH_WORKERS: int = int(os.getenv("AUTH_HASH_WORKERS", min(4, os.cpu_count() or 1)))
+    # Hash/verify calls running or queued beyond this are refused with 429
+    AUTH_HASH_MAX_PENDING: int = int(os.getenv("AUTH_HASH_MAX_PENDING", 32))
+    # Comma-separated emails of the users allowed on operator endpoints (/api/metrics); none by default
+    ADMIN_EMAILS: str = os.getenv("ADMIN_EMAILS", "")
+
+    LIBRARY_PAGE_SIZE: int = int(os.getenv("LIBRARY_PAGE_SIZE", 50))
+    LIBRARY_MAX_PAGE_SIZE: int = int(os.getenv("LIBRARY_MAX_PAGE_SIZE", 200))
+
+    CHAT_HISTORY_PAGE_SIZE: int = int(os.getenv("CHAT_HISTORY_PAGE_SIZE", 50))
+    CHAT_HISTORY_MAX_PAGE_SIZE: int = int(os.getenv("CHAT_HISTORY_MAX_PAGE_SIZE", 200))
+
+    PDF_EXTRACT_WORKERS: int = int(os.getenv("PDF_EXTRACT_WORKERS", min(4, os.cpu_count() or 1)))
+    PDF_PARALLEL_MIN_PAGES: int = int(os.getenv("PDF_PARALLEL_MIN_PAGES", 64))
 
     B2_APPLICATION_KEY: str = os.getenv("B2_APPLICATION_KEY")
     B2_APPLICATION_KEY_ID: str = os.getenv("B2_APPLICATION_KEY_ID")
     B2_S3_REGION: str = os.getenv("B2_S3_REGION")
     B2_S3_ENDPOINT: str = os.getenv("B2_S3_ENDPOINT")
+    # Full endpoint URL overriding https://B2_S3_ENDPOINT, e.g. a local S3 stand-in
+    B2_S3_ENDPOINT_URL: Optional[str] = os.getenv("B2_S3_ENDPOINT_URL")
     B2_BUCKET_NAME: str = os.getenv("B2_BUCKET_NAME")
     B2_USERS_FOLDER: str = os.getenv("B2_USERS_FOLDER")
+    B2_DOCUMENTS_FOLDER: str = os.getenv("B2_DOCUMENTS_FOLDER", "documents")
+    B2_MULTIPART_THRESHOLD_MB: int = int(os.getenv("B2_MULTIPART_THRESHOLD_MB", 16))
+    B2_MULTIPART_PART_MB: int = int(os.getenv("B2_MULTIPART_PART_MB", 8))  # B2/S3 minimum part size is 5 MB
+    B2_UPLOAD_CONCURRENCY: int = int(os.getenv("B2_UPLOAD_CONCURRENCY", 4))
+    MAX_UPLOAD_MB: int = int(os.getenv("MAX_UPLOAD_MB", 100))
 
 settings = Settings()
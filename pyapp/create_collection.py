@@ -1,29 +1,92 @@
-from qdrant_client.models import VectorParams, Distance
-from pyapp.services.qdrant_client import get_qdrant_client
-from qdrant_client.http.models import PayloadSchemaType
-from pyapp.config.settings import settings
+"""
+Creates or migrates the chunk vector collection (QDRANT_APP_VECTOR) with the
+layout from settings, overridable per run. The vector size is not: it is
+always EMBEDDINGS_DIMENSIONS, so collections match what the app embeds.
 
-client = get_qdrant_client()
+    python -m pyapp.create_collection create
+    python -m pyapp.create_collection migrate --alias --quantization binary
+    python -m pyapp.create_collection migrate --in-place --no-on-disk
+    python -m pyapp.create_collection migrate --alias --sparse
+    python -m pyapp.create_collection show
 
-collection_name = settings.QDRANT_APP_VECTOR
+To change the vector size, set EMBEDDINGS_DIMENSIONS and re-embed with
+`python -m pyapp.reembed_vectors`.
+"""
+import argparse
+import json
+from dataclasses import replace
 
-client.recreate_collection(
-    collection_name=collection_name,
-    vectors_config=VectorParams(
-        size=1536,  # embedding size from OpenAI
-        distance=Distance.COSINE,
-    )
+from pyapp.config.settings import settings
+from pyapp.services.collection_schema import (
+    QUANTIZATION_MODES,
+    CollectionLayout,
+    create_collection,
+    migrate_by_alias,
+    migrate_in_place,
+    resolve_collection,
+    vector_size,
 )
+from pyapp.services.qdrant_client import get_qdrant_client
 
 
-client.create_payload_index(
-    collection_name=collection_name,
-    field_name="user_id",
-    field_schema=PayloadSchemaType.INTEGER
-)
+def _layout(args) -> CollectionLayout:
+    overrides = {
+        "quantization": args.quantization,
+        "on_disk_vectors": args.on_disk,
+        "tenant_hnsw": args.tenant_hnsw,
+        "hnsw_m": args.m,
+        "hnsw_ef_construct": args.ef_construct,
+        "sparse_vectors": args.sparse,
+    }
+    return replace(CollectionLayout(), **{name: value for name, value in overrides.items() if value is not None})
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("command", choices=["create", "migrate", "show"])
+    parser.add_argument("--collection", default=settings.QDRANT_APP_VECTOR)
+    parser.add_argument("--recreate", action="store_true", help="create: drop an existing collection first")
+    mode = parser.add_mutually_exclusive_group()
+    mode.add_argument("--in-place", action="store_true", help="migrate: update the live collection")
+    mode.add_argument("--alias", action="store_true", help="migrate: rebuild next to it and switch the alias")
+    parser.add_argument("--drop-old", action="store_true", help="migrate --alias: delete the previous collection")
+    parser.add_argument("--quantization", choices=QUANTIZATION_MODES)
+    parser.add_argument("--on-disk", action=argparse.BooleanOptionalAction, default=None)
+    parser.add_argument("--tenant-hnsw", action=argparse.BooleanOptionalAction, default=None)
+    parser.add_argument("--m", type=int)
+    parser.add_argument("--ef-construct", type=int)
+    parser.add_argument("--sparse", action=argparse.BooleanOptionalAction, default=None,
+                        help="BM25 vectors for hybrid search; adding them to a collection needs migrate --alias")
+    args = parser.parse_args()
+
+    client = get_qdrant_client()
+    layout = _layout(args)
+
+    if args.command == "show":
+        collection = resolve_collection(client, args.collection)
+        info = client.get_collection(collection)
+        print(f"{args.collection} -> {collection}")
+        print(json.dumps(info.config.model_dump(mode="json"), indent=2))
+        print(f"points={info.points_count} status={info.status}")
+        if vector_size(info) != settings.EMBEDDINGS_DIMENSIONS:
+            print(f"[WARN] Vector size {vector_size(info)} does not match EMBEDDINGS_DIMENSIONS={settings.EMBEDDINGS_DIMENSIONS}")
+    elif args.command == "create":
+        if client.collection_exists(args.collection):
+            if not args.recreate:
+                parser.error(f"{args.collection} exists; pass --recreate to drop it, or use migrate")
+            client.delete_collection(resolve_collection(client, args.collection))
+        create_collection(client, args.collection, layout)
+    elif not (args.in_place or args.alias):
+        parser.error("migrate needs --in-place or --alias")
+    else:
+        try:
+            if args.in_place:
+                migrate_in_place(client, args.collection, layout)
+            else:
+                migrate_by_alias(client, args.collection, layout, drop_old=args.drop_old)
+        except ValueError as e:
+            parser.error(str(e))
+
 
-client.create_payload_index(
-    collection_name=collection_name,
-    field_name="library_item_id",
-    field_schema=PayloadSchemaType.INTEGER
-)
\ No newline at end of file
+if __name__ == "__main__":
+    main()
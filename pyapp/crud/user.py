@@ -1,22 +1,33 @@
-from sqlalchemy.orm import Session
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
 from pyapp.models.user import User
-from pyapp.utils.auth import get_password_hash, verify_password
+from pyapp.utils.auth import hash_password, verify_and_update_password
 
-def get_user_by_email(db: Session, email: str):
-    return db.query(User).filter(User.email == email).first()
+async def get_user_by_email(db: AsyncSession, email: str):
+    return (await db.execute(select(User).where(User.email == email))).scalars().first()
 
-def create_user(db: Session, email: str, password: str):
-    hashed_password = get_password_hash(password)
+async def create_user(db: AsyncSession, email: str, password: str):
+    # Hand the pooled connection back while bcrypt runs; the session reconnects on next use
+    await db.close()
+    hashed_password = await hash_password(password)
     user = User(email=email, hashed_password=hashed_password)
     db.add(user)
-    db.commit()
-    db.refresh(user)
+    await db.commit()
+    await db.refresh(user)
     return user
 
-def authenticate_user(db: Session, email: str, password: str):
-    user = get_user_by_email(db, email)
+async def authenticate_user(db: AsyncSession, email: str, password: str):
+    user = await get_user_by_email(db, email)
     if not user:
         return None
-    if not verify_password(password, user.hashed_password):
+    # As in create_user; the detached user keeps its loaded attributes
+    await db.close()
+    valid, new_hash = await verify_and_update_password(password, user.hashed_password)
+    if not valid:
         return None
+    if new_hash:
+        # Work factor changed since this hash was made; upgrade it while we have the password
+        db.add(user)
+        user.hashed_password = new_hash
+        await db.commit()
     return user
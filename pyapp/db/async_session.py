@@ -0,0 +1,55 @@
+"""
+Async engine and sessions (asyncpg) for the request path, so handlers await
+the database instead of blocking the event loop. The sync engine in
+session.py stays for the ingestion workers, scripts and Alembic.
+"""
+from typing import AsyncIterator
+
+from sqlalchemy.engine import make_url
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker, create_async_engine
+
+from pyapp.config.settings import settings
+
+
+def _async_url(url: str):
+    """postgresql:// (psycopg2) DATABASE_URL -> the asyncpg driver, same server and credentials."""
+    parsed = make_url(url)
+    if parsed.get_backend_name() != "postgresql":
+        return parsed
+    query = dict(parsed.query)
+    # asyncpg takes ssl=..., not libpq's sslmode=...
+    sslmode = query.pop("sslmode", None)
+    if sslmode and "ssl" not in query:
+        query["ssl"] = sslmode
+    return parsed.set(drivername="postgresql+asyncpg", query=query)
+
+
+def _connect_args(url) -> dict:
+    if url.get_backend_name() != "postgresql":
+        return {}
+    return {"server_settings": {"search_path": settings.DATABASE_SCHEMA}}
+
+
+_url = _async_url(settings.DATABASE_URL)
+
+async_engine = create_async_engine(
+    _url,
+    pool_size=settings.DB_POOL_SIZE,
+    max_overflow=settings.DB_MAX_OVERFLOW,
+    pool_timeout=settings.DB_POOL_TIMEOUT_SECONDS,
+    pool_recycle=settings.DB_POOL_RECYCLE_SECONDS,
+    pool_pre_ping=True,
+    connect_args=_connect_args(_url),
+)
+
+# Objects stay readable after commit, as handlers typically return them right after
+AsyncSessionLocal = async_sessionmaker(async_engine, expire_on_commit=False)
+
+
+async def get_async_db() -> AsyncIterator[AsyncSession]:
+    async with AsyncSessionLocal() as db:
+        yield db
+
+
+async def dispose_async_engine() -> None:
+    await async_engine.dispose()
@@ -1,31 +1,43 @@
 from fastapi import FastAPI, APIRouter, Request, Depends, HTTPException, Query
 from fastapi.middleware.cors import CORSMiddleware
 from fastapi.staticfiles import StaticFiles
-from fastapi.responses import FileResponse
-from sqlalchemy.orm import Session
-from datetime import datetime
+from fastapi.responses import FileResponse, StreamingResponse
+from sqlalchemy import select, tuple_
+from sqlalchemy.ext.asyncio import AsyncSession
+from typing import Optional
 import traceback
-import uuid
+import asyncio
 import json
+import time
 import os
 
 from pyapp.config.settings import settings
-from pyapp.db.session import get_db
-from pyapp.utils.auth import get_current_user
-from pyapp.utils.parser import extract_main_content
+from pyapp.db.async_session import AsyncSessionLocal, dispose_async_engine, get_async_db
+from pyapp.utils.auth import get_admin_user, get_current_user, get_token_user, shutdown_hash_executor
+from pyapp.utils.parser import extract_main_content, extraction_stats, close_http_client
 from pyapp.utils.embedding import get_openai_embeddings
-from pyapp.utils.llm_answering import ask_llm
-from pyapp.utils.text_chunker import chunk_text
+from pyapp.utils.embedding_cache import get_embedding_cache
+from pyapp.utils.extraction_cache import get_extraction_cache
+from pyapp.utils import metrics
+from pyapp.utils.pagination import decode_cursor, encode_cursor
+from pyapp.utils.pdf_utils import shutdown_pdf_pool
+from pyapp.utils.llm_answering import ask_llm, stream_llm_answer
 from pyapp.services.content_generator import generate_summary_and_flashcards
-from pyapp.services.qdrant_client import get_qdrant_client
-from pyapp.models.library_item import LibraryItem
+from pyapp.services.qdrant_client import get_async_qdrant_client, close_qdrant_clients
+from pyapp.services.ingestion_queue import enqueue_ingestion_job, ingestion_pool
+from pyapp.services.browser_pool import browser_pool
+from pyapp.services.answer_cache import answer_cache
+from pyapp.services.document_registry import dedup_stats
+from pyapp.services.collection_schema import check_collection
+from pyapp.services.retrieval import chunk_query
+from pyapp.services.vector_cleanup import reconcile_stats, start_vector_reconciler, stop_vector_reconciler
 from pyapp.models.chat_history import ChatHistory
-from qdrant_client.http.models import Filter, FieldCondition, MatchValue
 
 # External routes
 from pyapp.api.routes import auth
 from pyapp.api.routes import library_items as lib
 from pyapp.api.routes import pdf_upload
+from pyapp.api.routes import ingestion_jobs
 
 DIST_DIR = os.path.join(os.path.dirname(__file__), "..", "webapp", "dist")
 
@@ -45,99 +57,77 @@ app.add_middleware(
 app.include_router(auth.router, prefix="/api/auth", tags=["auth"])
 app.include_router(lib.router, prefix="/api", tags=["library"])
 app.include_router(pdf_upload.router, prefix="/api", tags=["pdf"])
+app.include_router(ingestion_jobs.router, prefix="/api", tags=["jobs"])
+
+# --- Startup / shutdown of shared clients and background workers ---
+@app.on_event("startup")
+async def start_background_services():
+    try:
+        await check_collection(get_async_qdrant_client())
+    except Exception as e:
+        print(f"[WARN] Could not check the vector collection: {e}")
+    await ingestion_pool.start()
+    start_vector_reconciler()
+
+@app.on_event("shutdown")
+async def stop_background_services():
+    await ingestion_pool.stop()
+    await stop_vector_reconciler()
+    # Workers are gone, so no extraction holds a browser page any more
+    await browser_pool.close()
+    await close_http_client()
+    await close_qdrant_clients()
+    shutdown_pdf_pool()
+    shutdown_hash_executor()
+    await dispose_async_engine()
 
 # --- Internal API Router with prefix ---
 api_router = APIRouter(prefix="/api")
 
 @api_router.get("/extract")
-def extract(url: str = Query(...)):
-    content = extract_main_content(url)
+async def extract(url: str = Query(...)):
+    content = await extract_main_content(url)
     return {"length": len(content), "snippet": content}
 
 @api_router.post("/generate")
 async def generate(request: Request):
     body = await request.json()
     text = body.get("text", "")
-    return generate_summary_and_flashcards(text)
+    return await asyncio.to_thread(generate_summary_and_flashcards, text)
 
-@api_router.post("/generate-from-url")
+@api_router.post("/generate-from-url", status_code=202)
 async def generate_from_url(
     request: Request,
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_async_db),
     user: dict = Depends(get_current_user)
 ):
-    try:
-        body = await request.json()
-        url = body.get("url")
-        if not url:
-            raise HTTPException(status_code=400, detail="URL is required")
-
-        text = extract_main_content(url)
-        chunks = chunk_text(text, chunk_size=500)
-        result = generate_summary_and_flashcards(text)
-
-        try:
-            result_dict = json.loads(result["output"])
-        except (KeyError, json.JSONDecodeError):
-            raise HTTPException(status_code=500, detail="Invalid generation output format")
+    body = await request.json()
+    url = body.get("url")
+    if not url:
+        raise HTTPException(status_code=400, detail="URL is required")
 
-        if "summary" not in result_dict:
-            raise HTTPException(status_code=500, detail="Content generation failed")
+    job = await enqueue_ingestion_job(db, user.id, kind="url", source=url)
+    return {"job_id": job.id, "status": job.status}
 
-        now = datetime.utcnow()
-        new_item = LibraryItem(
-            user_id=user.id,
-            url_or_path=url,
-            content_type="url",
-            title=result_dict.get("title", "Untitled"),
-            summary=result_dict.get("summary"),
-            flashcards=result_dict.get("flashcards", []),
-            mcqs=result_dict.get("mcqs", []),
-            created_at=now,
-            updated_at=now
-        )
 
-        db.add(new_item)
-        db.commit()
-        db.refresh(new_item)
+async def retrieve_relevant_chunks(user_id: int, library_item_id: int, question: str, query_embedding: list) -> list:
+    client = get_async_qdrant_client()
 
-        embeddings = await get_openai_embeddings(chunks)
-        client = get_qdrant_client()
-
-        points = [
-            {
-                "id": str(uuid.uuid4()),
-                "vector": emb,
-                "payload": {
-                    "user_id": int(user.id),
-                    "library_item_id": int(new_item.id),
-                    "text_chunk": chunk,
-                },
-            }
-            for chunk, emb in zip(chunks, embeddings)
-        ]
+    # Only the chunk text is used; skipping vectors and other payload keeps responses small
+    search_results = await client.query_points(
+        collection_name=settings.QDRANT_APP_VECTOR,
+        **chunk_query(question, query_embedding, user_id, library_item_id),
+        with_payload=["text_chunk"],
+        with_vectors=False
+    )
 
-        client.upsert(collection_name=settings.QDRANT_APP_VECTOR, points=points)
-
-        return {
-            "id": new_item.id,
-            "title": new_item.title,
-            "source": new_item.url_or_path,
-            "created_at": new_item.created_at.isoformat(),
-            "has_summary": bool(new_item.summary),
-            "has_flashcards": bool(new_item.flashcards),
-            "has_mcqs": bool(new_item.mcqs),
-        }
-
-    except Exception as e:
-        traceback.print_exc()
-        raise HTTPException(status_code=500, detail=str(e))
+    return [pt.payload["text_chunk"] for pt in search_results.points if "text_chunk" in pt.payload]
 
 
 @api_router.post("/ask-question")
 async def ask_question(
     request: Request,
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_async_db),
     user: dict = Depends(get_current_user)    
 ):
     try:
@@ -149,30 +139,16 @@ async def ask_question(
             raise HTTPException(status_code=400, detail="Missing question or library_item_id")
 
         query_embedding = (await get_openai_embeddings([question]))[0]
-        client = get_qdrant_client()
+        answer = answer_cache.lookup(user.id, library_item_id, query_embedding)
 
-        qdrant_filter = Filter(
-            must=[
-                FieldCondition(key="user_id", match=MatchValue(value=int(user.id))),
-                FieldCondition(key="library_item_id", match=MatchValue(value=int(library_item_id)))
-            ]
-        )
+        if answer is None:
+            relevant_chunks = await retrieve_relevant_chunks(user.id, library_item_id, question, query_embedding)
 
-        search_results = client.search(
-            collection_name=settings.QDRANT_APP_VECTOR,
-            query_vector=query_embedding,
-            limit=5,
-            query_filter=qdrant_filter,
-            with_payload=True,
-            with_vectors=True
-        )
-
-        relevant_chunks = [pt.payload["text_chunk"] for pt in search_results if "text_chunk" in pt.payload]
-
-        if not relevant_chunks:
-            return {"answer": "No relevant content found"}
+            if not relevant_chunks:
+                return {"answer": "No relevant content found"}
 
-        answer = ask_llm(question=question, context_chunks=relevant_chunks)
+            answer = await ask_llm(question=question, context_chunks=relevant_chunks)
+            answer_cache.store(user.id, library_item_id, question, query_embedding, answer)
 
         chat_record = ChatHistory(
             user_id=user.id,
@@ -182,7 +158,7 @@ async def ask_question(
         )
 
         db.add(chat_record)
-        db.commit()
+        await db.commit()
 
         return {"answer": answer}
     except Exception as e:
@@ -190,27 +166,166 @@ async def ask_question(
         raise HTTPException(status_code=500, detail=str(e))
 
 
+def _sse(event: str, data: dict) -> str:
+    return f"event: {event}\ndata: {json.dumps(data)}\n\n"
+
+
+async def _save_chat_record(user_id: int, library_item_id: int, question: str, answer: str) -> str:
+    """Saves the exchange and returns its chat-history cursor."""
+    # The request's session is already closed while a streaming body is being sent
+    async with AsyncSessionLocal() as db:
+        record = ChatHistory(user_id=user_id, library_item_id=library_item_id, question=question, answer=answer)
+        db.add(record)
+        await db.commit()
+        return encode_cursor(record.created_at, record.id)
+
+
+@api_router.post("/ask-question/stream")
+async def ask_question_stream(
+    request: Request,
+    user: dict = Depends(get_current_user)
+):
+    """
+    Server-Sent Events variant of /ask-question: emits `token` events as the
+    answer is generated, then a `done` event with the full answer once it has
+    been saved to chat history, along with its chat-history cursor.
+    """
+    body = await request.json()
+    question = body.get("question")
+    library_item_id = body.get("library_item_id")
+
+    if not question or not library_item_id:
+        raise HTTPException(status_code=400, detail="Missing question or library_item_id")
+
+    user_id = user.id
+    started = time.perf_counter()
+
+    try:
+        query_embedding = (await get_openai_embeddings([question]))[0]
+        cached_answer = answer_cache.lookup(user_id, library_item_id, query_embedding)
+        relevant_chunks = []
+        if cached_answer is None:
+            relevant_chunks = await retrieve_relevant_chunks(user_id, library_item_id, question, query_embedding)
+    except Exception as e:
+        traceback.print_exc()
+        raise HTTPException(status_code=500, detail=str(e))
+
+    async def event_stream():
+        if cached_answer is not None:
+            metrics.observe("ask_stream.ttft_seconds", time.perf_counter() - started)
+            cursor = await _save_chat_record(user_id, library_item_id, question, cached_answer)
+            yield _sse("token", {"text": cached_answer})
+            yield _sse("done", {"answer": cached_answer, "cursor": cursor})
+            return
+
+        if not relevant_chunks:
+            yield _sse("done", {"answer": "No relevant content found"})
+            return
+
+        tokens = stream_llm_answer(question=question, context_chunks=relevant_chunks)
+        parts = []
+        try:
+            async for delta in tokens:
+                if not parts:
+                    metrics.observe("ask_stream.ttft_seconds", time.perf_counter() - started)
+                parts.append(delta)
+                yield _sse("token", {"text": delta})
+
+                if await request.is_disconnected():
+                    metrics.incr("ask_stream.disconnects")
+                    return
+
+            answer = "".join(parts).strip()
+            cursor = await _save_chat_record(user_id, library_item_id, question, answer)
+            answer_cache.store(user_id, library_item_id, question, query_embedding, answer)
+            metrics.observe("ask_stream.total_seconds", time.perf_counter() - started)
+            yield _sse("done", {"answer": answer, "cursor": cursor})
+
+        except asyncio.CancelledError:
+            metrics.incr("ask_stream.disconnects")
+            raise
+        except Exception as e:
+            traceback.print_exc()
+            yield _sse("error", {"detail": str(e)})
+        finally:
+            # Closing the generator closes the OpenAI stream, cancelling generation upstream
+            await tokens.aclose()
+
+    return StreamingResponse(
+        event_stream(),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+    )
+
+
 @api_router.get("/chat-history/{library_item_id}")
-def get_chat_history(
+async def get_chat_history(
     library_item_id: int,
-    db: Session = Depends(get_db),
-    user: dict = Depends(get_current_user)
+    limit: int = Query(settings.CHAT_HISTORY_PAGE_SIZE, ge=1, le=settings.CHAT_HISTORY_MAX_PAGE_SIZE),
+    before: Optional[str] = Query(None),
+    since: Optional[str] = Query(None),
+    db: AsyncSession = Depends(get_async_db),
+    user: dict = Depends(get_token_user)
 ):
-    history = (
-        db.query(ChatHistory)
-        .filter_by(user_id=user.id, library_item_id=library_item_id)
-        .order_by(ChatHistory.created_at.asc())
-        .all()
+    """
+    The latest `limit` exchanges, oldest first. Pass `before=<before_cursor>`
+    to page further back, or `since=<latest_cursor>` to get only exchanges
+    newer than the ones already shown (cheap enough to poll). `has_more` says
+    whether more entries exist in the direction requested.
+    """
+    if before and since:
+        raise HTTPException(status_code=400, detail="Use either before or since, not both")
+
+    query = select(ChatHistory).where(
+        ChatHistory.user_id == user.id, ChatHistory.library_item_id == library_item_id
     )
-    return [
-        {
-            "id": chat.id,
-            "question": chat.question,
-            "answer": chat.answer,
-            "timestamp": chat.created_at.isoformat()
-        }
-        for chat in history
-    ]
+    position = tuple_(ChatHistory.created_at, ChatHistory.id)
+    if since:
+        query = (
+            query.where(position > decode_cursor(since))
+            .order_by(ChatHistory.created_at.asc(), ChatHistory.id.asc())
+            .limit(limit + 1)
+        )
+        history = (await db.execute(query)).scalars().all()
+        has_more = len(history) > limit
+        history = history[:limit]
+    else:
+        if before:
+            query = query.where(position < decode_cursor(before))
+        query = query.order_by(ChatHistory.created_at.desc(), ChatHistory.id.desc()).limit(limit + 1)
+        history = (await db.execute(query)).scalars().all()
+        has_more = len(history) > limit
+        history = history[:limit][::-1]
+
+    return {
+        "messages": [
+            {
+                "id": chat.id,
+                "question": chat.question,
+                "answer": chat.answer,
+                "timestamp": chat.created_at.isoformat()
+            }
+            for chat in history
+        ],
+        "has_more": has_more,
+        "before_cursor": encode_cursor(history[0].created_at, history[0].id) if history else before,
+        "latest_cursor": encode_cursor(history[-1].created_at, history[-1].id) if history else since,
+    }
+
+@api_router.get("/metrics")
+def get_metrics(admin: dict = Depends(get_admin_user)):
+    snapshot = metrics.snapshot()
+    embedding_cache = get_embedding_cache()
+    if embedding_cache:
+        snapshot["embedding_cache"] = embedding_cache.stats()
+    snapshot["extraction"] = extraction_stats()
+    extraction_cache = get_extraction_cache()
+    if extraction_cache:
+        snapshot["extraction_cache"] = extraction_cache.stats()
+    snapshot["answer_cache"] = answer_cache.stats()
+    snapshot["dedup"] = dedup_stats()
+    snapshot["vector_reconcile"] = reconcile_stats()
+    return snapshot
 
 # Register internal API routes
 app.include_router(api_router)
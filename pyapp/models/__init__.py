@@ -2,6 +2,8 @@ from pyapp.models.user import User
 from pyapp.models.library_item import LibraryItem
 from pyapp.models.generated_content import GeneratedContent
 from pyapp.models.chat_history import ChatHistory # (Add more models here later)
+from pyapp.models.ingestion_job import IngestionJob
+from pyapp.models.document import Document
 
 
-__all__ = ["User", "LibraryItem", "GeneratedContent", "ChatHistory"]
+__all__ = ["User", "LibraryItem", "GeneratedContent", "ChatHistory", "IngestionJob", "Document"]
@@ -1,4 +1,4 @@
-from sqlalchemy import Column, Integer, String, Text, ForeignKey, DateTime
+from sqlalchemy import Column, Integer, String, Text, ForeignKey, DateTime, Index
 from sqlalchemy.orm import relationship
 from datetime import datetime
 from pyapp.db.base import Base  # update path as per your project
@@ -15,3 +15,8 @@ class ChatHistory(Base):
 
     # Optional: relationship to library item
     library_item = relationship("LibraryItem", back_populates="chat_history")
+
+    # Chat history pages for one user and item, by (created_at, id)
+    __table_args__ = (
+        Index("ix_chat_history_user_item_created_at", "user_id", "library_item_id", "created_at", "id"),
+    )
@@ -0,0 +1,24 @@
+from sqlalchemy import Column, Integer, BigInteger, String, Text, DateTime
+from sqlalchemy.dialects.postgresql import JSONB
+from datetime import datetime
+from pyapp.db.base import Base
+
+
+class Document(Base):
+    """
+    One row per distinct uploaded file, keyed by its SHA-256. Library items
+    created from the same bytes, by any user, point here so the stored object,
+    extracted text and generated content are produced once and reused.
+    """
+    __tablename__ = "documents"
+
+    id = Column(Integer, primary_key=True, index=True)
+    sha256 = Column(String(64), nullable=False, unique=True, index=True)
+    size_bytes = Column(BigInteger, nullable=False)
+
+    storage_url = Column(String, nullable=True)  # B2 URL of the single stored copy
+    extracted_text = Column(Text, nullable=True)
+    generated = Column(JSONB, nullable=True)  # {"title", "summary", "flashcards", "mcqs"}
+
+    created_at = Column(DateTime, nullable=False, default=datetime.utcnow)
+    updated_at = Column(DateTime, nullable=False, default=datetime.utcnow, onupdate=datetime.utcnow)
@@ -0,0 +1,44 @@
+from sqlalchemy import Column, Integer, String, Text, ForeignKey, DateTime, Index
+from sqlalchemy.dialects.postgresql import JSONB
+from datetime import datetime
+from pyapp.db.base import Base
+import enum
+
+
+class JobStatus(str, enum.Enum):
+    queued = "queued"
+    running = "running"
+    succeeded = "succeeded"
+    failed = "failed"
+
+
+class IngestionJob(Base):
+    __tablename__ = "ingestion_jobs"
+
+    id = Column(Integer, primary_key=True, index=True)
+    user_id = Column(Integer, ForeignKey("users.id", ondelete="CASCADE"), nullable=False, index=True)
+
+    kind = Column(String(10), nullable=False)  # "url" or "pdf", same values as ContentType
+    source = Column(String, nullable=False)  # URL to fetch, or the B2 URL of the uploaded PDF
+    filename = Column(String, nullable=True)
+
+    status = Column(String(20), nullable=False, default=JobStatus.queued.value)
+    stage = Column(String(30), nullable=True)
+    progress = Column(JSONB, nullable=False, default=dict)  # {stage: {"status": ..., "seconds": ...}}
+    error = Column(Text, nullable=True)
+
+    attempts = Column(Integer, nullable=False, default=0)
+    max_attempts = Column(Integer, nullable=False, default=4)
+    next_attempt_at = Column(DateTime, nullable=False, default=datetime.utcnow)
+    lease_expires_at = Column(DateTime, nullable=True)
+
+    library_item_id = Column(Integer, ForeignKey("library_items.id", ondelete="SET NULL"), nullable=True)
+    document_id = Column(Integer, ForeignKey("documents.id", ondelete="SET NULL"), nullable=True)
+
+    created_at = Column(DateTime, nullable=False, default=datetime.utcnow)
+    updated_at = Column(DateTime, nullable=False, default=datetime.utcnow, onupdate=datetime.utcnow)
+
+    # Workers poll for the next runnable job by (status, next_attempt_at)
+    __table_args__ = (
+        Index("ix_ingestion_jobs_status_next_attempt_at", "status", "next_attempt_at"),
+    )
@@ -1,4 +1,4 @@
-from sqlalchemy import Column, Integer, String, ForeignKey, Enum, DateTime, Text
+from sqlalchemy import Column, Integer, String, ForeignKey, Enum, DateTime, Text, Index
 from sqlalchemy.dialects.postgresql import JSONB
 from sqlalchemy.orm import relationship
 from datetime import datetime
@@ -25,6 +25,9 @@ class LibraryItem(Base):
     flashcards = Column(JSONB, nullable=True)
     mcqs = Column(JSONB, nullable=True)
 
+    # Set for uploads registered by content hash; shared by every copy of the same file
+    document_id = Column(Integer, ForeignKey("documents.id", ondelete="SET NULL"), nullable=True, index=True)
+
     created_at = Column(DateTime, nullable=False, default=datetime.utcnow)
     updated_at = Column(DateTime, nullable=False, default=datetime.utcnow)
 
@@ -38,3 +41,8 @@ class LibraryItem(Base):
 
     chat_history = relationship("ChatHistory", back_populates="library_item", cascade="all, delete-orphan")
 
+    # Library listing: a user's items newest first, paginated by (created_at, id)
+    __table_args__ = (
+        Index("ix_library_items_user_id_created_at", "user_id", created_at.desc(), id.desc()),
+    )
+
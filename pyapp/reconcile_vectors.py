@@ -0,0 +1,27 @@
+"""
+One-off vector reconciliation (the API also runs it every
+VECTOR_RECONCILE_INTERVAL_SECONDS):
+
+    python -m pyapp.reconcile_vectors --dry-run
+"""
+import argparse
+import asyncio
+import json
+
+from pyapp.services.qdrant_client import close_qdrant_clients
+from pyapp.services.vector_cleanup import reconcile_vectors
+
+
+async def main(dry_run: bool) -> None:
+    try:
+        report = await reconcile_vectors(dry_run=dry_run)
+    finally:
+        await close_qdrant_clients()
+    print(json.dumps(report, indent=2))
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--dry-run", action="store_true", help="report orphaned points without deleting them")
+    args = parser.parse_args()
+    asyncio.run(main(args.dry_run))
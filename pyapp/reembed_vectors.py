@@ -0,0 +1,47 @@
+"""
+Re-embeds every chunk into a new collection at another vector size and
+switches the QDRANT_APP_VECTOR alias to it (services/reembedding.py).
+Interrupted runs resume from the state file:
+
+    python -m pyapp.reembed_vectors --dimensions 512 --no-switch   # backfill ahead of the deploy
+    python -m pyapp.reembed_vectors --dimensions 512               # catch up and switch
+
+then run the API with EMBEDDINGS_DIMENSIONS=512.
+"""
+import argparse
+import asyncio
+import json
+
+from pyapp.config.settings import settings
+from pyapp.services.qdrant_client import close_qdrant_clients
+from pyapp.services.reembedding import DEFAULT_STATE_PATH, reembed_collection
+
+
+async def main(args) -> None:
+    try:
+        report = await reembed_collection(
+            alias=args.collection,
+            dimensions=args.dimensions,
+            model=args.model,
+            batch_size=args.batch_size,
+            state_path=args.state,
+            switch=args.switch,
+            drop_old=args.drop_old,
+        )
+    finally:
+        await close_qdrant_clients()
+    print(json.dumps(report, indent=2))
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--collection", default=settings.QDRANT_APP_VECTOR)
+    parser.add_argument("--dimensions", type=int, default=settings.EMBEDDINGS_DIMENSIONS)
+    parser.add_argument("--model", default=settings.EMBEDDINGS_MODEL)
+    parser.add_argument("--batch-size", type=int, default=512, help="points scrolled, embedded and written per step")
+    parser.add_argument("--state", default=DEFAULT_STATE_PATH, help="checkpoint file; rerun with it to resume")
+    parser.add_argument("--switch", action=argparse.BooleanOptionalAction, default=True,
+                        help="catch up and point the alias at the new collection once filled")
+    parser.add_argument("--drop-old", action="store_true", help="delete the previous collection after switching")
+    args = parser.parse_args()
+    asyncio.run(main(args))
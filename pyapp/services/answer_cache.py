@@ -0,0 +1,120 @@
+import threading
+from collections import OrderedDict
+from typing import List, Optional, Tuple
+
+import numpy as np
+
+from pyapp.config.settings import settings
+from pyapp.utils import metrics
+
+
+class _ItemAnswers:
+    def __init__(self, dims: int):
+        self.vectors = np.empty((0, dims), dtype=np.float32)
+        self.questions: List[str] = []
+        self.answers: List[str] = []
+
+
+class SemanticAnswerCache:
+    """
+    Previously answered questions per (user, library item), held as a matrix of
+    unit-normalized question embeddings. A new question whose cosine similarity
+    to a stored one reaches `threshold` gets the stored answer back without a
+    Qdrant search or LLM call.
+
+    Bounded per item (oldest answers dropped first) and in total (least
+    recently asked items dropped first). Entries must be invalidated whenever
+    the item's content changes or the item is deleted.
+    """
+
+    def __init__(self, enabled: bool, threshold: float, max_per_item: int, max_entries: int):
+        self.enabled = enabled
+        self.threshold = threshold
+        self.max_per_item = max_per_item
+        self.max_entries = max_entries
+        self._items: "OrderedDict[Tuple[int, int], _ItemAnswers]" = OrderedDict()
+        self._entries = 0
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def _normalize(embedding: List[float]) -> np.ndarray:
+        vector = np.asarray(embedding, dtype=np.float32)
+        norm = np.linalg.norm(vector)
+        return vector / norm if norm else vector
+
+    def lookup(self, user_id: int, library_item_id: int, embedding: List[float]) -> Optional[str]:
+        if not self.enabled:
+            return None
+        key = (int(user_id), int(library_item_id))
+        query = self._normalize(embedding)
+        with self._lock:
+            item = self._items.get(key)
+            if item is None or not item.answers or item.vectors.shape[1] != len(query):
+                metrics.incr("answer_cache.misses")
+                return None
+            self._items.move_to_end(key)
+            scores = item.vectors @ query
+            best = int(np.argmax(scores))
+            if scores[best] < self.threshold:
+                metrics.incr("answer_cache.misses")
+                return None
+            metrics.incr("answer_cache.hits")
+            metrics.observe("answer_cache.hit_similarity", float(scores[best]))
+            return item.answers[best]
+
+    def store(self, user_id: int, library_item_id: int, question: str, embedding: List[float], answer: str) -> None:
+        if not self.enabled:
+            return
+        key = (int(user_id), int(library_item_id))
+        vector = self._normalize(embedding)
+        with self._lock:
+            item = self._items.get(key)
+            if item is None or item.vectors.shape[1] != len(vector):
+                if item is not None:
+                    self._entries -= len(item.answers)
+                item = self._items[key] = _ItemAnswers(len(vector))
+            self._items.move_to_end(key)
+
+            item.vectors = np.vstack([item.vectors, vector])
+            item.questions.append(question)
+            item.answers.append(answer)
+            self._entries += 1
+
+            if len(item.answers) > self.max_per_item:
+                overflow = len(item.answers) - self.max_per_item
+                item.vectors = item.vectors[overflow:]
+                item.questions = item.questions[overflow:]
+                item.answers = item.answers[overflow:]
+                self._entries -= overflow
+
+            while self._entries > self.max_entries and len(self._items) > 1:
+                _, evicted = self._items.popitem(last=False)
+                self._entries -= len(evicted.answers)
+
+    def invalidate(self, library_item_id: int) -> None:
+        """Drops every cached answer for the item, whichever user asked."""
+        with self._lock:
+            for key in [k for k in self._items if k[1] == int(library_item_id)]:
+                self._entries -= len(self._items.pop(key).answers)
+        metrics.incr("answer_cache.invalidations")
+
+    def stats(self) -> dict:
+        counters = metrics.snapshot()["counters"]
+        hits = counters.get("answer_cache.hits", 0)
+        misses = counters.get("answer_cache.misses", 0)
+        return {
+            "items": len(self._items),
+            "entries": self._entries,
+            "hits": hits,
+            "misses": misses,
+            "hit_rate": hits / (hits + misses) if hits + misses else 0.0,
+            "invalidations": counters.get("answer_cache.invalidations", 0),
+        }
+
+
+answer_cache = SemanticAnswerCache(
+    enabled=settings.ANSWER_CACHE_ENABLED,
+    threshold=settings.ANSWER_CACHE_THRESHOLD,
+    max_per_item=settings.ANSWER_CACHE_MAX_PER_ITEM,
+    max_entries=settings.ANSWER_CACHE_MAX_ENTRIES,
+)
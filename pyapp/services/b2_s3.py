@@ -1,21 +1,89 @@
+import base64
 import boto3
+import hashlib
+import os
+from dataclasses import dataclass
+from typing import BinaryIO, Optional
 from uuid import uuid4
+from boto3.s3.transfer import TransferConfig
 from botocore.client import Config
+from s3transfer.utils import ChunksizeAdjuster
 from pyapp.config.settings import settings
+from pyapp.utils import metrics
 from fastapi import HTTPException
 from urllib.parse import urlparse
 import tempfile
 
+MB = 1024 * 1024
+# Block size for copying an upload to disk; also bounds memory used while hashing it
+_COPY_BLOCK = 1 * MB
+
 
 s3_client = boto3.client(
     "s3",
     aws_access_key_id=settings.B2_APPLICATION_KEY_ID,
     aws_secret_access_key=settings.B2_APPLICATION_KEY,
-    endpoint_url=f"https://{settings.B2_S3_ENDPOINT}",
+    endpoint_url=settings.B2_S3_ENDPOINT_URL or f"https://{settings.B2_S3_ENDPOINT}",
     region_name=settings.B2_S3_REGION,
     config=Config(signature_version="s3v4"),
 )
 
+# Multipart uploads hold at most part size x concurrency in memory
+transfer_config = TransferConfig(
+    multipart_threshold=settings.B2_MULTIPART_THRESHOLD_MB * MB,
+    multipart_chunksize=settings.B2_MULTIPART_PART_MB * MB,
+    max_concurrency=settings.B2_UPLOAD_CONCURRENCY,
+    use_threads=True,
+)
+
+
+class UploadTooLarge(Exception):
+    pass
+
+
+class UploadChecksumMismatch(Exception):
+    pass
+
+
+@dataclass
+class SpooledUpload:
+    """An upload copied to a named local file, with its size and SHA-256."""
+    path: str
+    size: int
+    sha256: str
+
+    def remove(self) -> None:
+        if os.path.exists(self.path):
+            os.remove(self.path)
+
+
+def spool_upload(fileobj: BinaryIO, max_bytes: int) -> SpooledUpload:
+    """
+    Copies an incoming file to a named temp file block by block, hashing it on
+    the way and giving up as soon as it exceeds max_bytes. The named file can
+    then be uploaded in parts and opened by PyMuPDF without ever holding the
+    whole document in memory.
+    """
+    digest = hashlib.sha256()
+    size = 0
+    temp = tempfile.NamedTemporaryFile(delete=False, suffix=".pdf")
+    try:
+        with temp:
+            while True:
+                block = fileobj.read(_COPY_BLOCK)
+                if not block:
+                    break
+                size += len(block)
+                if size > max_bytes:
+                    raise UploadTooLarge(f"Upload exceeds {max_bytes // MB} MB")
+                digest.update(block)
+                temp.write(block)
+    except BaseException:
+        os.remove(temp.name)
+        raise
+    return SpooledUpload(path=temp.name, size=size, sha256=digest.hexdigest())
+
+
 def upload_pdf_to_b2(file_bytes: bytes, filename: str, user_id: int) -> str:
     """
     Uploads a PDF file to Backblaze B2 (S3-compatible) and returns the public URL.
@@ -32,6 +100,78 @@ def upload_pdf_to_b2(file_bytes: bytes, filename: str, user_id: int) -> str:
     return f"https://{settings.B2_BUCKET_NAME}.{settings.B2_S3_ENDPOINT}/{object_key}"
 
 
+def document_object_key(sha256: str) -> str:
+    """Content-addressed key for registry documents, shared by every user who uploads the file."""
+    return f"{settings.B2_DOCUMENTS_FOLDER}/{sha256[:2]}/{sha256}.pdf"
+
+
+def _b64(digest: bytes) -> str:
+    return base64.b64encode(digest).decode("ascii")
+
+
+def expected_sha256_checksum(upload: SpooledUpload) -> str:
+    """
+    The SHA-256 checksum S3 reports for the uploaded object. A single PUT
+    reports the SHA-256 of the content. A multipart upload reports the
+    SHA-256 of the parts' SHA-256 digests, suffixed with the part count. The
+    parts are cut the way upload_file cuts them.
+    """
+    if upload.size < transfer_config.multipart_threshold:
+        return _b64(bytes.fromhex(upload.sha256))
+
+    part_size = ChunksizeAdjuster().adjust_chunksize(transfer_config.multipart_chunksize, upload.size)
+    part_digests = []
+    with open(upload.path, "rb") as f:
+        for _ in range(-(-upload.size // part_size)):
+            part = hashlib.sha256()
+            remaining = part_size
+            while remaining:
+                block = f.read(min(_COPY_BLOCK, remaining))
+                if not block:
+                    break
+                part.update(block)
+                remaining -= len(block)
+            part_digests.append(part.digest())
+    return f"{_b64(hashlib.sha256(b''.join(part_digests)).digest())}-{len(part_digests)}"
+
+
+def upload_spooled_pdf_to_b2(
+    upload: SpooledUpload, filename: str, user_id: int, object_key: Optional[str] = None
+) -> str:
+    """
+    Streams a spooled PDF to B2, as a multipart upload above the multipart
+    threshold, and returns the public URL.
+
+    Every request carries the SHA-256 of its body, which the store checks on
+    receipt. The checksum the store then reports for the whole object is
+    compared with one computed from the local file before the URL is handed
+    out. If the store reports no checksum, only the size is checked and a
+    warning is logged.
+    """
+    object_key = object_key or f"{settings.B2_USERS_FOLDER}/{user_id}/{uuid4()}__{filename}"
+
+    s3_client.upload_file(
+        upload.path,
+        settings.B2_BUCKET_NAME,
+        object_key,
+        ExtraArgs={"ContentType": "application/pdf", "ChecksumAlgorithm": "SHA256"},
+        Config=transfer_config,
+    )
+
+    head = s3_client.head_object(Bucket=settings.B2_BUCKET_NAME, Key=object_key, ChecksumMode="ENABLED")
+    stored_checksum = head.get("ChecksumSHA256")
+    if stored_checksum is None:
+        metrics.incr("uploads.checksum_unavailable")
+        print(f"[WARN] No SHA-256 checksum reported for {object_key}; only its size was verified")
+    if head["ContentLength"] != upload.size or (
+        stored_checksum is not None and stored_checksum != expected_sha256_checksum(upload)
+    ):
+        s3_client.delete_object(Bucket=settings.B2_BUCKET_NAME, Key=object_key)
+        raise UploadChecksumMismatch(f"Stored object {object_key} does not match the upload")
+
+    return f"https://{settings.B2_BUCKET_NAME}.{settings.B2_S3_ENDPOINT}/{object_key}"
+
+
 def download_file_from_s3(s3_url: str) -> str:
     parsed = urlparse(s3_url)    
     bucket = settings.B2_BUCKET_NAME
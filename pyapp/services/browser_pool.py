@@ -0,0 +1,150 @@
+import asyncio
+from contextlib import asynccontextmanager
+from typing import List, Optional
+
+from playwright.async_api import async_playwright, Browser, Playwright
+
+from pyapp.config.settings import settings
+from pyapp.utils import metrics
+
+USER_AGENT = (
+    "Mozilla/5.0 (Windows NT 10.0; Win64; x64) "
+    "AppleWebKit/537.36 (KHTML, like Gecko) "
+    "Chrome/114.0.0.0 Safari/537.36"
+)
+
+LAUNCH_ARGS = ["--disable-dev-shm-usage", "--disable-gpu", "--no-zygote"]
+
+
+def _rss_bytes(pid: int) -> int:
+    try:
+        with open(f"/proc/{pid}/status") as f:
+            for line in f:
+                if line.startswith("VmRSS:"):
+                    return int(line.split()[1]) * 1024
+    except (OSError, ValueError, IndexError):
+        pass
+    return 0
+
+
+class PooledBrowser:
+    def __init__(self, browser: Browser):
+        self.browser = browser
+        self.active_pages = 0
+        self.pages_served = 0
+        self.retiring = False
+
+    async def rss_bytes(self) -> Optional[int]:
+        """Total RSS of the browser's processes (Linux only), None if unavailable."""
+        try:
+            session = await self.browser.new_browser_cdp_session()
+            try:
+                info = await session.send("SystemInfo.getProcessInfo")
+            finally:
+                await session.detach()
+        except Exception:
+            return None
+        return sum(_rss_bytes(proc["id"]) for proc in info.get("processInfo", []))
+
+
+class BrowserPool:
+    """
+    Long-lived headless Chromium instances shared by all extractions.
+
+    Every extraction gets its own browser context (isolated cookies, storage
+    and cache) on one of the pooled browsers. Concurrent pages are capped, and
+    a browser is retired and relaunched after serving `pages_per_browser`
+    pages or once its process tree grows past `max_rss_mb`, which keeps
+    Chromium's slow leaks bounded.
+    """
+
+    def __init__(self, size: int, max_concurrent_pages: int, pages_per_browser: int, max_rss_mb: int):
+        self.size = size
+        self.pages_per_browser = pages_per_browser
+        self.max_rss_bytes = max_rss_mb * 1024 * 1024
+        self._page_slots = asyncio.Semaphore(max_concurrent_pages)
+        self._lock = asyncio.Lock()
+        self._playwright: Optional[Playwright] = None
+        self._browsers: List[PooledBrowser] = []
+
+    async def _launch(self) -> PooledBrowser:
+        if self._playwright is None:
+            self._playwright = await async_playwright().start()
+        browser = await self._playwright.chromium.launch(headless=True, args=LAUNCH_ARGS)
+        metrics.incr("browser_pool.launches")
+        return PooledBrowser(browser)
+
+    async def _acquire(self) -> PooledBrowser:
+        async with self._lock:
+            self._browsers = [b for b in self._browsers if b.browser.is_connected() or b.active_pages]
+            candidates = [b for b in self._browsers if not b.retiring and b.browser.is_connected()]
+            if len(candidates) < self.size:
+                pooled = await self._launch()
+                self._browsers.append(pooled)
+                candidates.append(pooled)
+            pooled = min(candidates, key=lambda b: b.active_pages)
+            pooled.active_pages += 1
+            return pooled
+
+    async def _release(self, pooled: PooledBrowser) -> None:
+        pooled.active_pages -= 1
+        pooled.pages_served += 1
+
+        if not pooled.retiring:
+            if pooled.pages_served >= self.pages_per_browser:
+                pooled.retiring = True
+                metrics.incr("browser_pool.recycled_page_limit")
+            else:
+                rss = await pooled.rss_bytes()
+                if rss is not None:
+                    metrics.observe("browser_pool.rss_mb", rss / (1024 * 1024))
+                    if rss > self.max_rss_bytes:
+                        pooled.retiring = True
+                        metrics.incr("browser_pool.recycled_memory")
+
+        if pooled.retiring and pooled.active_pages == 0:
+            async with self._lock:
+                if pooled in self._browsers:
+                    self._browsers.remove(pooled)
+            try:
+                await pooled.browser.close()
+            except Exception as e:
+                print(f"[WARN] Failed to close retired browser: {e}")
+
+    @asynccontextmanager
+    async def page(self):
+        """Yields a fresh page in its own browser context; the context is closed afterwards."""
+        async with self._page_slots:
+            pooled = await self._acquire()
+            context = None
+            try:
+                context = await pooled.browser.new_context(user_agent=USER_AGENT)
+                page = await context.new_page()
+                yield page
+            finally:
+                if context is not None:
+                    try:
+                        await context.close()
+                    except Exception:
+                        pass
+                await self._release(pooled)
+
+    async def close(self) -> None:
+        async with self._lock:
+            browsers, self._browsers = self._browsers, []
+        for pooled in browsers:
+            try:
+                await pooled.browser.close()
+            except Exception:
+                pass
+        if self._playwright is not None:
+            await self._playwright.stop()
+            self._playwright = None
+
+
+browser_pool = BrowserPool(
+    size=settings.BROWSER_POOL_SIZE,
+    max_concurrent_pages=settings.BROWSER_MAX_CONCURRENT_PAGES,
+    pages_per_browser=settings.BROWSER_PAGES_PER_BROWSER,
+    max_rss_mb=settings.BROWSER_MAX_RSS_MB,
+)
@@ -0,0 +1,340 @@
+"""
+Layout of the chunk vector collection and the operations that manage it:
+creating it, changing the layout of a live collection in place, or
+rebuilding it next to the old one and switching an alias over to it.
+
+QDRANT_APP_VECTOR is the name every reader and writer uses. After the first
+alias migration it is an alias, so later rebuilds switch it atomically.
+
+Points carry the chunk's dense embedding (the unnamed vector) and, if the
+layout has sparse vectors, its BM25 vector (SPARSE_VECTOR) for hybrid search.
+
+The vector size always follows EMBEDDINGS_DIMENSIONS. Layout migrations copy
+vectors as they are and so cannot change it; a new size means re-embedding
+every chunk (services/reembedding.py).
+"""
+import time
+from dataclasses import dataclass
+from typing import List, Optional
+
+from qdrant_client import AsyncQdrantClient, QdrantClient
+from qdrant_client.http.models import (
+    BinaryQuantization,
+    BinaryQuantizationConfig,
+    CreateAlias,
+    CreateAliasOperation,
+    DeleteAlias,
+    DeleteAliasOperation,
+    Disabled,
+    Distance,
+    HnswConfigDiff,
+    IntegerIndexParams,
+    IntegerIndexType,
+    Modifier,
+    OptimizersConfigDiff,
+    PointStruct,
+    QuantizationSearchParams,
+    ScalarQuantization,
+    ScalarQuantizationConfig,
+    ScalarType,
+    SearchParams,
+    SparseVectorParams,
+    VectorParams,
+    VectorParamsDiff,
+)
+
+from pyapp.config.settings import settings
+from pyapp.services.vector_writes import vector_writes_blocked
+from pyapp.utils import bm25
+
+QUANTIZATION_MODES = ("none", "scalar", "binary")
+SPARSE_VECTOR = "bm25"
+# Payload fields every search filters on, exact match only
+_FILTER_FIELDS = ("user_id", "library_item_id")
+
+# Whether the live collection has sparse vectors, once check_collection has run
+_live_sparse: Optional[bool] = None
+
+
+@dataclass(frozen=True)
+class CollectionLayout:
+    vector_size: int = settings.EMBEDDINGS_DIMENSIONS
+    # "none", "scalar" (int8, 4x smaller) or "binary" (1 bit per dimension, 32x smaller)
+    quantization: str = settings.QDRANT_QUANTIZATION
+    # Original float32 vectors on disk; only the quantized copy stays in RAM
+    on_disk_vectors: bool = settings.QDRANT_ON_DISK_VECTORS
+    # One small HNSW graph per user instead of a global one; every search filters by user
+    tenant_hnsw: bool = settings.QDRANT_TENANT_HNSW
+    hnsw_m: int = settings.QDRANT_HNSW_M
+    hnsw_ef_construct: int = settings.QDRANT_HNSW_EF_CONSTRUCT
+    # BM25 vectors next to the dense ones, for hybrid search
+    sparse_vectors: bool = settings.QDRANT_SPARSE_VECTORS
+
+    def __post_init__(self):
+        if self.quantization not in QUANTIZATION_MODES:
+            raise ValueError(f"quantization must be one of {QUANTIZATION_MODES}, got {self.quantization!r}")
+
+
+def hnsw_config(layout: CollectionLayout) -> HnswConfigDiff:
+    if layout.tenant_hnsw:
+        # m=0 skips the global graph; payload_m builds one per indexed user_id value
+        return HnswConfigDiff(m=0, payload_m=layout.hnsw_m, ef_construct=layout.hnsw_ef_construct)
+    return HnswConfigDiff(m=layout.hnsw_m, ef_construct=layout.hnsw_ef_construct)
+
+
+def quantization_config(layout: CollectionLayout):
+    if layout.quantization == "scalar":
+        return ScalarQuantization(scalar=ScalarQuantizationConfig(type=ScalarType.INT8, quantile=0.99, always_ram=True))
+    if layout.quantization == "binary":
+        return BinaryQuantization(binary=BinaryQuantizationConfig(always_ram=True))
+    return None
+
+
+def search_params(layout: Optional[CollectionLayout] = None) -> SearchParams:
+    """
+    Search on the quantized vectors, then rescore the best `limit x oversampling`
+    candidates with the originals, so quantization costs little recall.
+    """
+    layout = layout or CollectionLayout()
+    quantization = None
+    if layout.quantization != "none":
+        quantization = QuantizationSearchParams(
+            rescore=settings.QDRANT_SEARCH_RESCORE,
+            oversampling=settings.QDRANT_SEARCH_OVERSAMPLING,
+        )
+    return SearchParams(hnsw_ef=settings.QDRANT_SEARCH_HNSW_EF, quantization=quantization)
+
+
+def optimizers_config() -> OptimizersConfigDiff:
+    """When the optimizers vacuum a segment: deleted points are only flagged until then."""
+    return OptimizersConfigDiff(
+        deleted_threshold=settings.VECTOR_VACUUM_DELETED_THRESHOLD,
+        vacuum_min_vector_number=settings.VECTOR_VACUUM_MIN_VECTORS,
+    )
+
+
+def _create_payload_indexes(client: QdrantClient, collection: str) -> None:
+    for field in _FILTER_FIELDS:
+        client.create_payload_index(
+            collection_name=collection,
+            field_name=field,
+            field_schema=IntegerIndexParams(type=IntegerIndexType.INTEGER, lookup=True, range=False),
+        )
+
+
+def create_collection(client: QdrantClient, collection: str, layout: CollectionLayout) -> None:
+    client.create_collection(
+        collection_name=collection,
+        vectors_config=VectorParams(size=layout.vector_size, distance=Distance.COSINE, on_disk=layout.on_disk_vectors),
+        hnsw_config=hnsw_config(layout),
+        quantization_config=quantization_config(layout),
+        optimizers_config=optimizers_config(),
+        # IDF from the collection's own document frequencies makes the sparse dot product a BM25 score
+        sparse_vectors_config={SPARSE_VECTOR: SparseVectorParams(modifier=Modifier.IDF)} if layout.sparse_vectors else None,
+    )
+    _create_payload_indexes(client, collection)
+    print(f"[INFO] Created collection {collection}: {layout}")
+
+
+def resolve_collection(client: QdrantClient, name: str) -> str:
+    """The collection `name` points to if it is an alias, else `name` itself."""
+    for alias in client.get_aliases().aliases:
+        if alias.alias_name == name:
+            return alias.collection_name
+    return name
+
+
+def vector_size(collection_info) -> int:
+    return collection_info.config.params.vectors.size
+
+
+def has_sparse_vectors(collection_info) -> bool:
+    return SPARSE_VECTOR in (collection_info.config.params.sparse_vectors or {})
+
+
+def point_vector(dense: List[float], text: Optional[str], sparse: bool):
+    """The vector of a chunk point: its embedding, plus its BM25 vector for a collection with sparse vectors."""
+    if not sparse:
+        return dense
+    return {"": dense, SPARSE_VECTOR: bm25.document_vector(text or "")}
+
+
+def _check_same_size(client: QdrantClient, collection: str, layout: CollectionLayout) -> None:
+    size = vector_size(client.get_collection(collection))
+    if size != layout.vector_size:
+        raise ValueError(
+            f"{collection} holds {size}-dim vectors, the layout asks for {layout.vector_size}; "
+            "changing the size needs re-embedding: python -m pyapp.reembed_vectors"
+        )
+
+
+async def check_collection(client: AsyncQdrantClient, name: str = settings.QDRANT_APP_VECTOR) -> bool:
+    """
+    Whether the collection's vector size matches EMBEDDINGS_DIMENSIONS; logs
+    the mismatch if not. Also records whether it has sparse vectors, for
+    sparse_vectors_enabled().
+    """
+    global _live_sparse
+    info = await client.get_collection(name)
+    _live_sparse = has_sparse_vectors(info)
+    if settings.QDRANT_SPARSE_VECTORS and not _live_sparse:
+        print(f"[WARN] {name} has no sparse vectors, search stays dense-only; add them with "
+              "python -m pyapp.create_collection migrate --alias")
+    size = vector_size(info)
+    if size != settings.EMBEDDINGS_DIMENSIONS:
+        print(
+            f"[ERROR] {name} holds {size}-dim vectors but EMBEDDINGS_DIMENSIONS is {settings.EMBEDDINGS_DIMENSIONS}: "
+            "searches and ingestion will fail until they match"
+        )
+        return False
+    return True
+
+
+def sparse_vectors_enabled() -> bool:
+    """Whether chunks get BM25 vectors: on in settings, and present in the live collection if it was checked."""
+    return settings.QDRANT_SPARSE_VECTORS and _live_sparse is not False
+
+
+def migrate_in_place(client: QdrantClient, name: str, layout: CollectionLayout) -> None:
+    """
+    Applies the layout to the live collection. Qdrant keeps serving from the
+    current segments while its optimizers rebuild them (status "yellow" until
+    done), so this needs no downtime, but the rebuild competes with queries
+    for CPU and briefly needs room for both copies of each segment.
+    """
+    collection = resolve_collection(client, name)
+    _check_same_size(client, collection, layout)
+    if layout.sparse_vectors != has_sparse_vectors(client.get_collection(collection)):
+        print(f"[WARN] Sparse vectors cannot be added or removed in place; {collection} keeps its own. Use migrate --alias")
+    client.update_collection(
+        collection_name=collection,
+        vectors_config={"": VectorParamsDiff(on_disk=layout.on_disk_vectors)},
+        hnsw_config=hnsw_config(layout),
+        quantization_config=quantization_config(layout) or Disabled.DISABLED,
+        optimizers_config=optimizers_config(),
+    )
+    _create_payload_indexes(client, collection)
+    print(f"[INFO] Updated collection {collection} in place: {layout}")
+
+
+def _copied_vector(record, sparse: bool):
+    """A record's vector for a target with or without sparse vectors, computing the BM25 one if missing."""
+    vector = record.vector
+    if isinstance(vector, dict):
+        if sparse and SPARSE_VECTOR in vector:
+            return vector
+        vector = vector[""]
+    return point_vector(vector, (record.payload or {}).get("text_chunk"), sparse)
+
+
+def copy_points(client: QdrantClient, source: str, target: str, batch_size: int = 256) -> int:
+    """
+    Copies every point (same ids, vectors and payloads); re-running it only
+    overwrites. Sparse vectors are computed from the chunk text when the
+    target has them and the source does not.
+    """
+    sparse = has_sparse_vectors(client.get_collection(target))
+    copied = 0
+    offset = None
+    while True:
+        records, offset = client.scroll(
+            collection_name=source, limit=batch_size, offset=offset, with_payload=True, with_vectors=True
+        )
+        if records:
+            client.upsert(
+                collection_name=target,
+                points=[
+                    PointStruct(id=record.id, vector=_copied_vector(record, sparse), payload=record.payload)
+                    for record in records
+                ],
+            )
+            copied += len(records)
+        if offset is None:
+            return copied
+
+
+def copy_missing_points(client: QdrantClient, source: str, target: str, batch_size: int = 256) -> int:
+    """
+    Copies the points of `source` that `target` lacks, i.e. the ones written
+    after a full copy went past their id. Points already in `target` are left
+    alone, so writes and deletes made there since are never undone.
+    """
+    sparse = has_sparse_vectors(client.get_collection(target))
+    copied = 0
+    offset = None
+    while True:
+        records, offset = client.scroll(
+            collection_name=source, limit=batch_size, offset=offset, with_payload=False, with_vectors=False
+        )
+        ids = [record.id for record in records]
+        if ids:
+            present_ids = {point.id for point in client.retrieve(collection_name=target, ids=ids)}
+            missing = [point_id for point_id in ids if point_id not in present_ids]
+            if missing:
+                missing_records = client.retrieve(
+                    collection_name=source, ids=missing, with_payload=True, with_vectors=True
+                )
+                client.upsert(
+                    collection_name=target,
+                    points=[
+                        PointStruct(id=record.id, vector=_copied_vector(record, sparse), payload=record.payload)
+                        for record in missing_records
+                    ],
+                )
+                copied += len(missing_records)
+        if offset is None:
+            return copied
+
+
+def switch_alias(client: QdrantClient, alias: str, collection: str) -> Optional[str]:
+    """Points `alias` at `collection`; returns the collection it pointed to before."""
+    previous = resolve_collection(client, alias)
+    if previous == alias and client.collection_exists(alias):
+        # First migration: `alias` is still a real collection and has to be removed
+        # before the alias can take its name. Searches in between fail, for milliseconds;
+        # callers hold writes back with vector_writes_blocked().
+        print(f"[WARN] Replacing collection {alias} by an alias; searches fail until the alias exists")
+        client.delete_collection(alias)
+        client.update_collection_aliases(
+            change_aliases_operations=[CreateAliasOperation(create_alias=CreateAlias(collection_name=collection, alias_name=alias))]
+        )
+        return None
+
+    # Delete and create in one request: Qdrant applies them atomically
+    operations = []
+    if previous != alias:
+        operations.append(DeleteAliasOperation(delete_alias=DeleteAlias(alias_name=alias)))
+    operations.append(CreateAliasOperation(create_alias=CreateAlias(collection_name=collection, alias_name=alias)))
+    client.update_collection_aliases(change_aliases_operations=operations)
+    return previous if previous != alias else None
+
+
+def migrate_by_alias(client: QdrantClient, alias: str, layout: CollectionLayout, drop_old: bool = False) -> str:
+    """
+    Builds a new collection with the layout, copies every point into it and
+    switches `alias` over. Points written while the copy runs are caught up
+    by copying the ones the new collection lacks, with vector writes held
+    back until the switch is done. Points deleted during the copy may come
+    back and are removed by the next vector reconciliation. The old
+    collection is kept for rollback unless drop_old (never kept on the first
+    migration, which deletes it to free the name).
+    """
+    source = resolve_collection(client, alias)
+    _check_same_size(client, source, layout)
+    target = f"{alias}_{time.strftime('%Y%m%d%H%M%S')}"
+    create_collection(client, target, layout)
+
+    started = time.perf_counter()
+    copied = copy_points(client, source, target)
+    print(f"[INFO] Copied {copied} points from {source} to {target} in {time.perf_counter() - started:.1f}s")
+
+    # Caught up before the switch rather than after: once writes go to the
+    # target, the source cannot tell points written late from points deleted since
+    with vector_writes_blocked():
+        caught_up = copy_missing_points(client, source, target)
+        switch_alias(client, alias, target)
+    print(f"[INFO] {alias} now points to {target}; caught up on {caught_up} points")
+    if drop_old and source != alias:
+        client.delete_collection(source)
+        print(f"[INFO] Dropped {source}")
+    return target
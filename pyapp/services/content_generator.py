@@ -1,19 +1,17 @@
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import List, Tuple
+
 from openai import OpenAI
 from pyapp.utils.secrets import get_openai_api_key
 from pyapp.config.settings import settings
+from pyapp.utils import metrics
+from pyapp.utils.text_chunker import iter_token_chunks
+from pyapp.utils.tokens import count_tokens
 
 client = OpenAI(api_key=get_openai_api_key())
 
-def generate_summary_and_flashcards(text: str) -> dict:
-    if not text:
-        return {"error": "Empty content"}
-
-    prompt = f"""
-You are an assistant helping students learn from articles efficiently.
-
-ARTICLE:
-{text}
-
+OUTPUT_SPEC = """
 TASKS: 
 Return the result as JSON like this:
 {{
@@ -34,22 +32,120 @@ Return the result as JSON like this:
 }}
 
 - "summary" should be very descriptive without missing any important and critical points.
-- "flashcards" should be around 10 or more objects depending on the number of paragraphs in the article. If article is short, you can return less flashcards.
-- "mcqs" should be around 10 or more objects depending on the number of paragraphs in the article. If article is short, you can return less mcqs.
+- "flashcards" should be around 10 or more objects depending on the number of paragraphs in the {source}. If {source} is short, you can return less flashcards.
+- "mcqs" should be around 10 or more objects depending on the number of paragraphs in the {source}. If {source} is short, you can return less mcqs.
 
 DO NOT RETURN LEADING OR TRAILING QUOTES like ``` or JSON
 """
 
-    try:
-        response = client.chat.completions.create(
-            model=settings.LLM_MODEL,
-            messages=[{"role": "user", "content": prompt}],
-            temperature=0.7,
-            # max_tokens=1500,
-        )
-        content = response.choices[0].message.content
-        
-        return {"output": content.replace("```", "")}
+SECTION_PROMPT = """
+You are an assistant helping students learn from long documents efficiently.
+Below is section {index} of {total} of a document.
+
+SECTION:
+{text}
+
+Write detailed markdown notes for this section only: its main ideas, key
+definitions, facts, figures, names and examples, as bullet points under short
+headings. Keep everything a student would need to write questions about it.
+Do not add an introduction or conclusion.
+"""
 
+
+def _complete(prompt: str, usage: dict) -> str:
+    response = client.chat.completions.create(
+        model=settings.LLM_MODEL,
+        messages=[{"role": "user", "content": prompt}],
+        temperature=0.7,
+    )
+    if response.usage:
+        usage["prompt_tokens"] += response.usage.prompt_tokens
+        usage["completion_tokens"] += response.usage.completion_tokens
+    return response.choices[0].message.content
+
+
+def _final_prompt(source: str, body: str) -> str:
+    return f"""
+You are an assistant helping students learn from articles efficiently.
+
+{source.upper()}:
+{body}
+""" + OUTPUT_SPEC.format(source=source)
+
+
+def _split_sections(text: str) -> List[str]:
+    return list(iter_token_chunks(
+        text,
+        max_tokens=settings.SUMMARY_SECTION_TOKENS,
+        overlap_tokens=0,
+        model=settings.LLM_MODEL,
+    ))
+
+
+def _map_reduce(text: str, usage: dict) -> Tuple[str, dict]:
+    """
+    Summarizes each section concurrently (at most SUMMARY_MAP_CONCURRENCY
+    requests in flight), then builds the final output from the section notes.
+    """
+    timings = {}
+    started = time.perf_counter()
+    sections = _split_sections(text)
+    map_usage = [{"prompt_tokens": 0, "completion_tokens": 0} for _ in sections]
+
+    def summarize_section(i: int) -> str:
+        prompt = SECTION_PROMPT.format(index=i + 1, total=len(sections), text=sections[i])
+        return _complete(prompt, map_usage[i])
+
+    with ThreadPoolExecutor(max_workers=settings.SUMMARY_MAP_CONCURRENCY) as executor:
+        notes = list(executor.map(summarize_section, range(len(sections))))
+    timings["map"] = time.perf_counter() - started
+    for section_usage in map_usage:
+        usage["prompt_tokens"] += section_usage["prompt_tokens"]
+        usage["completion_tokens"] += section_usage["completion_tokens"]
+
+    started = time.perf_counter()
+    body = "\n\n".join(f"## Section {i + 1}\n{note}" for i, note in enumerate(notes))
+    content = _complete(_final_prompt("notes", body), usage)
+    timings["reduce"] = time.perf_counter() - started
+    timings["sections"] = len(sections)
+    return content, timings
+
+
+def generate_summary_and_flashcards(text: str) -> dict:
+    """
+    Inputs up to SUMMARY_MAP_REDUCE_THRESHOLD_TOKENS go to the model in one
+    call. Longer ones are split into sections that are summarized in parallel
+    and then merged, so the prompt never has to hold the whole document.
+    """
+    if not text:
+        return {"error": "Empty content"}
+
+    usage = {"prompt_tokens": 0, "completion_tokens": 0}
+    input_tokens = count_tokens(text, settings.LLM_MODEL)
+    started = time.perf_counter()
+    try:
+        if input_tokens <= settings.SUMMARY_MAP_REDUCE_THRESHOLD_TOKENS:
+            mode, timings = "single", {}
+            content = _complete(_final_prompt("article", text), usage)
+        else:
+            mode = "map_reduce"
+            content, timings = _map_reduce(text, usage)
     except Exception as e:
         return {"error": str(e)}
+
+    total = time.perf_counter() - started
+    metrics.observe(f"generation.{mode}_seconds", total)
+    for stage in ("map", "reduce"):
+        if stage in timings:
+            metrics.observe(f"generation.{stage}_seconds", timings[stage])
+    metrics.incr(f"generation.{mode}_runs")
+    metrics.incr("generation.prompt_tokens", usage["prompt_tokens"])
+    metrics.incr("generation.completion_tokens", usage["completion_tokens"])
+
+    stages = "".join(f" {stage}={timings[stage]:.1f}s" for stage in ("map", "reduce") if stage in timings)
+    print(
+        f"[INFO] Generated content: mode={mode} input_tokens={input_tokens} "
+        f"sections={timings.get('sections', 1)} total={total:.1f}s{stages} "
+        f"prompt_tokens={usage['prompt_tokens']} completion_tokens={usage['completion_tokens']}"
+    )
+    return {"output": content.replace("```", "")}
@@ -0,0 +1,171 @@
+import asyncio
+import uuid
+from datetime import datetime
+from typing import List, Optional
+
+from sqlalchemy import select, update
+from sqlalchemy.dialects.postgresql import insert
+from sqlalchemy.ext.asyncio import AsyncSession
+from qdrant_client.http.models import Filter, FieldCondition, FilterSelector, MatchValue, PointStruct
+
+from pyapp.config.settings import settings
+from pyapp.db.session import SessionLocal
+from pyapp.models.document import Document
+from pyapp.models.ingestion_job import IngestionJob, JobStatus
+from pyapp.models.library_item import LibraryItem
+from pyapp.services.qdrant_client import get_async_qdrant_client
+from pyapp.services.vector_writes import vector_writes
+from pyapp.utils import metrics
+
+
+async def register_upload(db: AsyncSession, sha256: str, size_bytes: int) -> Document:
+    """
+    Returns the registry row for the file's content hash, creating it on first
+    sight. Concurrent first uploads of the same file race on the unique sha256
+    and end up with the same row.
+    """
+    now = datetime.utcnow()
+    await db.execute(
+        insert(Document)
+        .values(sha256=sha256, size_bytes=size_bytes, created_at=now, updated_at=now)
+        .on_conflict_do_nothing(index_elements=["sha256"])
+    )
+    await db.commit()
+    document = (await db.execute(select(Document).where(Document.sha256 == sha256))).scalar_one()
+
+    metrics.incr("dedup.uploads")
+    if document.storage_url:
+        metrics.incr("dedup.hits")
+    return document
+
+
+async def set_storage_url(db: AsyncSession, document_id: int, storage_url: str) -> str:
+    """Records where the file was stored; if another upload got there first, its URL wins."""
+    await db.execute(
+        update(Document)
+        .where(Document.id == document_id, Document.storage_url.is_(None))
+        .values(storage_url=storage_url, updated_at=datetime.utcnow())
+    )
+    await db.commit()
+    return (await db.execute(select(Document.storage_url).where(Document.id == document_id))).scalar()
+
+
+def load_document(document_id: int) -> Optional[Document]:
+    db = SessionLocal()
+    try:
+        return db.query(Document).filter(Document.id == document_id).first()
+    finally:
+        db.close()
+
+
+def fill_document(document_id: int, **fields) -> None:
+    """Stores extracted text / generated content for later copies, without overwriting either."""
+    db = SessionLocal()
+    try:
+        for name, value in fields.items():
+            if value is None:
+                continue
+            column = getattr(Document, name)
+            db.query(Document).filter(Document.id == document_id, column.is_(None)).update(
+                {name: value, "updated_at": datetime.utcnow()}, synchronize_session=False
+            )
+        db.commit()
+    finally:
+        db.close()
+
+
+def _sibling_item_ids(document_id: int, library_item_id: int) -> List[int]:
+    """
+    Other library items of the same document whose ingestion finished, so
+    their vectors are complete. An item still being indexed, or whose job
+    failed partway, holds only some of its chunks and is never copied from.
+    """
+    db = SessionLocal()
+    try:
+        rows = (
+            db.query(LibraryItem.id)
+            .join(IngestionJob, IngestionJob.library_item_id == LibraryItem.id)
+            .filter(
+                LibraryItem.document_id == document_id,
+                LibraryItem.id != library_item_id,
+                IngestionJob.status == JobStatus.succeeded.value,
+            )
+            .distinct()
+            .order_by(LibraryItem.id.desc())
+            .all()
+        )
+        return [row.id for row in rows]
+    finally:
+        db.close()
+
+
+def _item_filter(library_item_id: int) -> Filter:
+    return Filter(must=[FieldCondition(key="library_item_id", match=MatchValue(value=int(library_item_id)))])
+
+
+async def copy_document_vectors(document_id: int, user_id: int, library_item_id: int) -> int:
+    """
+    Copies the indexed chunks of another fully ingested library item made
+    from the same document, relabelled with this item's user and id, so this
+    item owns its own points: deleting either item never touches the other's
+    vectors. Returns the number of points copied (0 if no such item has any,
+    and the item is then indexed from scratch).
+    """
+    sibling_ids = await asyncio.to_thread(_sibling_item_ids, document_id, library_item_id)
+    if not sibling_ids:
+        return 0
+
+    client = get_async_qdrant_client()
+    # A retried copy may come from a sibling with fewer points than the last
+    # attempt wrote; start clean so none of those are left behind
+    await client.delete(
+        collection_name=settings.QDRANT_APP_VECTOR,
+        points_selector=FilterSelector(filter=_item_filter(library_item_id)),
+    )
+    for sibling_id in sibling_ids:
+        # Written page by page, so a large document is never held in memory whole
+        copied = 0
+        offset = None
+        while True:
+            records, offset = await client.scroll(
+                collection_name=settings.QDRANT_APP_VECTOR,
+                scroll_filter=_item_filter(sibling_id),
+                limit=256,
+                offset=offset,
+                with_payload=True,
+                with_vectors=True,
+            )
+            if records:
+                copies = [
+                    PointStruct(
+                        # Same deterministic scheme as a fresh index, so a retried copy overwrites itself
+                        id=str(uuid.uuid5(uuid.NAMESPACE_URL, f"skimzy:{library_item_id}:{copied + i}")),
+                        vector=point.vector,
+                        payload={**point.payload, "user_id": int(user_id), "library_item_id": int(library_item_id)},
+                    )
+                    for i, point in enumerate(records)
+                ]
+                async with vector_writes():
+                    await client.upsert(collection_name=settings.QDRANT_APP_VECTOR, points=copies)
+                copied += len(copies)
+            if offset is None:
+                break
+        if not copied:
+            continue
+
+        metrics.incr("dedup.vectors_reused")
+        return copied
+    return 0
+
+
+def dedup_stats() -> dict:
+    counters = metrics.snapshot()["counters"]
+    uploads = counters.get("dedup.uploads", 0)
+    hits = counters.get("dedup.hits", 0)
+    return {
+        "uploads": uploads,
+        "hits": hits,
+        "hit_rate": hits / uploads if uploads else 0.0,
+        "generation_reused": counters.get("dedup.generation_reused", 0),
+        "vectors_reused": counters.get("dedup.vectors_reused", 0),
+    }
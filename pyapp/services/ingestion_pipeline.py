@@ -0,0 +1,221 @@
+import asyncio
+import json
+import os
+import uuid
+from datetime import datetime
+from itertools import islice
+from typing import Iterator, List
+
+from pyapp.config.settings import settings
+from pyapp.db.session import SessionLocal
+from pyapp.models.ingestion_job import IngestionJob, JobStatus
+from pyapp.models.library_item import LibraryItem
+from pyapp.services.answer_cache import answer_cache
+from pyapp.services.b2_s3 import download_file_from_s3
+from pyapp.services.collection_schema import point_vector, sparse_vectors_enabled
+from pyapp.services.content_generator import generate_summary_and_flashcards
+from pyapp.services.document_registry import copy_document_vectors, fill_document, load_document
+from pyapp.services.qdrant_client import get_async_qdrant_client
+from pyapp.services.vector_cleanup import delete_item_vectors
+from pyapp.services.vector_writes import vector_writes
+from pyapp.utils import metrics
+from pyapp.utils.embedding import get_openai_embeddings
+from pyapp.utils.parser import extract_main_content
+from pyapp.utils.pdf_utils import iter_pdf_pages
+from pyapp.utils.text_chunker import iter_token_chunks
+
+
+class PermanentJobError(Exception):
+    """The job can never succeed (bad input); it is failed without retrying."""
+
+
+class TransientJobError(Exception):
+    """A failure worth retrying with backoff (upstream hiccup, rate limit...)."""
+
+
+class LeaseLost(Exception):
+    """The job's lease lapsed and another worker claimed it; this attempt must stop."""
+
+
+# Chunks embedded and indexed per round: enough to keep every embedding request of
+# get_openai_embeddings in flight, while the chunks, vectors and points held stay bounded
+_INDEX_BATCH_CHUNKS = settings.EMBEDDINGS_BATCH_SIZE * settings.EMBEDDINGS_CONCURRENCY
+
+
+def _pdf_pages(s3_url: str) -> Iterator[str]:
+    """The stored PDF's pages in order; the downloaded copy is removed once iteration ends."""
+    temp_path = download_file_from_s3(s3_url)
+    try:
+        yield from iter_pdf_pages(temp_path)
+    finally:
+        if os.path.exists(temp_path):
+            os.remove(temp_path)
+
+
+def _extract_pdf_text(s3_url: str) -> str:
+    return "\n".join(_pdf_pages(s3_url)).strip()
+
+
+def _parse_generation(result: dict) -> dict:
+    if "error" in result:
+        # content_generator swallows the OpenAI exception; most are timeouts or rate limits
+        raise TransientJobError(f"Content generation failed: {result['error']}")
+    try:
+        result_dict = json.loads(result["output"])
+    except (KeyError, json.JSONDecodeError):
+        raise TransientJobError("Invalid generation output format")
+    if "summary" not in result_dict:
+        raise TransientJobError("Content generation returned no summary")
+    return result_dict
+
+
+def _save_library_item(job, result_dict: dict) -> int:
+    """Creates the library item and links it to the job in a single transaction."""
+    default_title = job.filename or "Untitled"
+    now = datetime.utcnow()
+    db = SessionLocal()
+    try:
+        new_item = LibraryItem(
+            user_id=job.user_id,
+            url_or_path=job.source,
+            content_type=job.kind,
+            title=result_dict.get("title", default_title),
+            summary=result_dict.get("summary"),
+            flashcards=result_dict.get("flashcards", []),
+            mcqs=result_dict.get("mcqs", []),
+            document_id=job.document_id,
+            created_at=now,
+            updated_at=now,
+        )
+        db.add(new_item)
+        db.flush()
+        linked = db.query(IngestionJob).filter(
+            IngestionJob.id == job.id,
+            IngestionJob.attempts == job.attempts,
+            IngestionJob.status == JobStatus.running.value,
+        ).update({"library_item_id": new_item.id}, synchronize_session=False)
+        if not linked:
+            db.rollback()
+            raise LeaseLost(f"Ingestion job {job.id} was claimed by another worker")
+        db.commit()
+        return new_item.id
+    finally:
+        db.close()
+
+
+async def _index_chunks(
+    user_id: int, library_item_id: int, chunks: List[str], embeddings: List[List[float]], first: int = 0
+) -> None:
+    """Writes the chunks as points numbered from `first`, their position in the item's chunk sequence."""
+    client = get_async_qdrant_client()
+    sparse = sparse_vectors_enabled()
+    points = [
+        {
+            # Deterministic ids so a retried job overwrites its points instead of duplicating them
+            "id": str(uuid.uuid5(uuid.NAMESPACE_URL, f"skimzy:{library_item_id}:{i}")),
+            "vector": point_vector(emb, chunk, sparse),
+            "payload": {
+                "user_id": int(user_id),
+                "library_item_id": int(library_item_id),
+                "text_chunk": chunk,
+            },
+        }
+        for i, (chunk, emb) in enumerate(zip(chunks, embeddings), start=first)
+    ]
+    async with vector_writes():
+        await client.upsert(collection_name=settings.QDRANT_APP_VECTOR, points=points)
+
+
+def discard_library_item(library_item_id: int) -> None:
+    """Removes a half-ingested item (and any points already written) after a job gives up."""
+    answer_cache.invalidate(library_item_id)
+    db = SessionLocal()
+    try:
+        item = db.query(LibraryItem).filter(LibraryItem.id == library_item_id).first()
+        if item:
+            db.delete(item)
+            db.commit()
+    finally:
+        db.close()
+
+    delete_item_vectors(library_item_id)
+
+
+async def run_ingestion(job, tracker) -> int:
+    """
+    Runs the fetch -> generate -> save -> index pipeline for a claimed job and
+    returns the library item id. On a retry after the item was already saved,
+    generation is skipped and only the vectors are rebuilt. Chunks are cut
+    lazily and embedded and indexed a bounded batch at a time; a PDF whose
+    whole text nothing else needs is chunked straight from its pages.
+
+    Uploads registered by content hash reuse whatever an earlier copy of the
+    same file already produced: text, generated content and indexed vectors.
+    """
+    document = None
+    if job.document_id is not None:
+        document = await asyncio.to_thread(load_document, job.document_id)
+
+    text = None
+    async with tracker.stage("extract"):
+        if document is not None and document.extracted_text is not None:
+            text = document.extracted_text
+        elif job.kind == "pdf" and job.library_item_id is not None and document is None:
+            # Older job retried after its item was saved: only chunking needs the text
+            pass
+        elif job.kind == "pdf":
+            # Older jobs, or uploads whose in-request extraction failed
+            text = await asyncio.to_thread(_extract_pdf_text, job.source)
+        else:
+            text = await extract_main_content(job.source)
+        if text is not None and not text.strip():
+            raise PermanentJobError("Empty or unreadable content")
+        if document is not None and document.extracted_text is None:
+            await asyncio.to_thread(fill_document, document.id, extracted_text=text)
+
+    library_item_id = job.library_item_id
+    if library_item_id is None:
+        async with tracker.stage("generate"):
+            if document is not None and document.generated:
+                result_dict = document.generated
+                metrics.incr("dedup.generation_reused")
+            else:
+                result = await asyncio.to_thread(generate_summary_and_flashcards, text)
+                result_dict = _parse_generation(result)
+                if document is not None:
+                    await asyncio.to_thread(fill_document, document.id, generated=result_dict)
+
+        async with tracker.stage("save"):
+            library_item_id = await asyncio.to_thread(_save_library_item, job, result_dict)
+            job.library_item_id = library_item_id
+
+    if document is not None:
+        async with tracker.stage("copy_vectors"):
+            copied = await copy_document_vectors(document.id, job.user_id, library_item_id)
+        if copied:
+            answer_cache.invalidate(library_item_id)
+            return library_item_id
+
+    async with tracker.stage("index"):
+        pages = _pdf_pages(job.source) if text is None else None
+        chunks = iter_token_chunks(text if text is not None else pages)
+        indexed = 0
+        try:
+            while True:
+                # Off the event loop: cutting chunks may mean extracting PDF pages
+                batch = await asyncio.to_thread(lambda: list(islice(chunks, _INDEX_BATCH_CHUNKS)))
+                if not batch:
+                    break
+                embeddings = await get_openai_embeddings(batch)
+                await _index_chunks(job.user_id, library_item_id, batch, embeddings, first=indexed)
+                indexed += len(batch)
+        finally:
+            # Removes the downloaded PDF even when the stage fails
+            if pages is not None:
+                pages.close()
+        if not indexed:
+            raise PermanentJobError("Empty or unreadable content")
+        # Answers given against an earlier ingest of this item may no longer match its content
+        answer_cache.invalidate(library_item_id)
+
+    return library_item_id
@@ -0,0 +1,364 @@
+import asyncio
+import random
+import time
+import traceback
+from contextlib import asynccontextmanager
+from dataclasses import dataclass
+from datetime import datetime, timedelta
+from typing import Optional
+
+import httpx
+import openai
+import requests
+from botocore.exceptions import EndpointConnectionError, ConnectionClosedError, ReadTimeoutError
+from qdrant_client.http.exceptions import ResponseHandlingException
+from sqlalchemy import and_, or_
+from sqlalchemy.exc import OperationalError
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from pyapp.config.settings import settings
+from pyapp.db.session import SessionLocal
+from pyapp.models.ingestion_job import IngestionJob, JobStatus
+from pyapp.services.ingestion_pipeline import (
+    LeaseLost,
+    PermanentJobError,
+    TransientJobError,
+    discard_library_item,
+    run_ingestion,
+)
+
+TRANSIENT_ERRORS = (
+    TransientJobError,
+    openai.APIConnectionError,
+    openai.RateLimitError,
+    openai.InternalServerError,
+    httpx.TransportError,
+    requests.ConnectionError,
+    requests.Timeout,
+    EndpointConnectionError,
+    ConnectionClosedError,
+    ReadTimeoutError,
+    ResponseHandlingException,
+    OperationalError,
+    ConnectionError,
+    TimeoutError,
+    asyncio.TimeoutError,
+)
+
+
+@dataclass
+class ClaimedJob:
+    id: int
+    user_id: int
+    kind: str
+    source: str
+    filename: Optional[str]
+    library_item_id: Optional[int]
+    attempts: int
+    max_attempts: int
+    progress: dict
+    document_id: Optional[int] = None
+
+
+async def enqueue_ingestion_job(
+    db: AsyncSession,
+    user_id: int,
+    kind: str,
+    source: str,
+    filename: Optional[str] = None,
+    document_id: Optional[int] = None,
+) -> IngestionJob:
+    job = IngestionJob(
+        user_id=user_id,
+        kind=kind,
+        source=source,
+        filename=filename,
+        document_id=document_id,
+        status=JobStatus.queued.value,
+        progress={},
+        max_attempts=settings.INGESTION_MAX_ATTEMPTS,
+        next_attempt_at=datetime.utcnow(),
+    )
+    db.add(job)
+    await db.commit()
+    ingestion_pool.notify()
+    return job
+
+
+def _update_job(job_id: int, attempt: Optional[int] = None, **fields) -> bool:
+    """
+    Updates the job row and returns whether it was updated. With `attempt`,
+    only while that attempt still owns the job: once its lease lapsed and
+    another worker claimed the job, attempts has moved on (or the job was
+    failed) and the stale worker's writes are dropped.
+    """
+    db = SessionLocal()
+    try:
+        fields["updated_at"] = datetime.utcnow()
+        query = db.query(IngestionJob).filter(IngestionJob.id == job_id)
+        if attempt is not None:
+            query = query.filter(IngestionJob.attempts == attempt, IngestionJob.status == JobStatus.running.value)
+        updated = query.update(fields, synchronize_session=False)
+        db.commit()
+        return updated > 0
+    finally:
+        db.close()
+
+
+def _lease_expiry() -> datetime:
+    return datetime.utcnow() + timedelta(seconds=settings.INGESTION_LEASE_SECONDS)
+
+
+def _claim_next_job() -> Optional[ClaimedJob]:
+    """
+    Atomically takes the next runnable job. Jobs whose worker died mid-run
+    (status running, lease expired) are picked up again, so nothing is lost
+    across restarts. SKIP LOCKED keeps concurrent workers off the same row.
+    """
+    now = datetime.utcnow()
+    db = SessionLocal()
+    try:
+        while True:
+            job = (
+                db.query(IngestionJob)
+                .filter(or_(
+                    and_(IngestionJob.status == JobStatus.queued.value, IngestionJob.next_attempt_at <= now),
+                    and_(IngestionJob.status == JobStatus.running.value, IngestionJob.lease_expires_at < now),
+                ))
+                .order_by(IngestionJob.next_attempt_at, IngestionJob.id)
+                .with_for_update(skip_locked=True)
+                .first()
+            )
+            if job is None:
+                return None
+
+            if job.attempts >= job.max_attempts:
+                # A worker was lost while running the final attempt
+                library_item_id = job.library_item_id
+                job.status = JobStatus.failed.value
+                job.error = job.error or "Worker lost while processing"
+                job.lease_expires_at = None
+                db.commit()
+                # After the commit: deleting the item updates this row (ON DELETE SET NULL)
+                if library_item_id is not None:
+                    print(f"[ERROR] Ingestion job {job.id} failed after {job.attempts} attempt(s): worker lost")
+                    try:
+                        discard_library_item(library_item_id)
+                    except Exception:
+                        traceback.print_exc()
+                continue
+
+            job.status = JobStatus.running.value
+            job.attempts += 1
+            job.error = None
+            job.lease_expires_at = _lease_expiry()
+            db.commit()
+
+            return ClaimedJob(
+                id=job.id,
+                user_id=job.user_id,
+                kind=job.kind,
+                source=job.source,
+                filename=job.filename,
+                library_item_id=job.library_item_id,
+                attempts=job.attempts,
+                max_attempts=job.max_attempts,
+                progress=dict(job.progress or {}),
+                document_id=job.document_id,
+            )
+    finally:
+        db.close()
+
+
+def retry_delay(attempts: int) -> float:
+    """Exponential backoff with jitter: base * 2^(n-1), capped, scaled by [0.5, 1)."""
+    delay = min(settings.INGESTION_RETRY_MAX_SECONDS, settings.INGESTION_RETRY_BASE_SECONDS * 2 ** (attempts - 1))
+    return delay * (0.5 + random.random() / 2)
+
+
+class StageTracker:
+    """Persists per-stage progress on the job row and keeps the job's lease."""
+
+    def __init__(self, job: ClaimedJob):
+        self.job = job
+        self.progress = job.progress
+        # Set once another worker has claimed the job after this attempt's lease lapsed
+        self.lease_lost = False
+
+    async def _persist(self, stage: str) -> None:
+        owned = await asyncio.to_thread(
+            _update_job,
+            self.job.id,
+            attempt=self.job.attempts,
+            stage=stage,
+            progress=dict(self.progress),
+            lease_expires_at=_lease_expiry(),
+        )
+        if not owned:
+            self.lease_lost = True
+            raise LeaseLost(f"Ingestion job {self.job.id} was claimed by another worker")
+
+    async def keep_lease(self) -> None:
+        """
+        Renews the lease every third of INGESTION_LEASE_SECONDS, so a stage
+        may run longer than the lease. Returns once the job turns out to have
+        been claimed by another worker.
+        """
+        while True:
+            await asyncio.sleep(settings.INGESTION_LEASE_SECONDS / 3)
+            try:
+                owned = await asyncio.to_thread(
+                    _update_job, self.job.id, attempt=self.job.attempts, lease_expires_at=_lease_expiry()
+                )
+            except Exception as e:
+                print(f"[WARN] Could not renew the lease of ingestion job {self.job.id}: {e}")
+                continue
+            if not owned:
+                self.lease_lost = True
+                return
+
+    @asynccontextmanager
+    async def stage(self, name: str):
+        self.progress[name] = {"status": "running", "attempt": self.job.attempts}
+        await self._persist(name)
+        started = time.perf_counter()
+        try:
+            yield
+        except BaseException as e:
+            self.progress[name] = {
+                "status": "failed",
+                "attempt": self.job.attempts,
+                "seconds": round(time.perf_counter() - started, 3),
+                "error": str(e)[:500],
+            }
+            raise
+        self.progress[name] = {
+            "status": "done",
+            "attempt": self.job.attempts,
+            "seconds": round(time.perf_counter() - started, 3),
+        }
+        await self._persist(name)
+
+
+class IngestionWorkerPool:
+    """A fixed number of asyncio workers pulling jobs from the ingestion_jobs table."""
+
+    def __init__(self, workers: int, poll_seconds: float):
+        self.workers = workers
+        self.poll_seconds = poll_seconds
+        self._tasks = []
+        self._wakeup: Optional[asyncio.Event] = None
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+
+    async def start(self) -> None:
+        self._loop = asyncio.get_running_loop()
+        self._wakeup = asyncio.Event()
+        self._tasks = [asyncio.create_task(self._worker(n)) for n in range(self.workers)]
+        print(f"[INFO] Started {self.workers} ingestion workers")
+
+    async def stop(self) -> None:
+        for task in self._tasks:
+            task.cancel()
+        await asyncio.gather(*self._tasks, return_exceptions=True)
+        self._tasks = []
+
+    def notify(self) -> None:
+        """Wakes idle workers right away instead of waiting for the next poll."""
+        if self._loop is not None and self._wakeup is not None:
+            self._loop.call_soon_threadsafe(self._wakeup.set)
+
+    async def _worker(self, n: int) -> None:
+        while True:
+            try:
+                job = await asyncio.to_thread(_claim_next_job)
+            except Exception as e:
+                print(f"[WARN] Ingestion worker {n} could not claim a job: {e}")
+                job = None
+
+            if job is None:
+                try:
+                    await asyncio.wait_for(self._wakeup.wait(), timeout=self.poll_seconds)
+                except asyncio.TimeoutError:
+                    pass
+                self._wakeup.clear()
+                continue
+
+            await self._run(job)
+
+    async def _run(self, job: ClaimedJob) -> None:
+        tracker = StageTracker(job)
+        run = asyncio.create_task(run_ingestion(job, tracker))
+        lease = asyncio.create_task(tracker.keep_lease())
+        try:
+            # keep_lease only returns when the job was lost; the run is then stopped below
+            await asyncio.wait({run, lease}, return_when=asyncio.FIRST_COMPLETED)
+        finally:
+            # On shutdown too: the job is left running; its lease expires and another worker resumes it
+            lease.cancel()
+            run.cancel()
+            await asyncio.gather(run, lease, return_exceptions=True)
+
+        if tracker.lease_lost:
+            print(f"[WARN] Ingestion job {job.id} attempt {job.attempts} stopped: "
+                  f"its lease lapsed and another worker claimed it")
+            return
+        try:
+            library_item_id = run.result()
+        except Exception as e:
+            traceback.print_exc()
+            await self._handle_failure(job, tracker, e)
+            return
+
+        await asyncio.to_thread(
+            _update_job,
+            job.id,
+            attempt=job.attempts,
+            status=JobStatus.succeeded.value,
+            stage="done",
+            progress=dict(tracker.progress),
+            library_item_id=library_item_id,
+            lease_expires_at=None,
+            error=None,
+        )
+
+    async def _handle_failure(self, job: ClaimedJob, tracker: StageTracker, error: Exception) -> None:
+        retryable = isinstance(error, TRANSIENT_ERRORS) and not isinstance(error, PermanentJobError)
+
+        if retryable and job.attempts < job.max_attempts:
+            delay = retry_delay(job.attempts)
+            print(f"[WARN] Ingestion job {job.id} attempt {job.attempts} failed, retrying in {delay:.1f}s: {error}")
+            await asyncio.to_thread(
+                _update_job,
+                job.id,
+                attempt=job.attempts,
+                status=JobStatus.queued.value,
+                progress=dict(tracker.progress),
+                next_attempt_at=datetime.utcnow() + timedelta(seconds=delay),
+                lease_expires_at=None,
+                error=str(error),
+            )
+            return
+
+        print(f"[ERROR] Ingestion job {job.id} failed after {job.attempts} attempt(s): {error}")
+        owned = await asyncio.to_thread(
+            _update_job,
+            job.id,
+            attempt=job.attempts,
+            status=JobStatus.failed.value,
+            progress=dict(tracker.progress),
+            library_item_id=None,
+            lease_expires_at=None,
+            error=str(error),
+        )
+        # A worker that took the job over meanwhile still needs the item
+        if owned and job.library_item_id is not None:
+            try:
+                await asyncio.to_thread(discard_library_item, job.library_item_id)
+            except Exception:
+                traceback.print_exc()
+
+
+ingestion_pool = IngestionWorkerPool(
+    workers=settings.INGESTION_WORKERS,
+    poll_seconds=settings.INGESTION_POLL_SECONDS,
+)
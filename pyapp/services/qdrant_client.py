@@ -1,19 +1,51 @@
-import os
-from qdrant_client import QdrantClient
+import threading
+from typing import Optional
+from qdrant_client import QdrantClient, AsyncQdrantClient
 from pyapp.config.settings import settings
 
-def get_qdrant_client():
-    host = settings.QDRANT_HOST
-    port = settings.QDRANT_PORT
-    api_key = settings.QDRANT_API_KEY
-    use_https = settings.QDRANT_USE_HTTPS
-    
-    if api_key:
-        return QdrantClient(
-            host=host,
-            port=port,
-            api_key=api_key,
-            https=use_https,
-        )
-    else:
-        return QdrantClient(host=host, port=port)
+_client: Optional[QdrantClient] = None
+_async_client: Optional[AsyncQdrantClient] = None
+_lock = threading.Lock()
+
+
+def _client_kwargs() -> dict:
+    kwargs = {
+        "host": settings.QDRANT_HOST,
+        "port": settings.QDRANT_PORT,
+        "grpc_port": settings.QDRANT_GRPC_PORT,
+        "prefer_grpc": settings.QDRANT_PREFER_GRPC,
+    }
+    if settings.QDRANT_API_KEY:
+        kwargs["api_key"] = settings.QDRANT_API_KEY
+        kwargs["https"] = settings.QDRANT_USE_HTTPS
+    return kwargs
+
+
+def get_qdrant_client() -> QdrantClient:
+    """Process-wide sync client, for scripts and code running in worker threads."""
+    global _client
+    if _client is None:
+        with _lock:
+            if _client is None:
+                _client = QdrantClient(**_client_kwargs())
+    return _client
+
+
+def get_async_qdrant_client() -> AsyncQdrantClient:
+    """Process-wide async client; it keeps its HTTP/gRPC connections open across requests."""
+    global _async_client
+    if _async_client is None:
+        with _lock:
+            if _async_client is None:
+                _async_client = AsyncQdrantClient(**_client_kwargs())
+    return _async_client
+
+
+async def close_qdrant_clients() -> None:
+    global _client, _async_client
+    if _async_client is not None:
+        await _async_client.close()
+        _async_client = None
+    if _client is not None:
+        _client.close()
+        _client = None
@@ -0,0 +1,204 @@
+"""
+Re-embeds every chunk of the vector collection at another size (or with
+another model) into a new collection, then switches the QDRANT_APP_VECTOR
+alias over to it. Chunk texts come from the points' text_chunk payload, so
+nothing is re-extracted or re-chunked, and points keep their ids.
+
+The job is resumable. After each batch is written, it records the scroll
+offset in a small state file, and a rerun with the same file continues from
+there. Redoing the last batch is harmless because upserts by id only
+overwrite.
+
+The API embeds questions and new chunks at EMBEDDINGS_DIMENSIONS. Once the
+alias points to the new collection, the API must run with the new size, or
+its searches and ingestion fail. To keep that window short, backfill ahead
+with switch=False, then rerun with the same state file at deploy time. The
+rerun only catches up on points written in the meantime before switching.
+"""
+import json
+import os
+import time
+from dataclasses import replace
+from typing import List, Optional
+
+from qdrant_client.http.models import PointStruct
+
+from pyapp.config.settings import settings
+from pyapp.services.collection_schema import (
+    CollectionLayout,
+    create_collection,
+    has_sparse_vectors,
+    point_vector,
+    resolve_collection,
+    switch_alias,
+)
+from pyapp.services.qdrant_client import get_async_qdrant_client, get_qdrant_client
+from pyapp.services.vector_writes import vector_writes_blocked
+from pyapp.utils import metrics
+from pyapp.utils.embedding import get_openai_embeddings
+
+DEFAULT_STATE_PATH = "/tmp/skimzy/reembed_state.json"
+
+
+def _load_state(path: str) -> Optional[dict]:
+    if not os.path.exists(path):
+        return None
+    with open(path) as f:
+        return json.load(f)
+
+
+def _save_state(path: str, state: dict) -> None:
+    os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+    # Write then rename, so a crash mid-write never leaves a truncated checkpoint
+    tmp_path = f"{path}.tmp"
+    with open(tmp_path, "w") as f:
+        json.dump(state, f)
+    os.replace(tmp_path, path)
+
+
+async def _reembed_records(target: str, records: List, model: str, dimensions: int, sparse: bool) -> int:
+    """Embeds the records' chunk texts and writes them to `target`; returns how many had a text."""
+    usable = [record for record in records if (record.payload or {}).get("text_chunk")]
+    if not usable:
+        return 0
+    vectors = await get_openai_embeddings(
+        [record.payload["text_chunk"] for record in usable], model=model, dimensions=dimensions, use_cache=False
+    )
+    await get_async_qdrant_client().upsert(
+        collection_name=target,
+        points=[
+            PointStruct(id=record.id, vector=point_vector(vector, record.payload["text_chunk"], sparse), payload=record.payload)
+            for record, vector in zip(usable, vectors)
+        ],
+    )
+    metrics.incr("vectors.reembedded", len(usable))
+    return len(usable)
+
+
+async def _catch_up(source: str, target: str, model: str, dimensions: int, sparse: bool, batch_size: int) -> int:
+    """
+    Re-embeds the points of `source` that `target` lacks, i.e. the ones
+    written after the backfill went past their id. Points rewritten under an
+    existing id in the meantime keep the backfilled vector.
+    """
+    client = get_async_qdrant_client()
+    added = 0
+    offset = None
+    while True:
+        records, offset = await client.scroll(
+            collection_name=source, limit=batch_size, offset=offset, with_payload=False, with_vectors=False
+        )
+        ids = [record.id for record in records]
+        if ids:
+            present = await client.retrieve(collection_name=target, ids=ids, with_payload=False, with_vectors=False)
+            present_ids = {point.id for point in present}
+            missing = [point_id for point_id in ids if point_id not in present_ids]
+            if missing:
+                missing_records = await client.retrieve(
+                    collection_name=source, ids=missing, with_payload=True, with_vectors=False
+                )
+                added += await _reembed_records(target, missing_records, model, dimensions, sparse)
+        if offset is None:
+            return added
+
+
+async def reembed_collection(
+    alias: str = settings.QDRANT_APP_VECTOR,
+    dimensions: int = settings.EMBEDDINGS_DIMENSIONS,
+    model: str = settings.EMBEDDINGS_MODEL,
+    batch_size: int = 512,
+    state_path: str = DEFAULT_STATE_PATH,
+    switch: bool = True,
+    drop_old: bool = False,
+) -> dict:
+    """
+    Runs, or resumes, the re-embedding of `alias` into a new collection of
+    `dimensions`-sized vectors. The new collection keeps the layout from
+    settings. When switch is set, catches up and points `alias` at the new
+    collection. The old collection is kept for rollback unless drop_old.
+    Returns a report of the run.
+    """
+    sync_client = get_qdrant_client()
+    client = get_async_qdrant_client()
+
+    state = _load_state(state_path)
+    if state is not None:
+        if (state["alias"], state["model"], state["dimensions"]) != (alias, model, dimensions):
+            raise ValueError(
+                f"{state_path} belongs to a run re-embedding {state['alias']} with "
+                f"{state['model']} at {state['dimensions']} dims; finish that run or delete the file"
+            )
+        print(f"[INFO] Resuming re-embedding of {state['source']} into {state['target']} "
+              f"after {state['embedded']} points")
+    else:
+        state = {
+            "alias": alias,
+            "model": model,
+            "dimensions": dimensions,
+            "source": resolve_collection(sync_client, alias),
+            "target": f"{alias}_{dimensions}d_{time.strftime('%Y%m%d%H%M%S')}",
+            "offset": None,
+            "backfilled": False,
+            "embedded": 0,
+            "skipped": 0,
+            "seconds": 0.0,
+        }
+        # Recorded before the collection exists, so a crash right after creating it cannot orphan it
+        _save_state(state_path, state)
+
+    source, target = state["source"], state["target"]
+    if not sync_client.collection_exists(target):
+        create_collection(sync_client, target, replace(CollectionLayout(), vector_size=dimensions))
+    sparse = has_sparse_vectors(sync_client.get_collection(target))
+
+    while not state["backfilled"]:
+        started = time.perf_counter()
+        records, next_offset = await client.scroll(
+            collection_name=source, limit=batch_size, offset=state["offset"], with_payload=True, with_vectors=False
+        )
+        written = await _reembed_records(target, records, model, dimensions, sparse)
+        state["embedded"] += written
+        state["skipped"] += len(records) - written
+        state["offset"] = next_offset
+        state["backfilled"] = next_offset is None
+        state["seconds"] += time.perf_counter() - started
+        _save_state(state_path, state)
+        print(f"[INFO] Re-embedded {state['embedded']} points into {target} "
+              f"({state['embedded'] / max(state['seconds'], 1e-9):.0f}/s)")
+
+    if state["skipped"]:
+        print(f"[WARN] {state['skipped']} points of {source} have no text_chunk and were not copied")
+
+    started = time.perf_counter()
+    caught_up = await _catch_up(source, target, model, dimensions, sparse, batch_size)
+    switched = False
+    if switch:
+        # The last writes are caught up with new ones held back, before the switch:
+        # after it the source cannot tell them from points deleted through the alias
+        with vector_writes_blocked():
+            caught_up += await _catch_up(source, target, model, dimensions, sparse, batch_size)
+            switch_alias(sync_client, alias, target)
+        if drop_old and source != alias:
+            sync_client.delete_collection(source)
+            print(f"[INFO] Dropped {source}")
+        switched = True
+        print(f"[INFO] {alias} now points to {target}; run the API with EMBEDDINGS_DIMENSIONS={dimensions}")
+    state["seconds"] += time.perf_counter() - started
+
+    report = {
+        "source": source,
+        "target": target,
+        "model": model,
+        "dimensions": dimensions,
+        "embedded_points": state["embedded"] + caught_up,
+        "caught_up_points": caught_up,
+        "skipped_points": state["skipped"],
+        "switched": switched,
+        "seconds": round(state["seconds"], 3),
+    }
+    if switched:
+        os.remove(state_path)
+    else:
+        _save_state(state_path, state)
+        print(f"[INFO] {target} is filled; rerun with the same state file to catch up and switch {alias}")
+    return report
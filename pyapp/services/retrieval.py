@@ -0,0 +1,60 @@
+"""
+The search behind question answering: the chunks of one library item that
+best match a question.
+
+Dense search alone misses chunks that share the question's rare words
+(names, acronyms, error codes, formula symbols) but not its overall meaning.
+Hybrid search also runs a BM25 search on the sparse vectors. It fuses both
+rankings with Reciprocal Rank Fusion, which uses ranks only, so the two
+kinds of scores never need calibrating against each other.
+"""
+from typing import List, Optional
+
+from qdrant_client.http.models import FieldCondition, Filter, Fusion, FusionQuery, MatchValue, Prefetch
+
+from pyapp.config.settings import settings
+from pyapp.services.collection_schema import SPARSE_VECTOR, search_params, sparse_vectors_enabled
+from pyapp.utils import bm25
+
+
+def item_filter(user_id: int, library_item_id: int) -> Filter:
+    return Filter(
+        must=[
+            FieldCondition(key="user_id", match=MatchValue(value=int(user_id))),
+            FieldCondition(key="library_item_id", match=MatchValue(value=int(library_item_id))),
+        ]
+    )
+
+
+def chunk_query(
+    question: str,
+    query_embedding: List[float],
+    user_id: int,
+    library_item_id: int,
+    limit: Optional[int] = None,
+    hybrid: Optional[bool] = None,
+) -> dict:
+    """
+    query_points arguments, for either client, that find the top `limit`
+    (RETRIEVAL_TOP_K) chunks. Hybrid unless turned off in settings or the live
+    collection has no sparse vectors; the caller adds the collection and what
+    to return.
+    """
+    limit = limit or settings.RETRIEVAL_TOP_K
+    if hybrid is None:
+        hybrid = settings.RETRIEVAL_HYBRID and sparse_vectors_enabled()
+    qdrant_filter = item_filter(user_id, library_item_id)
+
+    sparse_query = bm25.query_vector(question) if hybrid else None
+    # A question made only of stopwords has no terms to match
+    if sparse_query is None or not sparse_query.indices:
+        return {"query": query_embedding, "query_filter": qdrant_filter, "search_params": search_params(), "limit": limit}
+
+    return {
+        "prefetch": [
+            Prefetch(query=query_embedding, filter=qdrant_filter, params=search_params(), limit=settings.RETRIEVAL_PREFETCH),
+            Prefetch(query=sparse_query, using=SPARSE_VECTOR, filter=qdrant_filter, limit=settings.RETRIEVAL_PREFETCH),
+        ],
+        "query": FusionQuery(fusion=Fusion.RRF),
+        "limit": limit,
+    }
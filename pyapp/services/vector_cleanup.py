@@ -0,0 +1,192 @@
+"""
+Keeps the vector collection in step with Postgres. An item's points are
+deleted along with the item, and a periodic reconciliation pass removes
+points whose library item no longer exists: deletes that failed while
+Qdrant was unreachable, items deleted while still being ingested, and items
+deleted before points were purged at all.
+"""
+import asyncio
+import time
+from collections import defaultdict
+from contextlib import asynccontextmanager
+from datetime import datetime
+from typing import Dict, List, Optional
+
+from qdrant_client.http.models import FieldCondition, Filter, FilterSelector, MatchAny, MatchValue
+from sqlalchemy import select, text
+
+from pyapp.config.settings import settings
+from pyapp.db.async_session import AsyncSessionLocal, async_engine
+from pyapp.models.library_item import LibraryItem
+from pyapp.services.qdrant_client import get_async_qdrant_client, get_qdrant_client
+from pyapp.utils import metrics
+
+# Arbitrary constant identifying the reconciliation advisory lock
+_RECONCILE_LOCK_KEY = 0x5EC70
+_FLOAT32_BYTES = 4
+
+_last_report: Optional[dict] = None
+_task: Optional[asyncio.Task] = None
+
+
+def delete_item_vectors(library_item_id: int) -> bool:
+    """
+    Deletes every point of a library item. Failures are logged, not raised:
+    the item is gone either way and reconciliation removes what is left.
+    """
+    try:
+        get_qdrant_client().delete(
+            collection_name=settings.QDRANT_APP_VECTOR,
+            points_selector=FilterSelector(
+                filter=Filter(must=[FieldCondition(key="library_item_id", match=MatchValue(value=int(library_item_id)))])
+            ),
+        )
+    except Exception as e:
+        metrics.incr("vectors.item_delete_failures")
+        print(f"[WARN] Could not delete vectors of library item {library_item_id}, left to reconciliation: {e}")
+        return False
+    metrics.incr("vectors.item_deletes")
+    return True
+
+
+async def _existing_item_ids(item_ids: List[int]) -> set:
+    existing = set()
+    async with AsyncSessionLocal() as db:
+        for offset in range(0, len(item_ids), 1000):
+            batch = item_ids[offset:offset + 1000]
+            rows = await db.execute(select(LibraryItem.id).where(LibraryItem.id.in_(batch)))
+            existing.update(rows.scalars().all())
+    return existing
+
+
+def _bytes_per_vector(collection_info) -> int:
+    vectors = collection_info.config.params.vectors
+    # A single unnamed vector, or a dict of named ones
+    sizes = [params.size for params in vectors.values()] if isinstance(vectors, dict) else [vectors.size]
+    return sum(sizes) * _FLOAT32_BYTES
+
+
+@asynccontextmanager
+async def _reconcile_lock():
+    """Yields whether this process may run reconciliation; only one API process does at a time."""
+    if async_engine.dialect.name != "postgresql":
+        yield True
+        return
+    async with async_engine.connect() as conn:
+        acquired = (await conn.execute(text("SELECT pg_try_advisory_lock(:key)"), {"key": _RECONCILE_LOCK_KEY})).scalar()
+        try:
+            yield acquired
+        finally:
+            if acquired:
+                await conn.execute(text("SELECT pg_advisory_unlock(:key)"), {"key": _RECONCILE_LOCK_KEY})
+
+
+async def reconcile_vectors(dry_run: bool = False, batch_size: int = settings.VECTOR_RECONCILE_BATCH) -> dict:
+    """
+    Scans the collection's library_item_id payloads, deletes the points of
+    items missing from Postgres in batches. Returns a report of what was
+    (or, with dry_run, would be) deleted. Qdrant frees the space when its
+    optimizers vacuum a segment, which they do once its share of deleted
+    points passes the collection's deleted_threshold
+    (VECTOR_VACUUM_DELETED_THRESHOLD). Reclaimable bytes count raw float32
+    vector storage only, not payloads or index links.
+    """
+    global _last_report
+    client = get_async_qdrant_client()
+    collection = settings.QDRANT_APP_VECTOR
+    started = time.perf_counter()
+
+    info = await client.get_collection(collection)
+    points_by_item: Dict[int, int] = defaultdict(int)
+    scanned = 0
+    unlabelled = 0
+    offset = None
+    while True:
+        records, offset = await client.scroll(
+            collection_name=collection,
+            limit=batch_size,
+            offset=offset,
+            with_payload=["library_item_id"],
+            with_vectors=False,
+        )
+        for record in records:
+            item_id = (record.payload or {}).get("library_item_id")
+            if item_id is None:
+                unlabelled += 1
+            else:
+                points_by_item[int(item_id)] += 1
+        scanned += len(records)
+        if offset is None:
+            break
+
+    existing = await _existing_item_ids(list(points_by_item))
+    orphaned = sorted(item_id for item_id in points_by_item if item_id not in existing)
+    orphaned_points = sum(points_by_item[item_id] for item_id in orphaned)
+
+    if orphaned and not dry_run:
+        # Items per delete call, not points: each call removes all points of its items
+        for start in range(0, len(orphaned), 100):
+            await client.delete(
+                collection_name=collection,
+                points_selector=FilterSelector(
+                    filter=Filter(must=[FieldCondition(key="library_item_id", match=MatchAny(any=orphaned[start:start + 100]))])
+                ),
+                wait=True,
+            )
+        metrics.incr("vectors.reconcile.deleted_points", orphaned_points)
+
+    report = {
+        "dry_run": dry_run,
+        "scanned_points": scanned,
+        "unlabelled_points": unlabelled,
+        "items_seen": len(points_by_item),
+        "orphaned_items": len(orphaned),
+        "deleted_points": 0 if dry_run else orphaned_points,
+        "orphaned_points": orphaned_points,
+        "reclaimable_vector_bytes": orphaned_points * _bytes_per_vector(info),
+        "seconds": round(time.perf_counter() - started, 3),
+        "finished_at": datetime.utcnow().isoformat(),
+    }
+    _last_report = report
+    metrics.incr("vectors.reconcile.runs")
+    print(
+        f"[INFO] Vector reconciliation{' (dry run)' if dry_run else ''}: {orphaned_points} points of "
+        f"{len(orphaned)} deleted items out of {scanned} scanned, "
+        f"~{report['reclaimable_vector_bytes'] / 1e6:.1f} MB of vectors to vacuum, in {report['seconds']}s"
+    )
+    return report
+
+
+async def _reconcile_periodically(interval_seconds: float) -> None:
+    while True:
+        await asyncio.sleep(interval_seconds)
+        try:
+            async with _reconcile_lock() as acquired:
+                if acquired:
+                    await reconcile_vectors()
+        except asyncio.CancelledError:
+            raise
+        except Exception as e:
+            print(f"[ERROR] Vector reconciliation failed: {e}")
+
+
+def start_vector_reconciler() -> None:
+    global _task
+    if settings.VECTOR_RECONCILE_INTERVAL_SECONDS > 0 and _task is None:
+        _task = asyncio.create_task(_reconcile_periodically(settings.VECTOR_RECONCILE_INTERVAL_SECONDS))
+
+
+async def stop_vector_reconciler() -> None:
+    global _task
+    if _task is not None:
+        _task.cancel()
+        try:
+            await _task
+        except asyncio.CancelledError:
+            pass
+        _task = None
+
+
+def reconcile_stats() -> Optional[dict]:
+    """The last reconciliation report of this process, if it has run one."""
+    return _last_report
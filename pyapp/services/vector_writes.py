@@ -0,0 +1,54 @@
+"""
+Holds writes to the live vector collection back while it is replaced by an
+alias of the same name.
+
+Qdrant cannot create an alias while a collection holds the name, so the
+first alias switch deletes the collection and then creates the alias. Chunks
+indexed into the old collection after the last copy, or into nothing before
+the alias exists, would be lost. Writers hold a shared Postgres advisory lock
+around their upserts and the switch holds it exclusively: it waits for the
+upserts in flight and keeps new ones waiting until the alias exists.
+
+Deletes do not take the lock. A point deleted in that window is at worst
+copied back and removed by the next vector reconciliation. Without Postgres
+(local runs) there is no other process to coordinate with and both locks
+are no-ops.
+"""
+from contextlib import asynccontextmanager, contextmanager
+
+from sqlalchemy import text
+
+from pyapp.db.async_session import async_engine
+from pyapp.db.session import engine
+
+# Arbitrary constant identifying the vector writes advisory lock
+_VECTOR_WRITES_LOCK_KEY = 0x5EC71
+
+
+@asynccontextmanager
+async def vector_writes():
+    """Held by the API around upserts into QDRANT_APP_VECTOR."""
+    if async_engine.dialect.name != "postgresql":
+        yield
+        return
+    async with async_engine.connect() as conn:
+        await conn.execute(text("SELECT pg_advisory_lock_shared(:key)"), {"key": _VECTOR_WRITES_LOCK_KEY})
+        try:
+            yield
+        finally:
+            await conn.execute(text("SELECT pg_advisory_unlock_shared(:key)"), {"key": _VECTOR_WRITES_LOCK_KEY})
+
+
+@contextmanager
+def vector_writes_blocked():
+    """Held by a migration while it replaces the collection; upserts wait meanwhile."""
+    if engine.dialect.name != "postgresql":
+        yield
+        return
+    with engine.connect() as conn:
+        print("[INFO] Waiting for vector writes in flight, then holding new ones back")
+        conn.execute(text("SELECT pg_advisory_lock(:key)"), {"key": _VECTOR_WRITES_LOCK_KEY})
+        try:
+            yield
+        finally:
+            conn.execute(text("SELECT pg_advisory_unlock(:key)"), {"key": _VECTOR_WRITES_LOCK_KEY})
@@ -1,19 +1,29 @@
+import asyncio
+import threading
+import time
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass
+from typing import Optional, Tuple
 from fastapi import Depends, HTTPException
 from passlib.context import CryptContext
 from datetime import datetime, timedelta
 from jose import JWTError, jwt
 from fastapi.security import OAuth2PasswordBearer
 from fastapi import Depends
-from sqlalchemy.orm import Session
-from pyapp.db.session import get_db
+from sqlalchemy import event, select
+from sqlalchemy.ext.asyncio import AsyncSession
+from pyapp.config.settings import settings
+from pyapp.db.async_session import get_async_db
 from pyapp.models.user import User
+from pyapp.utils import metrics
 
 # Secret key, algorithm, token expiry duration
 SECRET_KEY = "your_secret_key_here_change_this"
 ALGORITHM = "HS256"
 ACCESS_TOKEN_EXPIRE_MINUTES = 60 * 24  # 1 day
 
-pwd_context = CryptContext(schemes=["bcrypt"], deprecated="auto")
+pwd_context = CryptContext(schemes=["bcrypt"], deprecated="auto", bcrypt__rounds=settings.AUTH_BCRYPT_ROUNDS)
 
 oauth2_scheme = OAuth2PasswordBearer(tokenUrl="/auth/login")  # or your actual token URL
 
@@ -24,6 +34,53 @@ def verify_password(plain_password, hashed_password):
 def get_password_hash(password):
     return pwd_context.hash(password)
 
+
+class HashingBusy(Exception):
+    """Too many password hashes already running or queued; the caller should retry later."""
+
+
+# bcrypt releases the GIL, so a few threads hash in parallel without touching
+# the default thread pool that sync endpoints and asyncio.to_thread share
+_hash_executor = ThreadPoolExecutor(max_workers=settings.AUTH_HASH_WORKERS, thread_name_prefix="bcrypt")
+_hash_pending = 0
+_hash_lock = threading.Lock()
+
+
+def _release_hash_slot(_future) -> None:
+    global _hash_pending
+    with _hash_lock:
+        _hash_pending -= 1
+
+
+async def _run_hashing(func, *args):
+    global _hash_pending
+    with _hash_lock:
+        if _hash_pending >= settings.AUTH_HASH_MAX_PENDING:
+            metrics.incr("auth.hash_rejected")
+            raise HashingBusy()
+        _hash_pending += 1
+    started = time.perf_counter()
+    future = _hash_executor.submit(func, *args)
+    # Released when the hash finishes, or is cancelled before starting, not when the request gives up
+    future.add_done_callback(_release_hash_slot)
+    try:
+        return await asyncio.wrap_future(future)
+    finally:
+        metrics.observe("auth.hash_seconds", time.perf_counter() - started)
+
+
+async def hash_password(password: str) -> str:
+    return await _run_hashing(pwd_context.hash, password)
+
+
+async def verify_and_update_password(password: str, hashed_password: str) -> Tuple[bool, Optional[str]]:
+    """(valid, new_hash): new_hash is set when the stored hash should be replaced (e.g. other rounds)."""
+    return await _run_hashing(pwd_context.verify_and_update, password, hashed_password)
+
+
+def shutdown_hash_executor() -> None:
+    _hash_executor.shutdown(wait=False, cancel_futures=True)
+
 def create_access_token(data: dict, expires_delta: timedelta | None = None):
     to_encode = data.copy()
     expire = datetime.utcnow() + (expires_delta or timedelta(minutes=ACCESS_TOKEN_EXPIRE_MINUTES))
@@ -38,7 +95,63 @@ def decode_access_token(token: str):
     except JWTError:
         return None
 
-def get_current_user(token: str = Depends(oauth2_scheme), db: Session = Depends(get_db)) -> User:
+@dataclass(frozen=True)
+class CurrentUser:
+    """The authenticated caller, detached from any DB session so it can be cached."""
+    id: int
+    email: Optional[str]
+
+
+class UserCache:
+    """
+    Resolved users by id, each kept for at most `ttl_seconds`, least recently
+    used dropped beyond `max_size`. Per process: a change made by another
+    process is picked up once the entry expires.
+    """
+
+    def __init__(self, ttl_seconds: float, max_size: int):
+        self.ttl_seconds = ttl_seconds
+        self.max_size = max_size
+        self._entries: "OrderedDict[int, tuple]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, user_id: int) -> Optional[CurrentUser]:
+        with self._lock:
+            entry = self._entries.get(user_id)
+            if entry is None:
+                return None
+            user, expires_at = entry
+            if expires_at < time.monotonic():
+                del self._entries[user_id]
+                return None
+            self._entries.move_to_end(user_id)
+            return user
+
+    def put(self, user: CurrentUser) -> None:
+        if self.max_size <= 0:
+            return
+        with self._lock:
+            self._entries[user.id] = (user, time.monotonic() + self.ttl_seconds)
+            self._entries.move_to_end(user.id)
+            while len(self._entries) > self.max_size:
+                self._entries.popitem(last=False)
+
+    def invalidate(self, user_id: int) -> None:
+        with self._lock:
+            self._entries.pop(int(user_id), None)
+
+
+user_cache = UserCache(ttl_seconds=settings.AUTH_USER_CACHE_TTL_SECONDS, max_size=settings.AUTH_USER_CACHE_SIZE)
+
+
+@event.listens_for(User, "after_update")
+@event.listens_for(User, "after_delete")
+def _invalidate_cached_user(mapper, connection, target) -> None:
+    # Any ORM change to a user (email, password, deletion) drops it from this process's cache
+    user_cache.invalidate(target.id)
+
+
+def _token_user_id(token: str) -> tuple:
     payload = decode_access_token(token)
     if not payload:
         raise HTTPException(status_code=401, detail="Invalid token")
@@ -47,9 +160,48 @@ def get_current_user(token: str = Depends(oauth2_scheme), db: Session = Depends(
     if not user_id:
         raise HTTPException(status_code=401, detail="Token missing user info")
 
-    user = db.query(User).filter(User.id == user_id).first()
-    if not user:
+    try:
+        return int(user_id), payload
+    except (TypeError, ValueError):
+        raise HTTPException(status_code=401, detail="Token missing user info")
+
+
+async def get_current_user(token: str = Depends(oauth2_scheme), db: AsyncSession = Depends(get_async_db)) -> CurrentUser:
+    user_id, _ = _token_user_id(token)
+
+    user = user_cache.get(user_id)
+    if user is not None:
+        metrics.incr("auth.user_cache.hits")
+        return user
+
+    metrics.incr("auth.user_cache.misses")
+    row = (await db.execute(select(User.id, User.email).where(User.id == user_id))).first()
+    if not row:
         raise HTTPException(status_code=401, detail="User not found")
 
+    user = CurrentUser(id=row.id, email=row.email)
+    user_cache.put(user)
+    return user
+
+
+async def get_token_user(token: str = Depends(oauth2_scheme), db: AsyncSession = Depends(get_async_db)) -> CurrentUser:
+    """
+    For read-only endpoints. With AUTH_TRUST_TOKEN_CLAIMS the caller is taken
+    straight from the signed token, without touching the database: a user
+    deleted after the token was issued keeps read access to (their now empty)
+    data until the token expires. Otherwise same as get_current_user.
+    """
+    if not settings.AUTH_TRUST_TOKEN_CLAIMS:
+        return await get_current_user(token, db)
+    user_id, payload = _token_user_id(token)
+    metrics.incr("auth.claims_only")
+    return CurrentUser(id=user_id, email=payload.get("email"))
+
+
+async def get_admin_user(user: CurrentUser = Depends(get_current_user)) -> CurrentUser:
+    """For operator endpoints: the caller must be listed in ADMIN_EMAILS."""
+    admins = {email.strip().lower() for email in settings.ADMIN_EMAILS.split(",") if email.strip()}
+    if not user.email or user.email.lower() not in admins:
+        raise HTTPException(status_code=403, detail="Not allowed")
     return user
 
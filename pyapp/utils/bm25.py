@@ -0,0 +1,54 @@
+"""
+BM25 sparse vectors for keyword matching next to the dense embeddings.
+
+A chunk's vector holds each term's BM25 term-frequency weight, and a query's
+vector holds 1.0 per term. The collection's sparse vector uses Qdrant's IDF
+modifier, so their dot product is the BM25 score. The IDF is computed by
+Qdrant from the live collection, and nothing here needs corpus statistics.
+
+Terms are lowercased word tokens, with no stemming, so names, acronyms,
+error codes and formula symbols match exactly. Each term is hashed to its
+index, which needs no vocabulary; colliding terms just share a weight.
+"""
+import re
+import zlib
+from collections import Counter
+
+from qdrant_client.http.models import SparseVector
+
+_TOKEN = re.compile(r"\w+")
+_STOPWORDS = frozenset(
+    "a an and are as at be but by can do does for from has have how i if in is it its of on or so that the "
+    "their there these this to was were what when where which who why will with you your".split()
+)
+K1 = 1.2
+B = 0.75
+# Typical chunk length in terms, after stopwords (CHUNK_MAX_TOKENS is counted in model tokens)
+AVG_CHUNK_TERMS = 200
+
+
+def terms(text: str) -> list:
+    return [token for token in _TOKEN.findall(text.lower()) if token not in _STOPWORDS]
+
+
+def _index(term: str) -> int:
+    return zlib.crc32(term.encode("utf-8"))
+
+
+def _sparse(weights: dict) -> SparseVector:
+    indices = sorted(weights)
+    return SparseVector(indices=indices, values=[weights[index] for index in indices])
+
+
+def document_vector(text: str) -> SparseVector:
+    counts = Counter(terms(text))
+    length_norm = 1 - B + B * sum(counts.values()) / AVG_CHUNK_TERMS
+    weights = {}
+    for term, tf in counts.items():
+        index = _index(term)
+        weights[index] = weights.get(index, 0.0) + tf * (K1 + 1) / (tf + K1 * length_norm)
+    return _sparse(weights)
+
+
+def query_vector(text: str) -> SparseVector:
+    return _sparse({_index(term): 1.0 for term in set(terms(text))})
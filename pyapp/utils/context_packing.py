@@ -0,0 +1,123 @@
+"""
+Turns the chunks retrieved for a question into the context of the LLM
+prompt, using fewer tokens for the same information.
+
+Consecutive chunks of a document share their boundary text: whole sentences
+up to CHUNK_OVERLAP_TOKENS, or 50 words for items chunked before that.
+Retrieval often returns neighbours together. So:
+  1. chunks where the end of one is the start of another are merged into one
+     passage, with the shared text kept once;
+  2. passages mostly contained in a more relevant one are dropped;
+  3. passages are taken in relevance order while they fit the token budget
+     (tiktoken, with the LLM's encoding). A passage that does not fit is
+     skipped in favour of smaller, less relevant ones. The most relevant
+     passage is cut down to the budget rather than dropped.
+"""
+import re
+from dataclasses import dataclass
+from itertools import islice, permutations
+from typing import List
+
+from pyapp.config.settings import settings
+from pyapp.utils import metrics
+from pyapp.utils.tokens import get_encoding
+
+_WORD = re.compile(r"\S+")
+# Shared boundary text shorter than this is taken for coincidence, not overlap
+_MIN_OVERLAP_WORDS = 8
+# Overlaps are at most ~CHUNK_OVERLAP_TOKENS long; no need to search further back
+_MAX_OVERLAP_WORDS = 300
+_SHINGLE_WORDS = 3
+# Share of a passage's word 3-grams found in a kept passage above which it is a duplicate
+DUPLICATE_CONTAINMENT = 0.8
+
+
+@dataclass
+class _Passage:
+    text: str
+    words: List[str]
+    # Best retrieval rank among the chunks it was merged from
+    rank: int
+
+
+def _overlap(first: List[str], second: List[str]) -> int:
+    """How many words at the end of `first` start `second`; 0 below _MIN_OVERLAP_WORDS."""
+    if len(second) < _MIN_OVERLAP_WORDS:
+        return 0
+    start = max(0, len(first) - min(len(second), _MAX_OVERLAP_WORDS))
+    # Earliest start first, so the longest overlap wins
+    for i in range(start, len(first) - _MIN_OVERLAP_WORDS + 1):
+        if first[i] == second[0] and first[i:] == second[:len(first) - i]:
+            return len(first) - i
+    return 0
+
+
+def _merge(first: _Passage, second: _Passage, shared: int) -> _Passage:
+    # Continue after the shared words with `second`'s own text, keeping its paragraph breaks
+    cut = next(islice(_WORD.finditer(second.text), shared - 1, None)).end()
+    return _Passage(first.text + second.text[cut:], first.words + second.words[shared:], min(first.rank, second.rank))
+
+
+def _merge_overlapping(passages: List[_Passage]) -> List[_Passage]:
+    merged = True
+    while merged:
+        merged = False
+        for i, j in permutations(range(len(passages)), 2):
+            shared = _overlap(passages[i].words, passages[j].words)
+            if shared:
+                passages[i] = _merge(passages[i], passages[j], shared)
+                del passages[j]
+                merged = True
+                break
+    return sorted(passages, key=lambda passage: passage.rank)
+
+
+def _shingles(words: List[str]) -> set:
+    lowered = [word.lower() for word in words]
+    if len(lowered) < _SHINGLE_WORDS:
+        return {tuple(lowered)}
+    return {tuple(lowered[i:i + _SHINGLE_WORDS]) for i in range(len(lowered) - _SHINGLE_WORDS + 1)}
+
+
+def _drop_near_duplicates(passages: List[_Passage]) -> List[_Passage]:
+    kept, kept_shingles = [], []
+    for passage in passages:
+        shingles = _shingles(passage.words)
+        if any(len(shingles & other) >= DUPLICATE_CONTAINMENT * len(shingles) for other in kept_shingles):
+            continue
+        kept.append(passage)
+        kept_shingles.append(shingles)
+    return kept
+
+
+def assemble_context(
+    chunks: List[str],
+    token_budget: int = settings.LLM_CONTEXT_TOKEN_BUDGET,
+    model: str = settings.LLM_MODEL,
+) -> List[str]:
+    """
+    The passages to put in the prompt, most relevant first, from chunks given
+    most relevant first. Together they hold at most ~token_budget tokens, not
+    counting the separators between them.
+    """
+    passages = [_Passage(chunk, _WORD.findall(chunk), rank) for rank, chunk in enumerate(chunks) if chunk.strip()]
+    merged = _merge_overlapping(passages)
+    distinct = _drop_near_duplicates(merged)
+
+    encoding = get_encoding(model)
+    selected: List[str] = []
+    used = 0
+    for passage in distinct:
+        tokens = encoding.encode_ordinary(passage.text)
+        if used + len(tokens) <= token_budget:
+            selected.append(passage.text)
+            used += len(tokens)
+        elif not selected:
+            selected.append(encoding.decode(tokens[:token_budget]))
+            used = token_budget
+
+    metrics.incr("llm.context.chunks_merged", len(passages) - len(merged))
+    metrics.incr("llm.context.duplicates_dropped", len(merged) - len(distinct))
+    metrics.incr("llm.context.passages_over_budget", len(distinct) - len(selected))
+    metrics.observe("llm.context.tokens", used)
+    return selected
@@ -1,13 +1,117 @@
-import os
-from openai import OpenAI
+import asyncio
+import time
 from typing import List
+
+from openai import AsyncOpenAI
 from pyapp.config.settings import settings
+from pyapp.utils import metrics
+from pyapp.utils.embedding_cache import cache_key, from_bytes, get_embedding_cache, to_bytes
+from pyapp.utils.tokens import get_encoding
+
+client = AsyncOpenAI()
+
+
+def pack_batches(token_counts: List[int], max_items: int, max_tokens: int) -> List[List[int]]:
+    """
+    Groups input indices into contiguous batches that respect both the
+    per-request item limit and the per-request token limit.
+
+    An input that alone exceeds max_tokens gets a batch of its own, so the
+    API reports the error for that chunk instead of it being dropped here.
+    """
+    batches: List[List[int]] = []
+    current: List[int] = []
+    current_tokens = 0
+
+    for idx, count in enumerate(token_counts):
+        if current and (len(current) >= max_items or current_tokens + count > max_tokens):
+            batches.append(current)
+            current = []
+            current_tokens = 0
+        current.append(idx)
+        current_tokens += count
+
+    if current:
+        batches.append(current)
+    return batches
+
+
+def _dimension_kwargs(model: str, dimensions: int) -> dict:
+    # Only the text-embedding-3 models take `dimensions`; older ones always return their native size
+    return {"dimensions": dimensions} if model.startswith("text-embedding-3") else {}
+
 
-client = OpenAI()
+async def _embed_uncached(texts: List[str], model: str, dimensions: int) -> List[List[float]]:
+    """
+    Embeds texts in size-limited batches sent concurrently (bounded by
+    EMBEDDINGS_CONCURRENCY). Vectors are returned in the same order as texts.
+    Raises ValueError if the model returns vectors of another size, which the
+    collection would reject anyway.
+    """
+    encoding = get_encoding(model)
+    token_counts = [len(tokens) for tokens in encoding.encode_ordinary_batch(texts)]
+    batches = pack_batches(token_counts, settings.EMBEDDINGS_BATCH_SIZE, settings.EMBEDDINGS_BATCH_TOKENS)
 
-async def get_openai_embeddings(texts: List[str], model: str = settings.EMBEDDINGS_MODEL) -> List[List[float]]:
-    embeddings = []
-    for text in texts:
-        response = client.embeddings.create(input=text, model=model)
-        embeddings.append(response.data[0].embedding)
+    semaphore = asyncio.Semaphore(settings.EMBEDDINGS_CONCURRENCY)
+    embeddings: List[List[float]] = [None] * len(texts)
+
+    async def embed_batch(indices: List[int]):
+        async with semaphore:
+            started = time.perf_counter()
+            response = await client.embeddings.create(
+                input=[texts[i] for i in indices], model=model, **_dimension_kwargs(model, dimensions)
+            )
+            metrics.observe("embeddings.api_seconds", time.perf_counter() - started)
+        metrics.incr("embeddings.api_tokens", sum(token_counts[i] for i in indices))
+        # The API tags each vector with the position of its input in the request
+        for item in response.data:
+            if len(item.embedding) != dimensions:
+                raise ValueError(f"{model} returned {len(item.embedding)}-dim vectors, expected {dimensions}")
+            embeddings[indices[item.index]] = item.embedding
+
+    await asyncio.gather(*(embed_batch(batch) for batch in batches))
     return embeddings
+
+
+async def get_openai_embeddings(
+    texts: List[str],
+    model: str = settings.EMBEDDINGS_MODEL,
+    dimensions: int = settings.EMBEDDINGS_DIMENSIONS,
+    use_cache: bool = True,
+) -> List[List[float]]:
+    """
+    Returns one `dimensions`-sized embedding per text, in order. Texts already
+    embedded with the same model and size are served from the embedding cache;
+    only misses hit the API, and repeated texts within one call are embedded
+    once. Bulk jobs pass use_cache=False so they do not evict the hot entries.
+    """
+    if not texts:
+        return []
+
+    cache = get_embedding_cache() if use_cache else None
+    if cache is None:
+        return await _embed_uncached(texts, model, dimensions)
+
+    keys = [cache_key(model, dimensions, text) for text in texts]
+    started = time.perf_counter()
+    cached = await asyncio.to_thread(cache.get_many, keys)
+    metrics.observe("embedding_cache.lookup_seconds", time.perf_counter() - started)
+
+    missing = {}
+    for key, text, blob in zip(keys, texts, cached):
+        if blob is None and key not in missing:
+            missing[key] = text
+
+    if missing:
+        fresh = await _embed_uncached(list(missing.values()), model, dimensions)
+        fresh_blobs = {key: to_bytes(vector) for key, vector in zip(missing, fresh)}
+        await asyncio.to_thread(cache.put_many, fresh_blobs)
+    else:
+        fresh_blobs = {}
+
+    hit_texts = [text for text, blob in zip(texts, cached) if blob is not None]
+    if hit_texts:
+        encoding = get_encoding(model)
+        metrics.incr("embedding_cache.tokens_saved", sum(len(t) for t in encoding.encode_ordinary_batch(hit_texts)))
+
+    return [from_bytes(blob if blob is not None else fresh_blobs[key]) for key, blob in zip(keys, cached)]
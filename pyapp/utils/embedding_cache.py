@@ -0,0 +1,171 @@
+import hashlib
+import os
+import sqlite3
+import threading
+import time
+import unicodedata
+from collections import OrderedDict
+from typing import List, Optional
+
+import numpy as np
+
+from pyapp.config.settings import settings
+from pyapp.utils import metrics
+
+
+def normalize_text(text: str) -> str:
+    return " ".join(unicodedata.normalize("NFC", text).split())
+
+
+def cache_key(model: str, dimensions: int, text: str) -> str:
+    return hashlib.sha256(f"{model}\x00{dimensions}\x00{normalize_text(text)}".encode("utf-8")).hexdigest()
+
+
+def to_bytes(vector: List[float]) -> bytes:
+    return np.asarray(vector, dtype=np.float32).tobytes()
+
+
+def from_bytes(blob: bytes) -> List[float]:
+    return np.frombuffer(blob, dtype=np.float32).tolist()
+
+
+class EmbeddingCache:
+    """
+    Two-tier, content-addressed embedding cache.
+
+    Tier 1 is an in-process LRU of float32 blobs. Tier 2 is a SQLite file on
+    local disk that survives restarts; it is bounded by entry count and evicts
+    the least recently used rows first.
+    """
+
+    def __init__(self, path: str, memory_items: int, disk_items: int):
+        self.memory_items = memory_items
+        self.disk_items = disk_items
+        self._memory: "OrderedDict[str, bytes]" = OrderedDict()
+        self._lock = threading.Lock()
+
+        os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+        self._db = sqlite3.connect(path, check_same_thread=False, isolation_level=None)
+        self._db.execute("PRAGMA journal_mode=WAL")
+        self._db.execute("PRAGMA synchronous=NORMAL")
+        self._db.execute(
+            "CREATE TABLE IF NOT EXISTS embeddings ("
+            " key TEXT PRIMARY KEY,"
+            " vector BLOB NOT NULL,"
+            " last_used REAL NOT NULL)"
+        )
+        self._db.execute("CREATE INDEX IF NOT EXISTS ix_embeddings_last_used ON embeddings (last_used)")
+        self._disk_count = self._db.execute("SELECT COUNT(*) FROM embeddings").fetchone()[0]
+
+    def _remember(self, key: str, blob: bytes) -> None:
+        self._memory[key] = blob
+        self._memory.move_to_end(key)
+        while len(self._memory) > self.memory_items:
+            self._memory.popitem(last=False)
+
+    def get_many(self, keys: List[str]) -> List[Optional[bytes]]:
+        results: List[Optional[bytes]] = [None] * len(keys)
+        disk_lookup = {}
+
+        with self._lock:
+            for i, key in enumerate(keys):
+                blob = self._memory.get(key)
+                if blob is not None:
+                    self._memory.move_to_end(key)
+                    results[i] = blob
+                    metrics.incr("embedding_cache.memory_hits")
+                else:
+                    disk_lookup.setdefault(key, []).append(i)
+
+            if disk_lookup:
+                found = {}
+                pending = list(disk_lookup)
+                # Stay well below SQLite's bound-parameter limit
+                for start in range(0, len(pending), 500):
+                    batch = pending[start:start + 500]
+                    placeholders = ",".join("?" * len(batch))
+                    rows = self._db.execute(
+                        f"SELECT key, vector FROM embeddings WHERE key IN ({placeholders})", batch
+                    ).fetchall()
+                    found.update(rows)
+
+                if found:
+                    now = time.time()
+                    self._db.executemany(
+                        "UPDATE embeddings SET last_used = ? WHERE key = ?",
+                        [(now, key) for key in found],
+                    )
+
+                for key, positions in disk_lookup.items():
+                    blob = found.get(key)
+                    if blob is None:
+                        metrics.incr("embedding_cache.misses", len(positions))
+                        continue
+                    self._remember(key, blob)
+                    metrics.incr("embedding_cache.disk_hits", len(positions))
+                    for i in positions:
+                        results[i] = blob
+
+        return results
+
+    def put_many(self, items: dict) -> None:
+        if not items:
+            return
+        now = time.time()
+        with self._lock:
+            for key, blob in items.items():
+                self._remember(key, blob)
+            cursor = self._db.executemany(
+                "INSERT OR IGNORE INTO embeddings (key, vector, last_used) VALUES (?, ?, ?)",
+                [(key, blob, now) for key, blob in items.items()],
+            )
+            self._disk_count += max(cursor.rowcount, 0)
+            self._evict()
+
+    def _evict(self) -> None:
+        overflow = self._disk_count - self.disk_items
+        if overflow <= 0:
+            return
+        # Trim an extra 10% so eviction doesn't run on every insert once full
+        to_delete = overflow + self.disk_items // 10
+        cursor = self._db.execute(
+            "DELETE FROM embeddings WHERE key IN ("
+            " SELECT key FROM embeddings ORDER BY last_used ASC LIMIT ?)",
+            (to_delete,),
+        )
+        self._disk_count -= cursor.rowcount
+        metrics.incr("embedding_cache.evictions", cursor.rowcount)
+
+    def stats(self) -> dict:
+        snapshot = metrics.snapshot()["counters"]
+        hits = snapshot.get("embedding_cache.memory_hits", 0) + snapshot.get("embedding_cache.disk_hits", 0)
+        misses = snapshot.get("embedding_cache.misses", 0)
+        return {
+            "memory_entries": len(self._memory),
+            "disk_entries": self._disk_count,
+            "memory_hits": snapshot.get("embedding_cache.memory_hits", 0),
+            "disk_hits": snapshot.get("embedding_cache.disk_hits", 0),
+            "misses": misses,
+            "hit_rate": hits / (hits + misses) if hits + misses else 0.0,
+            "tokens_saved": snapshot.get("embedding_cache.tokens_saved", 0),
+            "evictions": snapshot.get("embedding_cache.evictions", 0),
+        }
+
+
+_cache: Optional[EmbeddingCache] = None
+_cache_lock = threading.Lock()
+
+
+def get_embedding_cache() -> Optional[EmbeddingCache]:
+    global _cache
+    if not settings.EMBEDDING_CACHE_ENABLED:
+        return None
+    if _cache is None:
+        with _cache_lock:
+            if _cache is None:
+                _cache = EmbeddingCache(
+                    path=settings.EMBEDDING_CACHE_PATH,
+                    memory_items=settings.EMBEDDING_CACHE_MEMORY_ITEMS,
+                    disk_items=settings.EMBEDDING_CACHE_DISK_ITEMS,
+                )
+    return _cache
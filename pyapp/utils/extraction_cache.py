@@ -0,0 +1,182 @@
+import os
+import sqlite3
+import threading
+import time
+from dataclasses import dataclass
+from typing import Optional
+from urllib.parse import urldefrag
+
+import zstandard
+from courlan import normalize_url
+
+from pyapp.config.settings import settings
+from pyapp.utils import metrics
+
+
+def canonical_url(url: str) -> str:
+    """Lowercased host, default port dropped, query sorted, trackers and fragment removed."""
+    try:
+        url = normalize_url(url.strip())
+    except Exception:
+        url = url.strip()
+    return urldefrag(url)[0]
+
+
+@dataclass
+class CachedExtraction:
+    text: str
+    etag: Optional[str]
+    last_modified: Optional[str]
+    fetched_at: float
+
+    def conditional_headers(self) -> dict:
+        headers = {}
+        if self.etag:
+            headers["If-None-Match"] = self.etag
+        if self.last_modified:
+            headers["If-Modified-Since"] = self.last_modified
+        return headers
+
+
+class ExtractionCache:
+    """
+    Extracted article text keyed by canonical URL, zstd-compressed in a SQLite
+    file on local disk, with the ETag / Last-Modified validators of the response
+    it came from. Entries expire after `ttl_seconds`; the file is bounded by
+    total compressed size and evicts the least recently used entries first.
+    """
+
+    def __init__(self, path: str, ttl_seconds: int, max_bytes: int):
+        self.ttl_seconds = ttl_seconds
+        self.max_bytes = max_bytes
+        self._lock = threading.Lock()
+        # zstd (de)compressors must not be shared between threads; each thread gets its own
+        self._zstd = threading.local()
+
+        os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+        self._db = sqlite3.connect(path, check_same_thread=False, isolation_level=None)
+        self._db.execute("PRAGMA journal_mode=WAL")
+        self._db.execute("PRAGMA synchronous=NORMAL")
+        self._db.execute(
+            "CREATE TABLE IF NOT EXISTS extractions ("
+            " url TEXT PRIMARY KEY,"
+            " text BLOB NOT NULL,"
+            " size INTEGER NOT NULL,"
+            " etag TEXT,"
+            " last_modified TEXT,"
+            " fetched_at REAL NOT NULL,"
+            " last_used REAL NOT NULL)"
+        )
+        self._db.execute("CREATE INDEX IF NOT EXISTS ix_extractions_last_used ON extractions (last_used)")
+        self._total_bytes = self._db.execute("SELECT COALESCE(SUM(size), 0) FROM extractions").fetchone()[0]
+
+    def _compressor(self) -> zstandard.ZstdCompressor:
+        if not hasattr(self._zstd, "compressor"):
+            self._zstd.compressor = zstandard.ZstdCompressor(level=6)
+        return self._zstd.compressor
+
+    def _decompressor(self) -> zstandard.ZstdDecompressor:
+        if not hasattr(self._zstd, "decompressor"):
+            self._zstd.decompressor = zstandard.ZstdDecompressor()
+        return self._zstd.decompressor
+
+    def get(self, url: str) -> Optional[CachedExtraction]:
+        now = time.time()
+        with self._lock:
+            row = self._db.execute(
+                "SELECT text, size, etag, last_modified, fetched_at FROM extractions WHERE url = ?", (url,)
+            ).fetchone()
+            if row is None:
+                metrics.incr("extraction_cache.misses")
+                return None
+
+            blob, size, etag, last_modified, fetched_at = row
+            if now - fetched_at > self.ttl_seconds:
+                self._db.execute("DELETE FROM extractions WHERE url = ?", (url,))
+                self._total_bytes -= size
+                metrics.incr("extraction_cache.expired")
+                return None
+
+            self._db.execute("UPDATE extractions SET last_used = ? WHERE url = ?", (now, url))
+
+        text = self._decompressor().decompress(blob).decode("utf-8")
+        return CachedExtraction(text=text, etag=etag, last_modified=last_modified, fetched_at=fetched_at)
+
+    def put(self, url: str, text: str, etag: Optional[str] = None, last_modified: Optional[str] = None) -> None:
+        blob = self._compressor().compress(text.encode("utf-8"))
+        if len(blob) > self.max_bytes:
+            return
+        now = time.time()
+        with self._lock:
+            previous = self._db.execute("SELECT size FROM extractions WHERE url = ?", (url,)).fetchone()
+            self._db.execute(
+                "INSERT OR REPLACE INTO extractions (url, text, size, etag, last_modified, fetched_at, last_used)"
+                " VALUES (?, ?, ?, ?, ?, ?, ?)",
+                (url, blob, len(blob), etag, last_modified, now, now),
+            )
+            self._total_bytes += len(blob) - (previous[0] if previous else 0)
+            self._evict()
+
+    def refresh(self, url: str, etag: Optional[str] = None, last_modified: Optional[str] = None) -> None:
+        """Restarts the TTL of an entry the origin confirmed unchanged (304)."""
+        now = time.time()
+        with self._lock:
+            self._db.execute(
+                "UPDATE extractions SET fetched_at = ?, last_used = ?,"
+                " etag = COALESCE(?, etag), last_modified = COALESCE(?, last_modified) WHERE url = ?",
+                (now, now, etag, last_modified, url),
+            )
+
+    def _evict(self) -> None:
+        if self._total_bytes <= self.max_bytes:
+            return
+        # Free down to 90% so eviction doesn't run on every insert once full
+        target = int(self.max_bytes * 0.9)
+        expired_before = time.time() - self.ttl_seconds
+        rows = self._db.execute(
+            "SELECT url, size FROM extractions ORDER BY (fetched_at < ?) DESC, last_used ASC", (expired_before,)
+        )
+        victims = []
+        for url, size in rows:
+            if self._total_bytes <= target:
+                break
+            victims.append((url,))
+            self._total_bytes -= size
+        self._db.executemany("DELETE FROM extractions WHERE url = ?", victims)
+        metrics.incr("extraction_cache.evictions", len(victims))
+
+    def stats(self) -> dict:
+        counters = metrics.snapshot()["counters"]
+        hits = counters.get("extraction_cache.hits", 0) + counters.get("extraction_cache.revalidated", 0)
+        misses = counters.get("extraction_cache.misses", 0) + counters.get("extraction_cache.expired", 0)
+        with self._lock:
+            entries = self._db.execute("SELECT COUNT(*) FROM extractions").fetchone()[0]
+        return {
+            "entries": entries,
+            "bytes": self._total_bytes,
+            "hits": counters.get("extraction_cache.hits", 0),
+            "revalidated": counters.get("extraction_cache.revalidated", 0),
+            "changed": counters.get("extraction_cache.changed", 0),
+            "misses": misses,
+            "hit_rate": hits / (hits + misses) if hits + misses else 0.0,
+            "evictions": counters.get("extraction_cache.evictions", 0),
+        }
+
+
+_cache: Optional[ExtractionCache] = None
+_cache_lock = threading.Lock()
+
+
+def get_extraction_cache() -> Optional[ExtractionCache]:
+    global _cache
+    if not settings.EXTRACTION_CACHE_ENABLED:
+        return None
+    if _cache is None:
+        with _cache_lock:
+            if _cache is None:
+                _cache = ExtractionCache(
+                    path=settings.EXTRACTION_CACHE_PATH,
+                    ttl_seconds=settings.EXTRACTION_CACHE_TTL_SECONDS,
+                    max_bytes=settings.EXTRACTION_CACHE_MAX_MB * 1024 * 1024,
+                )
+    return _cache
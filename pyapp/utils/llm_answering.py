@@ -1,21 +1,15 @@
-from openai import OpenAI
-from typing import List
+import time
+from openai import AsyncOpenAI
+from typing import AsyncIterator, List
 from pyapp.config.settings import settings
+from pyapp.utils import metrics
+from pyapp.utils.context_packing import assemble_context
 
-client = OpenAI()
+async_client = AsyncOpenAI()
 
-def ask_llm(question: str, context_chunks: List[str]) -> str:
-    """
-    Uses OpenAI chat model to answer a user question using document chunks as context.
-
-    Args:
-        question (str): The user’s question.
-        context_chunks (List[str]): Relevant chunks from Qdrant.
-
-    Returns:
-        str: GPT-generated answer.
-    """
-    context_text = "\n\n".join(context_chunks[:5])  # limit context to top 5 chunks
+def build_messages(question: str, context_chunks: List[str]) -> List[dict]:
+    # Overlapping chunks merged, near-duplicates dropped, capped at LLM_CONTEXT_TOKEN_BUDGET
+    context_text = "\n\n".join(assemble_context(context_chunks))
 
     messages = [
         {
@@ -32,11 +26,62 @@ def ask_llm(question: str, context_chunks: List[str]) -> str:
             "content": f"Context:\n{context_text}\n\nQuestion: {question}"
         }    
     ]
+    return messages
 
-    response = client.chat.completions.create(
+def _record_usage(call: str, usage, seconds: float) -> None:
+    metrics.observe(f"llm.{call}_seconds", seconds)
+    if usage is None:
+        return
+    metrics.incr("llm.prompt_tokens", usage.prompt_tokens)
+    metrics.incr("llm.completion_tokens", usage.completion_tokens)
+    print(f"[INFO] LLM {call}: {usage.prompt_tokens} prompt + {usage.completion_tokens} completion tokens in {seconds:.2f}s")
+
+async def ask_llm(question: str, context_chunks: List[str]) -> str:
+    """
+    Uses OpenAI chat model to answer a user question using document chunks as context.
+
+    Args:
+        question (str): The user’s question.
+        context_chunks (List[str]): Relevant chunks from Qdrant, most relevant first.
+
+    Returns:
+        str: GPT-generated answer.
+    """
+    messages = build_messages(question, context_chunks)
+
+    started = time.perf_counter()
+    response = await async_client.chat.completions.create(
         model=settings.LLM_MODEL,
         messages=messages,
         temperature=0.3,
     )
+    _record_usage("answer", response.usage, time.perf_counter() - started)
 
     return response.choices[0].message.content.strip()
+
+async def stream_llm_answer(question: str, context_chunks: List[str]) -> AsyncIterator[str]:
+    """
+    Same prompt as ask_llm, but yields answer text deltas as the model produces them.
+
+    Closing the generator early (e.g. the client disconnected) closes the
+    upstream HTTP stream, so OpenAI stops generating.
+    """
+    started = time.perf_counter()
+    stream = await async_client.chat.completions.create(
+        model=settings.LLM_MODEL,
+        messages=build_messages(question, context_chunks),
+        temperature=0.3,
+        stream=True,
+        # Token counts arrive in a final chunk with no choices
+        stream_options={"include_usage": True},
+    )
+    usage = None
+    try:
+        async for chunk in stream:
+            if chunk.usage:
+                usage = chunk.usage
+            if chunk.choices and chunk.choices[0].delta.content:
+                yield chunk.choices[0].delta.content
+    finally:
+        await stream.close()
+    _record_usage("stream", usage, time.perf_counter() - started)
@@ -0,0 +1,50 @@
+import threading
+from collections import defaultdict, deque
+from typing import Dict
+
+# Recent samples kept per observation, enough for stable p50/p95/p99
+_SAMPLE_WINDOW = 1024
+
+_lock = threading.Lock()
+_counters: Dict[str, float] = defaultdict(float)
+_observations: Dict[str, dict] = {}
+
+
+def incr(name: str, value: float = 1) -> None:
+    with _lock:
+        _counters[name] += value
+
+
+def observe(name: str, value: float) -> None:
+    """Records one sample (e.g. a latency in seconds) for a named measurement."""
+    with _lock:
+        obs = _observations.get(name)
+        if obs is None:
+            obs = _observations[name] = {"count": 0, "sum": 0.0, "max": 0.0, "samples": deque(maxlen=_SAMPLE_WINDOW)}
+        obs["count"] += 1
+        obs["sum"] += value
+        obs["max"] = max(obs["max"], value)
+        obs["samples"].append(value)
+
+
+def _percentile(sorted_samples: list, pct: float) -> float:
+    if not sorted_samples:
+        return 0.0
+    idx = min(len(sorted_samples) - 1, int(round(pct / 100 * (len(sorted_samples) - 1))))
+    return sorted_samples[idx]
+
+
+def snapshot() -> dict:
+    with _lock:
+        observations = {}
+        for name, obs in _observations.items():
+            samples = sorted(obs["samples"])
+            observations[name] = {
+                "count": obs["count"],
+                "avg": obs["sum"] / obs["count"] if obs["count"] else 0.0,
+                "max": obs["max"],
+                "p50": _percentile(samples, 50),
+                "p95": _percentile(samples, 95),
+                "p99": _percentile(samples, 99),
+            }
+        return {"counters": dict(_counters), "observations": observations}
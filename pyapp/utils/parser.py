@@ -1,49 +1,254 @@
+import asyncio
+import threading
 import traceback
+from collections import OrderedDict
+from typing import Optional, Tuple
+from urllib.parse import urlparse
+
+import httpx
 import trafilatura
-import requests
-from playwright.sync_api import sync_playwright, TimeoutError as PlaywrightTimeoutError
+from playwright.async_api import TimeoutError as PlaywrightTimeoutError
+
+from pyapp.config.settings import settings
+from pyapp.services.browser_pool import browser_pool, USER_AGENT
+from pyapp.utils import metrics
+from pyapp.utils.extraction_cache import canonical_url, get_extraction_cache
+
+# Markers of client-rendered app shells whose static HTML has no real content
+JS_SHELL_MARKERS = (
+    "enable javascript",
+    "javascript is required",
+    "javascript is disabled",
+    'id="root"></div>',
+    'id="app"></div>',
+    'id="__next"></div>',
+)
+
+STRATEGY_STATIC = "static"
+STRATEGY_BROWSER = "browser"
 
-def extract_main_content(url: str) -> str:
+http_client = httpx.AsyncClient(
+    headers={"User-Agent": USER_AGENT},
+    timeout=httpx.Timeout(25.0, connect=10.0),
+    follow_redirects=True,
+    limits=httpx.Limits(max_connections=20, max_keepalive_connections=10),
+)
+
+
+class DomainStrategyMemory:
     """
-    Extracts main content from the given URL using Playwright for JS-rendered sites,
-    falling back to requests + trafilatura for simpler pages.
+    Remembers, per domain, whether static fetching was good enough.
+
+    Domains that needed the browser go straight to it next time, but every
+    `reprobe_every` visits static fetching is tried again in case the site
+    changed. Bounded LRU so a crawl over many domains can't grow it forever.
     """
+
+    def __init__(self, max_domains: int, reprobe_every: int):
+        self.max_domains = max_domains
+        self.reprobe_every = reprobe_every
+        self._domains: "OrderedDict[str, dict]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def prefers_browser(self, domain: str) -> bool:
+        with self._lock:
+            record = self._domains.get(domain)
+            if record is None or record["strategy"] != STRATEGY_BROWSER:
+                return False
+            self._domains.move_to_end(domain)
+            record["visits"] += 1
+            return record["visits"] % self.reprobe_every != 0
+
+    def remember(self, domain: str, strategy: str) -> None:
+        with self._lock:
+            record = self._domains.get(domain)
+            if record is None or record["strategy"] != strategy:
+                record = {"strategy": strategy, "visits": 0}
+            self._domains[domain] = record
+            self._domains.move_to_end(domain)
+            while len(self._domains) > self.max_domains:
+                self._domains.popitem(last=False)
+
+    def __len__(self) -> int:
+        return len(self._domains)
+
+
+domain_memory = DomainStrategyMemory(
+    max_domains=settings.EXTRACT_DOMAIN_MEMORY_SIZE,
+    reprobe_every=settings.EXTRACT_STATIC_REPROBE_EVERY,
+)
+
+
+def _domain(url: str) -> str:
+    host = (urlparse(url).hostname or "").lower()
+    return host[4:] if host.startswith("www.") else host
+
+
+def _extract_text(html: str) -> str:
+    return trafilatura.extract(html, include_comments=False, include_tables=False) or ""
+
+
+def assess_static_text(html: str, text: str) -> Tuple[bool, str]:
+    """Decides whether statically fetched HTML extracted well enough to skip the browser."""
+    if len(text) < settings.EXTRACT_MIN_TEXT_CHARS:
+        return False, f"text too short ({len(text)} chars)"
+
+    ratio = len(text) / max(len(html), 1)
+    if ratio < settings.EXTRACT_MIN_TEXT_RATIO:
+        return False, f"text-to-markup ratio too low ({ratio:.4f})"
+
+    # A shell marker only matters when there isn't much text besides it
+    if len(text) < 2 * settings.EXTRACT_MIN_TEXT_CHARS:
+        lowered = html.lower()
+        for marker in JS_SHELL_MARKERS:
+            if marker in lowered:
+                return False, f"JS shell marker {marker!r}"
+
+    return True, "ok"
+
+
+async def _fetch_static(url: str, headers: Optional[dict] = None) -> httpx.Response:
+    response = await http_client.get(url, headers=headers)
+    if response.status_code != 304:
+        response.raise_for_status()
+    return response
+
+
+def _validators(response: Optional[httpx.Response]) -> dict:
+    if response is None:
+        return {"etag": None, "last_modified": None}
+    return {"etag": response.headers.get("etag"), "last_modified": response.headers.get("last-modified")}
+
+
+async def _extract_with_browser(url: str) -> str:
     try:
         print(f"[INFO] Trying Playwright for: {url}")
-        with sync_playwright() as p:
-            browser = p.chromium.launch(headless=True)
-            page = browser.new_page()
-            page.goto(url, timeout=20000)  # wait up to 20s
-            page.wait_for_selector("body", timeout=10000)
-            html = page.content()
-            browser.close()
-
-            text = trafilatura.extract(html, include_comments=False, include_tables=False)
-            if text:
-                return text
+        async with browser_pool.page() as page:
+            await page.goto(url, timeout=20000)  # wait up to 20s
+            await page.wait_for_selector("body", timeout=10000)
+            html = await page.content()
+        return await asyncio.to_thread(_extract_text, html)
 
     except PlaywrightTimeoutError:
-        print(f"[WARN] Playwright timed out for {url}, falling back to requests.")
+        print(f"[WARN] Playwright timed out for {url}")
     except Exception as e:
         print(f"[WARN] Playwright failed for {url}: {e}")
+    return ""
 
-    # Fallback to requests + trafilatura
-    try:
-        print(f"[INFO] Trying requests fallback for: {url}")
-        headers = {
-            "User-Agent": (
-                "Mozilla/5.0 (Windows NT 10.0; Win64; x64) "
-                "AppleWebKit/537.36 (KHTML, like Gecko) "
-                "Chrome/114.0.0.0 Safari/537.36"
-            )
-        }
-        response = requests.get(url, headers=headers, timeout=25)
-        response.raise_for_status()
-        html = response.text
-        text = trafilatura.extract(html, include_comments=False, include_tables=False)
-        return text if text else ""
 
-    except Exception as e:
-        traceback.print_exc()
-        print(f"[ERROR] Both Playwright and requests failed for {url}: {e}")
-        return ""
+async def _extract_fresh(url: str, prefetched: Optional[httpx.Response] = None) -> Tuple[str, dict]:
+    """
+    Static HTML (pooled HTTP client + trafilatura) is tried first; the headless
+    browser is used only when the static result fails the quality checks, or
+    straight away for domains that previously needed it. Returns the text and
+    the cache validators of the static response, if there was one.
+    """
+    domain = _domain(url)
+    static_text = ""
+    response = prefetched
+    tried_static = False
+
+    if response is None and domain_memory.prefers_browser(domain):
+        metrics.incr("extract.browser_direct")
+    else:
+        tried_static = True
+        try:
+            if response is None:
+                response = await _fetch_static(url)
+            html = response.text
+            static_text = await asyncio.to_thread(_extract_text, html)
+            acceptable, reason = assess_static_text(html, static_text)
+            if acceptable:
+                domain_memory.remember(domain, STRATEGY_STATIC)
+                metrics.incr("extract.static")
+                return static_text, _validators(response)
+            print(f"[INFO] Static extraction insufficient for {url}: {reason}, escalating to browser.")
+        except Exception as e:
+            print(f"[WARN] Static fetch failed for {url}: {e}, escalating to browser.")
+        metrics.incr("extract.escalated")
+
+    browser_text = await _extract_with_browser(url)
+    if browser_text and len(browser_text) >= len(static_text):
+        domain_memory.remember(domain, STRATEGY_BROWSER)
+        metrics.incr("extract.browser")
+        return browser_text, _validators(response)
+
+    if not tried_static:
+        try:
+            response = await _fetch_static(url)
+            static_text = await asyncio.to_thread(_extract_text, response.text)
+        except Exception as e:
+            traceback.print_exc()
+            print(f"[ERROR] Both browser and static fetch failed for {url}: {e}")
+
+    if static_text:
+        # The browser didn't do better; a weak static result beats nothing
+        metrics.incr("extract.static_best_effort")
+        return static_text, _validators(response)
+
+    metrics.incr("extract.failed")
+    return "", _validators(None)
+
+
+async def extract_main_content(url: str) -> str:
+    """
+    Extracts main content from the given URL, going through the shared
+    extraction cache. A cached entry with ETag / Last-Modified validators is
+    revalidated with a conditional GET and served as-is on 304; one without
+    validators is served until its TTL runs out.
+    """
+    cache = get_extraction_cache()
+    if cache is None:
+        text, _ = await _extract_fresh(url)
+        return text
+
+    key = canonical_url(url)
+    entry = await asyncio.to_thread(cache.get, key)
+    prefetched = None
+
+    if entry is not None:
+        headers = entry.conditional_headers()
+        if not headers:
+            metrics.incr("extraction_cache.hits")
+            return entry.text
+        try:
+            response = await _fetch_static(url, headers=headers)
+        except Exception as e:
+            print(f"[WARN] Revalidation failed for {url}, serving cached copy: {e}")
+            metrics.incr("extraction_cache.hits")
+            return entry.text
+        if response.status_code == 304:
+            await asyncio.to_thread(cache.refresh, key, **_validators(response))
+            metrics.incr("extraction_cache.revalidated")
+            return entry.text
+        metrics.incr("extraction_cache.changed")
+        prefetched = response
+
+    text, validators = await _extract_fresh(url, prefetched)
+    if text:
+        await asyncio.to_thread(cache.put, key, text, **validators)
+    return text
+
+
+def extraction_stats() -> dict:
+    counters = metrics.snapshot()["counters"]
+    static = counters.get("extract.static", 0)
+    best_effort = counters.get("extract.static_best_effort", 0)
+    browser = counters.get("extract.browser", 0)
+    failed = counters.get("extract.failed", 0)
+    total = static + best_effort + browser + failed
+    return {
+        "static": static,
+        "static_best_effort": best_effort,
+        "browser": browser,
+        "browser_direct": counters.get("extract.browser_direct", 0),
+        "escalated": counters.get("extract.escalated", 0),
+        "failed": failed,
+        # Share of extractions that never touched the headless browser
+        "browser_avoidance_rate": static / total if total else 0.0,
+        "domains_remembered": len(domain_memory),
+    }
+
+
+async def close_http_client() -> None:
+    await http_client.aclose()
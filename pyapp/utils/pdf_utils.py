@@ -1,11 +1,82 @@
+import multiprocessing
+import threading
+from concurrent.futures import ProcessPoolExecutor
+from typing import Dict, Iterator, List
+
 import fitz  # PyMuPDF
-from tempfile import NamedTemporaryFile
-import boto3
 
+from pyapp.config.settings import settings
 
-def extract_text_from_pdf(pdf_path: str) -> str:
-    """Extracts text content from a PDF using PyMuPDF."""
+_pools: Dict[int, ProcessPoolExecutor] = {}
+_pool_lock = threading.Lock()
+
+
+def _extract_page_range(path: str, start: int, stop: int) -> List[str]:
+    """Runs in a pool worker, which opens its own copy of the document."""
+    doc = fitz.open(path)
+    try:
+        return [doc[i].get_text() for i in range(start, stop)]
+    finally:
+        doc.close()
+
+
+def _get_pool(workers: int) -> ProcessPoolExecutor:
+    """Long-lived pool per worker count (in practice only PDF_EXTRACT_WORKERS)."""
+    with _pool_lock:
+        pool = _pools.get(workers)
+        if pool is None:
+            # spawn, not fork: the API process has threads (event loop, executors, DB pool)
+            pool = _pools[workers] = ProcessPoolExecutor(
+                max_workers=workers,
+                mp_context=multiprocessing.get_context("spawn"),
+            )
+        return pool
+
+
+def shutdown_pdf_pool() -> None:
+    with _pool_lock:
+        for pool in _pools.values():
+            pool.shutdown(cancel_futures=True)
+        _pools.clear()
+
+
+def iter_pdf_pages(
+    pdf_path: str,
+    workers: int = settings.PDF_EXTRACT_WORKERS,
+    min_parallel_pages: int = settings.PDF_PARALLEL_MIN_PAGES,
+) -> Iterator[str]:
+    """
+    Yields the text of each page in order. Documents with at least
+    `min_parallel_pages` pages are split into page ranges extracted in a
+    process pool; pages are yielded as soon as every range before them is
+    done, so consumers can start on the first pages early.
+    """
     doc = fitz.open(pdf_path)
-    full_text = "\n".join([page.get_text() for page in doc])
+    page_count = doc.page_count
+    if workers <= 1 or page_count < min_parallel_pages:
+        try:
+            for page in doc:
+                yield page.get_text()
+        finally:
+            doc.close()
+        return
     doc.close()
-    return full_text.strip()
+
+    # Several ranges per worker, so early pages come back before the last range starts
+    range_size = max(8, -(-page_count // (workers * 4)))
+    pool = _get_pool(workers)
+    futures = [
+        pool.submit(_extract_page_range, pdf_path, start, min(page_count, start + range_size))
+        for start in range(0, page_count, range_size)
+    ]
+    try:
+        for future in futures:
+            yield from future.result()
+    finally:
+        for future in futures:
+            future.cancel()
+
+
+def extract_text_from_pdf(pdf_path: str) -> str:
+    """Extracts text content from a PDF using PyMuPDF."""
+    return "\n".join(iter_pdf_pages(pdf_path)).strip()
@@ -1,4 +1,17 @@
-from typing import List
+import re
+from typing import Iterable, Iterator, List, Tuple, Union
+
+from pyapp.config.settings import settings
+from pyapp.utils.tokens import get_encoding
+
+_PARAGRAPH_BREAK = re.compile(r"\n\s*\n")
+# Sentence end: terminal punctuation, optional closing quotes/brackets, then whitespace
+_SENTENCE_END = re.compile(r"[.!?]+[\"')\]]*(?=\s)")
+
+# A chunk this full is closed at the next paragraph break rather than packed further
+_PARAGRAPH_FLUSH_RATIO = 0.75
+_STREAM_PIECE_CHARS = 64 * 1024
+
 
 def chunk_text(text: str, chunk_size: int = 500, overlap: int = 50) -> List[str]:
     words = text.split()
@@ -17,4 +30,132 @@ def chunk_text(text: str, chunk_size: int = 500, overlap: int = 50) -> List[str]
             start += 1
         else:
             start = next_start
-    return chunks
\ No newline at end of file
+    return chunks
+
+
+def _split_sentences(paragraph: str) -> List[str]:
+    text = " ".join(paragraph.split())
+    sentences = []
+    start = 0
+    for match in _SENTENCE_END.finditer(text):
+        sentence = text[start:match.end()].strip()
+        if sentence:
+            sentences.append(sentence)
+        start = match.end()
+    tail = text[start:].strip()
+    if tail:
+        sentences.append(tail)
+    return sentences
+
+
+def _last_sentence_end(text: str) -> int:
+    last = 0
+    for match in _SENTENCE_END.finditer(text):
+        last = match.end()
+    return last
+
+
+def _iter_paragraphs(stream: Iterable[str], max_buffer_chars: int) -> Iterator[Tuple[str, bool]]:
+    """
+    Yields (text, ends_paragraph) from a stream of text pieces, holding back only
+    the trailing, possibly incomplete paragraph. A paragraph that outgrows
+    max_buffer_chars is released early at its last sentence (or word) boundary.
+    """
+    buffer = ""
+    for piece in stream:
+        buffer += piece
+        parts = _PARAGRAPH_BREAK.split(buffer)
+        buffer = parts.pop()
+        for part in parts:
+            if part.strip():
+                yield part, True
+
+        if len(buffer) > max_buffer_chars:
+            cut = _last_sentence_end(buffer) or buffer.rfind(" ") + 1 or len(buffer)
+            yield buffer[:cut], False
+            buffer = buffer[cut:]
+
+    if buffer.strip():
+        yield buffer, True
+
+
+def _render(units: List[Tuple[str, int, int]]) -> str:
+    paragraphs = []
+    current_paragraph = None
+    for sentence, _, paragraph_no in units:
+        if paragraph_no != current_paragraph:
+            paragraphs.append([])
+            current_paragraph = paragraph_no
+        paragraphs[-1].append(sentence)
+    return "\n\n".join(" ".join(sentences) for sentences in paragraphs)
+
+
+def iter_token_chunks(
+    source: Union[str, Iterable[str]],
+    max_tokens: int = settings.CHUNK_MAX_TOKENS,
+    overlap_tokens: int = settings.CHUNK_OVERLAP_TOKENS,
+    model: str = settings.EMBEDDINGS_MODEL,
+) -> Iterator[str]:
+    """
+    Splits text into chunks of at most ~max_tokens tokens (tiktoken, the
+    embedding model's encoding), cutting at sentence boundaries and preferring
+    paragraph boundaries. Consecutive chunks share up to overlap_tokens of
+    whole trailing sentences.
+
+    `source` may be a string or any iterable of text pieces (file reads, PDF
+    pages...). Chunks are yielded as soon as they are complete, so a large
+    document never has to be held in memory as a whole.
+    """
+    if isinstance(source, str):
+        text = source
+        source = (text[i:i + _STREAM_PIECE_CHARS] for i in range(0, len(text), _STREAM_PIECE_CHARS))
+
+    encoding = get_encoding(model)
+    # Roughly 4 chars per token; hold back at most a few chunks' worth of text
+    max_buffer_chars = max_tokens * 4 * 4
+
+    current: List[Tuple[str, int, int]] = []
+    current_tokens = 0
+    fresh_units = 0
+    paragraph_no = 0
+
+    def flush():
+        nonlocal current, current_tokens, fresh_units
+        chunk = _render(current)
+        carried, carried_tokens = [], 0
+        for unit in reversed(current):
+            if carried_tokens + unit[1] > overlap_tokens:
+                break
+            carried.insert(0, unit)
+            carried_tokens += unit[1]
+        current, current_tokens, fresh_units = carried, carried_tokens, 0
+        return chunk
+
+    for paragraph, ends_paragraph in _iter_paragraphs(source, max_buffer_chars):
+        for sentence in _split_sentences(paragraph):
+            tokens = encoding.encode_ordinary(sentence)
+            # A single sentence over budget is split into token windows
+            if len(tokens) > max_tokens:
+                pieces = [encoding.decode(tokens[i:i + max_tokens]) for i in range(0, len(tokens), max_tokens)]
+            else:
+                pieces = [sentence]
+
+            for piece in pieces:
+                # +1 leaves room for the separator joining it to the previous sentence
+                cost = (len(tokens) if len(pieces) == 1 else len(encoding.encode_ordinary(piece))) + 1
+                if current_tokens + cost > max_tokens and fresh_units:
+                    yield flush()
+                if current_tokens + cost > max_tokens:
+                    # Even the carried-over overlap doesn't leave room; drop it
+                    current, current_tokens = [], 0
+                current.append((piece, cost, paragraph_no))
+                current_tokens += cost
+                fresh_units += 1
+
+        if ends_paragraph:
+            paragraph_no += 1
+            if fresh_units and current_tokens >= max_tokens * _PARAGRAPH_FLUSH_RATIO:
+                yield flush()
+
+    if fresh_units:
+        yield _render(current)
@@ -0,0 +1,15 @@
+from functools import lru_cache
+
+import tiktoken
+
+
+@lru_cache(maxsize=8)
+def get_encoding(model: str):
+    try:
+        return tiktoken.encoding_for_model(model)
+    except KeyError:
+        return tiktoken.get_encoding("cl100k_base")
+
+
+def count_tokens(text: str, model: str) -> int:
+    return len(get_encoding(model).encode_ordinary(text))
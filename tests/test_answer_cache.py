@@ -0,0 +1,68 @@
+import math
+
+import pytest
+
+from pyapp.services.answer_cache import SemanticAnswerCache
+
+
+def _at_angle(degrees: float) -> list:
+    """A unit vector whose cosine similarity to [1, 0] is cos(degrees)."""
+    return [math.cos(math.radians(degrees)), math.sin(math.radians(degrees))]
+
+
+@pytest.fixture
+def cache():
+    return SemanticAnswerCache(enabled=True, threshold=0.95, max_per_item=10, max_entries=100)
+
+
+def test_answers_questions_similar_enough_to_a_stored_one(cache):
+    cache.store(1, 10, "What is Raft?", [1.0, 0.0], "A consensus algorithm.")
+
+    # cos(15°) ≈ 0.966 reaches the threshold; scale does not matter
+    assert cache.lookup(1, 10, [3 * x for x in _at_angle(15)]) == "A consensus algorithm."
+    # cos(20°) ≈ 0.940 does not
+    assert cache.lookup(1, 10, _at_angle(20)) is None
+
+
+def test_returns_the_most_similar_stored_answer(cache):
+    cache.store(1, 10, "What is Raft?", [1.0, 0.0], "A consensus algorithm.")
+    cache.store(1, 10, "Who leads in Raft?", _at_angle(12), "The elected leader.")
+
+    assert cache.lookup(1, 10, _at_angle(10)) == "The elected leader."
+
+
+def test_answers_are_kept_per_user_and_item(cache):
+    cache.store(1, 10, "What is Raft?", [1.0, 0.0], "A consensus algorithm.")
+
+    assert cache.lookup(2, 10, [1.0, 0.0]) is None
+    assert cache.lookup(1, 11, [1.0, 0.0]) is None
+
+
+def test_invalidate_drops_the_item_for_every_user(cache):
+    cache.store(1, 10, "What is Raft?", [1.0, 0.0], "A consensus algorithm.")
+    cache.store(2, 10, "What is Raft?", [1.0, 0.0], "A consensus algorithm.")
+    cache.store(1, 11, "What is Paxos?", [1.0, 0.0], "Another one.")
+
+    cache.invalidate(10)
+
+    assert cache.lookup(1, 10, [1.0, 0.0]) is None
+    assert cache.lookup(2, 10, [1.0, 0.0]) is None
+    assert cache.lookup(1, 11, [1.0, 0.0]) == "Another one."
+    assert cache.stats()["entries"] == 1
+
+
+def test_oldest_answers_are_dropped_beyond_the_per_item_bound():
+    cache = SemanticAnswerCache(enabled=True, threshold=0.99, max_per_item=2, max_entries=100)
+    for n, degrees in enumerate((0, 45, 90)):
+        cache.store(1, 10, f"question {n}", _at_angle(degrees), f"answer {n}")
+
+    assert cache.lookup(1, 10, _at_angle(0)) is None
+    assert cache.lookup(1, 10, _at_angle(90)) == "answer 2"
+    assert cache.stats()["entries"] == 2
+
+
+def test_disabled_cache_stores_nothing():
+    cache = SemanticAnswerCache(enabled=False, threshold=0.5, max_per_item=10, max_entries=100)
+    cache.store(1, 10, "What is Raft?", [1.0, 0.0], "A consensus algorithm.")
+
+    assert cache.lookup(1, 10, [1.0, 0.0]) is None
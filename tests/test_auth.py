@@ -0,0 +1,124 @@
+import asyncio
+import threading
+
+import pytest
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+
+from pyapp.api.routes import auth as auth_routes
+from pyapp.db.async_session import get_async_db
+from pyapp.models.user import User
+from pyapp.utils import auth
+from pyapp.utils.auth import CurrentUser, HashingBusy, UserCache, _run_hashing
+
+
+@pytest.fixture
+def cache(monkeypatch):
+    cache = UserCache(ttl_seconds=60, max_size=10)
+    monkeypatch.setattr(auth, "user_cache", cache)
+    return cache
+
+
+@pytest.fixture
+def user(sqlite_db, cache):
+    """A stored user, also in the cache, and the open session it was loaded in."""
+    db = sqlite_db()
+    user = User(email="reader@example.com", hashed_password="x")
+    db.add(user)
+    db.commit()
+    cache.put(CurrentUser(id=user.id, email=user.email))
+    yield db, user
+    db.close()
+
+
+def test_user_cache_drops_least_recently_used_beyond_its_size():
+    cache = UserCache(ttl_seconds=60, max_size=2)
+    for n in (1, 2):
+        cache.put(CurrentUser(id=n, email=None))
+    cache.get(1)
+    cache.put(CurrentUser(id=3, email=None))
+
+    assert [cache.get(n) is not None for n in (1, 2, 3)] == [True, False, True]
+
+
+def test_user_cache_entries_expire(monkeypatch):
+    now = [100.0]
+    monkeypatch.setattr(auth.time, "monotonic", lambda: now[0])
+    cache = UserCache(ttl_seconds=60, max_size=10)
+    cache.put(CurrentUser(id=1, email=None))
+
+    now[0] += 61
+
+    assert cache.get(1) is None
+
+
+def test_updating_a_user_evicts_it_from_the_cache(user, cache):
+    db, stored = user
+
+    stored.email = "renamed@example.com"
+    db.commit()
+
+    assert cache.get(stored.id) is None
+
+
+def test_deleting_a_user_evicts_it_from_the_cache(user, cache):
+    db, stored = user
+
+    db.delete(stored)
+    db.commit()
+
+    assert cache.get(stored.id) is None
+
+
+def test_hashing_beyond_the_pending_limit_is_refused(monkeypatch):
+    monkeypatch.setattr(auth.settings, "AUTH_HASH_MAX_PENDING", 1)
+    release = threading.Event()
+
+    async def fill_then_overflow():
+        running = asyncio.create_task(_run_hashing(release.wait))
+        await asyncio.sleep(0)
+        try:
+            with pytest.raises(HashingBusy):
+                await _run_hashing(str, "second")
+        finally:
+            release.set()
+        await running
+        # The slot is free again once the first hash finished
+        return await _run_hashing(str, "third")
+
+    assert asyncio.run(fill_then_overflow()) == "third"
+
+
+@pytest.fixture
+def client():
+    app = FastAPI()
+    app.include_router(auth_routes.router, prefix="/auth")
+    app.dependency_overrides[get_async_db] = lambda: None
+    return TestClient(app)
+
+
+async def _busy(*args):
+    raise HashingBusy()
+
+
+async def _no_user(*args):
+    return None
+
+
+def test_login_while_hashing_is_busy_asks_to_retry(client, monkeypatch):
+    monkeypatch.setattr(auth_routes, "authenticate_user", _busy)
+
+    response = client.post("/auth/login", data={"username": "reader@example.com", "password": "secret"})
+
+    assert response.status_code == 429
+    assert response.headers["Retry-After"] == "1"
+
+
+def test_signup_while_hashing_is_busy_asks_to_retry(client, monkeypatch):
+    monkeypatch.setattr(auth_routes, "get_user_by_email", _no_user)
+    monkeypatch.setattr(auth_routes, "create_user", _busy)
+
+    response = client.post("/auth/signup", json={"email": "reader@example.com", "password": "secret"})
+
+    assert response.status_code == 429
+    assert response.headers["Retry-After"] == "1"
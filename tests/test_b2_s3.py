@@ -0,0 +1,53 @@
+import base64
+import hashlib
+import io
+
+import pytest
+from boto3.s3.transfer import TransferConfig
+
+from pyapp.services import b2_s3
+from pyapp.services.b2_s3 import UploadTooLarge, expected_sha256_checksum, spool_upload
+
+MB = 1024 * 1024
+
+
+def _b64_sha256(data: bytes) -> str:
+    return base64.b64encode(hashlib.sha256(data).digest()).decode()
+
+
+def test_spool_upload_records_size_and_hash():
+    data = b"%PDF-1.7 " * 1000
+    upload = spool_upload(io.BytesIO(data), max_bytes=len(data))
+    try:
+        assert (upload.size, upload.sha256) == (len(data), hashlib.sha256(data).hexdigest())
+        with open(upload.path, "rb") as f:
+            assert f.read() == data
+    finally:
+        upload.remove()
+
+
+def test_spool_upload_refuses_files_over_the_limit():
+    with pytest.raises(UploadTooLarge):
+        spool_upload(io.BytesIO(b"x" * 101), max_bytes=100)
+
+
+def test_single_put_checksum_is_the_content_sha256(monkeypatch):
+    monkeypatch.setattr(b2_s3, "transfer_config", TransferConfig(multipart_threshold=8 * MB, multipart_chunksize=5 * MB))
+    data = b"small pdf"
+    upload = spool_upload(io.BytesIO(data), max_bytes=MB)
+    try:
+        assert expected_sha256_checksum(upload) == _b64_sha256(data)
+    finally:
+        upload.remove()
+
+
+def test_multipart_checksum_is_the_hash_of_part_hashes(monkeypatch):
+    monkeypatch.setattr(b2_s3, "transfer_config", TransferConfig(multipart_threshold=8 * MB, multipart_chunksize=5 * MB))
+    data = bytes(range(256)) * (12 * MB // 256)
+    parts = [data[:5 * MB], data[5 * MB:10 * MB], data[10 * MB:]]
+    upload = spool_upload(io.BytesIO(data), max_bytes=len(data))
+    try:
+        composite = hashlib.sha256(b"".join(hashlib.sha256(part).digest() for part in parts)).digest()
+        assert expected_sha256_checksum(upload) == f"{base64.b64encode(composite).decode()}-3"
+    finally:
+        upload.remove()
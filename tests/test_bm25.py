@@ -0,0 +1,60 @@
+import zlib
+
+import pytest
+
+from pyapp.utils import bm25
+
+
+def _weights(vector) -> dict:
+    return dict(zip(vector.indices, vector.values))
+
+
+def _crc(term: str) -> int:
+    return zlib.crc32(term.encode("utf-8"))
+
+
+def test_terms_are_lowercased_words_without_stopwords():
+    assert bm25.terms("What is the HTTP 404 error in the API?") == ["http", "404", "error", "api"]
+
+
+def test_query_vector_has_one_unit_weight_per_distinct_term():
+    vector = bm25.query_vector("Kafka kafka partitions")
+
+    assert _weights(vector) == {_crc("kafka"): 1.0, _crc("partitions"): 1.0}
+    assert vector.indices == sorted(vector.indices)
+
+
+def test_stopword_only_text_has_an_empty_vector():
+    assert bm25.query_vector("what is it and how").indices == []
+
+
+def test_document_weights_are_bm25_term_frequencies():
+    vector = bm25.document_vector("Raft raft leader")
+
+    norm = 1 - bm25.B + bm25.B * 3 / bm25.AVG_CHUNK_TERMS
+    assert _weights(vector) == {
+        _crc("raft"): pytest.approx(2 * (bm25.K1 + 1) / (2 + bm25.K1 * norm)),
+        _crc("leader"): pytest.approx(1 * (bm25.K1 + 1) / (1 + bm25.K1 * norm)),
+    }
+
+
+def test_repeated_terms_saturate():
+    weights = [_weights(bm25.document_vector("raft " * tf))[_crc("raft")] for tf in (1, 2, 10, 100)]
+
+    assert weights == sorted(weights)
+    assert weights[-1] < bm25.K1 + 1
+
+
+def test_longer_chunks_weigh_each_occurrence_less():
+    short = _weights(bm25.document_vector("raft leader"))[_crc("raft")]
+    long = _weights(bm25.document_vector("raft " + "filler " * 300))[_crc("raft")]
+
+    assert long < short
+
+
+def test_query_and_document_terms_share_indices():
+    document = _weights(bm25.document_vector("The Raft leader appends entries"))
+    query = _weights(bm25.query_vector("who is the raft leader?"))
+
+    assert set(query) == {_crc("raft"), _crc("leader")}
+    assert set(query) <= set(document)
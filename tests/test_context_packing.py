@@ -0,0 +1,78 @@
+from pyapp.utils.context_packing import _MIN_OVERLAP_WORDS, _Passage, _merge, _overlap, assemble_context
+
+
+def _sentences(start, stop):
+    return " ".join(f"Sentence number {i} of the source document." for i in range(start, stop))
+
+
+def _passage(text, rank=0):
+    return _Passage(text, text.split(), rank)
+
+
+def test_overlap_counts_the_shared_boundary_words():
+    first = "a b c d e f g h i j".split()
+    second = "c d e f g h i j k l".split()
+
+    assert _overlap(first, second) == 8
+    assert _overlap(second, first) == 0
+
+
+def test_overlap_below_the_minimum_is_coincidence():
+    shared = [f"s{i}" for i in range(_MIN_OVERLAP_WORDS - 1)]
+
+    assert _overlap(["x"] + shared, shared + ["y", "z"]) == 0
+
+
+def test_overlap_prefers_the_longest_match():
+    first = ("x y " * 10).split()
+    second = ("x y " * 10 + "end").split()
+
+    assert _overlap(first, second) == 20
+
+
+def test_merge_keeps_the_shared_text_once_and_the_second_paragraph_breaks():
+    first = _passage("one two three four five six seven eight nine ten", rank=2)
+    second = _passage("three four five six seven eight nine ten\n\neleven twelve", rank=0)
+
+    merged = _merge(first, second, _overlap(first.words, second.words))
+
+    assert merged.text == "one two three four five six seven eight nine ten\n\neleven twelve"
+    assert merged.words == merged.text.split()
+    assert merged.rank == 0
+
+
+def test_neighbouring_chunks_are_merged_into_one_passage():
+    chunks = [_sentences(6, 12), _sentences(0, 8)]
+
+    assert assemble_context(chunks, token_budget=1000) == [_sentences(0, 12)]
+
+
+def test_near_duplicates_of_a_more_relevant_passage_are_dropped():
+    best = _sentences(0, 10)
+    copy = _sentences(1, 10).replace("number 5", "number five")
+
+    assert assemble_context([best, copy, "An unrelated passage about something else."], token_budget=1000) == [
+        best,
+        "An unrelated passage about something else.",
+    ]
+
+
+def test_passages_over_the_budget_give_way_to_smaller_ones():
+    big = "big " * 60
+    small = "small passage that fits."
+
+    packed = assemble_context(["top passage here.", big, small], token_budget=50)
+
+    assert packed == ["top passage here.", small]
+
+
+def test_most_relevant_passage_is_cut_down_rather_than_dropped():
+    packed = assemble_context([_sentences(0, 20)], token_budget=30)
+
+    assert len(packed) == 1
+    assert len(packed[0].split()) == 30
+    assert _sentences(0, 20).startswith(packed[0])
+
+
+def test_blank_chunks_are_ignored():
+    assert assemble_context(["", "   ", "Only this."], token_budget=100) == ["Only this."]
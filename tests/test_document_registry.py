@@ -0,0 +1,100 @@
+import asyncio
+import hashlib
+from contextlib import nullcontext
+
+import pytest
+from qdrant_client import AsyncQdrantClient
+from qdrant_client.http.models import Distance, PointStruct, VectorParams
+
+from pyapp.config.settings import settings
+from pyapp.models.document import Document
+from pyapp.models.ingestion_job import IngestionJob, JobStatus
+from pyapp.models.library_item import LibraryItem
+from pyapp.models.user import User
+from pyapp.services import document_registry
+from pyapp.services.b2_s3 import document_object_key
+from pyapp.services.document_registry import _item_filter, copy_document_vectors
+
+
+def test_document_object_key_is_sharded_by_hash_prefix():
+    sha256 = hashlib.sha256(b"%PDF-1.7").hexdigest()
+
+    assert document_object_key(sha256) == f"documents/{sha256[:2]}/{sha256}.pdf"
+
+
+@pytest.fixture
+def registry(sqlite_db, monkeypatch):
+    """A document with library items 1-3 for users 1-3, over SQLite and an in-memory Qdrant."""
+    monkeypatch.setattr(document_registry, "SessionLocal", sqlite_db)
+    db = sqlite_db()
+    db.add(Document(id=1, sha256="0" * 64, size_bytes=1))
+    for n in (1, 2, 3):
+        db.add(User(id=n, email=f"user{n}@example.com", hashed_password="x"))
+        db.add(LibraryItem(id=n, user_id=n, url_or_path="doc.pdf", content_type="pdf", document_id=1))
+    db.commit()
+    db.close()
+
+    client = AsyncQdrantClient(":memory:")
+    asyncio.run(
+        client.create_collection(settings.QDRANT_APP_VECTOR, vectors_config=VectorParams(size=2, distance=Distance.COSINE))
+    )
+    monkeypatch.setattr(document_registry, "get_async_qdrant_client", lambda: client)
+    # The Postgres advisory lock around upserts; nothing else writes here
+    monkeypatch.setattr(document_registry, "vector_writes", nullcontext)
+    return sqlite_db, client
+
+
+def _add_job(session_factory, library_item_id: int, status: JobStatus) -> None:
+    db = session_factory()
+    db.add(IngestionJob(user_id=library_item_id, kind="pdf", source="doc.pdf", status=status.value,
+                        library_item_id=library_item_id, document_id=1))
+    db.commit()
+    db.close()
+
+
+def _index(client, library_item_id: int, count: int, first_id: int) -> None:
+    points = [
+        PointStruct(id=first_id + n, vector=[1.0, float(n)], payload={"library_item_id": library_item_id, "chunk": n})
+        for n in range(count)
+    ]
+    asyncio.run(client.upsert(settings.QDRANT_APP_VECTOR, points=points))
+
+
+def _chunks_of(client, library_item_id: int) -> list:
+    records, _ = asyncio.run(
+        client.scroll(settings.QDRANT_APP_VECTOR, scroll_filter=_item_filter(library_item_id), limit=100)
+    )
+    return sorted(record.payload["chunk"] for record in records)
+
+
+def test_copies_the_vectors_of_a_fully_ingested_sibling(registry):
+    session_factory, client = registry
+    _add_job(session_factory, 1, JobStatus.succeeded)
+    _index(client, 1, 3, first_id=100)
+
+    assert asyncio.run(copy_document_vectors(1, user_id=2, library_item_id=2)) == 3
+    assert _chunks_of(client, 2) == [0, 1, 2]
+    assert _chunks_of(client, 1) == [0, 1, 2]
+
+
+def test_skips_siblings_still_indexing_or_failed_partway(registry):
+    session_factory, client = registry
+    _add_job(session_factory, 1, JobStatus.running)
+    _add_job(session_factory, 3, JobStatus.failed)
+    _index(client, 1, 2, first_id=100)
+    _index(client, 3, 1, first_id=200)
+
+    # Nothing complete to copy from: the item is indexed the normal way
+    assert asyncio.run(copy_document_vectors(1, user_id=2, library_item_id=2)) == 0
+    assert _chunks_of(client, 2) == []
+
+
+def test_copy_replaces_points_left_by_an_earlier_attempt(registry):
+    session_factory, client = registry
+    _add_job(session_factory, 1, JobStatus.succeeded)
+    _index(client, 1, 2, first_id=100)
+    # A previous attempt left more points than the sibling has
+    _index(client, 2, 5, first_id=300)
+
+    assert asyncio.run(copy_document_vectors(1, user_id=2, library_item_id=2)) == 2
+    assert _chunks_of(client, 2) == [0, 1]
@@ -0,0 +1,84 @@
+import asyncio
+import random
+from types import SimpleNamespace
+
+import pytest
+
+from pyapp.config.settings import settings
+from pyapp.utils import embedding
+from pyapp.utils.embedding import get_openai_embeddings, pack_batches
+
+
+def test_batches_respect_the_item_limit():
+    assert pack_batches([1] * 7, max_items=3, max_tokens=100) == [[0, 1, 2], [3, 4, 5], [6]]
+
+
+def test_batches_respect_the_token_limit():
+    assert pack_batches([40, 30, 40, 10, 90], max_items=10, max_tokens=100) == [[0, 1], [2, 3], [4]]
+
+
+def test_input_over_the_token_limit_gets_a_batch_of_its_own():
+    assert pack_batches([10, 150, 10], max_items=10, max_tokens=100) == [[0], [1], [2]]
+
+
+def test_batches_are_contiguous_and_cover_every_input():
+    counts = [random.Random(n).randint(1, 60) for n in range(200)]
+    batches = pack_batches(counts, max_items=16, max_tokens=300)
+
+    assert [i for batch in batches for i in batch] == list(range(200))
+    for batch in batches:
+        assert len(batch) <= 16
+        assert len(batch) == 1 or sum(counts[i] for i in batch) <= 300
+
+
+def test_no_inputs_no_batches():
+    assert pack_batches([], max_items=10, max_tokens=100) == []
+
+
+class _SlowFirstEmbeddings:
+    """Stub of client.embeddings: earlier batches answer later, each with its items shuffled."""
+
+    def __init__(self, batches_expected: int):
+        self.batches_expected = batches_expected
+        self.requests = []
+
+    async def create(self, input, model, **kwargs):
+        batch_no = len(self.requests)
+        self.requests.append(list(input))
+        await asyncio.sleep(0.01 * (self.batches_expected - batch_no))
+        data = [
+            SimpleNamespace(index=i, embedding=[float(text.split()[-1])] * kwargs["dimensions"])
+            for i, text in enumerate(input)
+        ]
+        random.Random(batch_no).shuffle(data)
+        return SimpleNamespace(data=data)
+
+
+@pytest.fixture
+def small_batches(monkeypatch):
+    monkeypatch.setattr(settings, "EMBEDDINGS_BATCH_SIZE", 3)
+    monkeypatch.setattr(settings, "EMBEDDINGS_BATCH_TOKENS", 1000)
+    monkeypatch.setattr(settings, "EMBEDDINGS_CONCURRENCY", 4)
+
+
+def test_embeddings_come_back_in_input_order_when_batches_finish_out_of_order(monkeypatch, small_batches):
+    stub = _SlowFirstEmbeddings(batches_expected=4)
+    monkeypatch.setattr(embedding, "client", SimpleNamespace(embeddings=stub))
+    texts = [f"chunk {n}" for n in range(10)]
+
+    vectors = asyncio.run(
+        get_openai_embeddings(texts, model="text-embedding-3-small", dimensions=4, use_cache=False)
+    )
+
+    assert len(stub.requests) == 4
+    assert vectors == [[float(n)] * 4 for n in range(10)]
+
+
+def test_vectors_of_the_wrong_size_are_refused(monkeypatch, small_batches):
+    async def create(input, model, **kwargs):
+        return SimpleNamespace(data=[SimpleNamespace(index=i, embedding=[0.0] * 3) for i in range(len(input))])
+
+    monkeypatch.setattr(embedding, "client", SimpleNamespace(embeddings=SimpleNamespace(create=create)))
+
+    with pytest.raises(ValueError):
+        asyncio.run(get_openai_embeddings(["a 1"], model="text-embedding-3-small", dimensions=4, use_cache=False))
@@ -0,0 +1,48 @@
+from types import SimpleNamespace
+
+import pytest
+
+from pyapp.utils import embedding_cache
+from pyapp.utils.embedding_cache import EmbeddingCache
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    now = [1000.0]
+    monkeypatch.setattr(embedding_cache, "time", SimpleNamespace(time=lambda: now[0]))
+    return now
+
+
+def test_embedding_memory_tier_keeps_the_most_recently_used(tmp_path, clock):
+    cache = EmbeddingCache(str(tmp_path / "embeddings.db"), memory_items=2, disk_items=100)
+    cache.put_many({"a": b"A", "b": b"B"})
+    cache.get_many(["a"])
+    cache.put_many({"c": b"C"})
+
+    assert list(cache._memory) == ["a", "c"]
+    # Dropped from memory only: served from disk and remembered again
+    assert cache.get_many(["b"]) == [b"B"]
+    assert list(cache._memory) == ["c", "b"]
+
+
+def test_embedding_disk_tier_evicts_least_recently_used(tmp_path, clock):
+    cache = EmbeddingCache(str(tmp_path / "embeddings.db"), memory_items=0, disk_items=10)
+    for n in range(10):
+        cache.put_many({f"k{n}": b"x"})
+        clock[0] += 1
+    cache.get_many(["k0"])
+    clock[0] += 1
+
+    cache.put_many({"k10": b"x"})
+
+    # One over the bound, plus 10% of it so eviction does not run on every insert
+    assert cache.get_many(["k0", "k1", "k2", "k3", "k10"]) == [b"x", None, None, b"x", b"x"]
+    assert cache.stats()["disk_entries"] == 9
+
+
+def test_embedding_cache_key_ignores_whitespace_but_not_model_or_size():
+    key = embedding_cache.cache_key("text-embedding-3-small", 1536, "some  text\n")
+
+    assert key == embedding_cache.cache_key("text-embedding-3-small", 1536, "some text")
+    assert key != embedding_cache.cache_key("text-embedding-3-small", 512, "some text")
+    assert key != embedding_cache.cache_key("text-embedding-3-large", 1536, "some text")
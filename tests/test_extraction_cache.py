@@ -0,0 +1,57 @@
+import os
+from types import SimpleNamespace
+
+import pytest
+
+from pyapp.utils import extraction_cache
+from pyapp.utils.extraction_cache import ExtractionCache
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    now = [1000.0]
+    monkeypatch.setattr(extraction_cache, "time", SimpleNamespace(time=lambda: now[0]))
+    return now
+
+
+def test_extraction_entries_expire_after_the_ttl(tmp_path, clock):
+    cache = ExtractionCache(str(tmp_path / "extractions.db"), ttl_seconds=60, max_bytes=1 << 20)
+    cache.put("https://example.com/a", "article text", etag='"v1"')
+
+    clock[0] += 59
+    hit = cache.get("https://example.com/a")
+    assert hit.text == "article text"
+    assert hit.conditional_headers() == {"If-None-Match": '"v1"'}
+
+    clock[0] += 2
+    assert cache.get("https://example.com/a") is None
+    assert cache.stats()["entries"] == 0
+
+
+def test_extraction_refresh_restarts_the_ttl(tmp_path, clock):
+    cache = ExtractionCache(str(tmp_path / "extractions.db"), ttl_seconds=60, max_bytes=1 << 20)
+    cache.put("https://example.com/a", "article text")
+
+    clock[0] += 50
+    cache.refresh("https://example.com/a", etag='"v2"')
+    clock[0] += 50
+
+    assert cache.get("https://example.com/a").etag == '"v2"'
+
+
+def test_extraction_cache_evicts_least_recently_used_beyond_its_size(tmp_path, clock):
+    # Random text barely compresses, so each entry takes ~4 KB
+    texts = {f"https://example.com/{n}": os.urandom(3000).hex() for n in range(3)}
+    cache = ExtractionCache(str(tmp_path / "extractions.db"), ttl_seconds=3600, max_bytes=9000)
+    for url in ["https://example.com/0", "https://example.com/1"]:
+        cache.put(url, texts[url])
+        clock[0] += 1
+    cache.get("https://example.com/0")
+    clock[0] += 1
+
+    cache.put("https://example.com/2", texts["https://example.com/2"])
+
+    assert cache.get("https://example.com/1") is None
+    assert cache.get("https://example.com/0").text == texts["https://example.com/0"]
+    assert cache.get("https://example.com/2").text == texts["https://example.com/2"]
+    assert cache.stats()["bytes"] <= 9000
@@ -0,0 +1,163 @@
+import asyncio
+from datetime import datetime, timedelta
+
+import pytest
+
+from pyapp.models.ingestion_job import IngestionJob, JobStatus
+from pyapp.services import ingestion_queue
+from pyapp.services.ingestion_pipeline import LeaseLost, PermanentJobError, TransientJobError
+from pyapp.services.ingestion_queue import (
+    IngestionWorkerPool,
+    StageTracker,
+    _claim_next_job,
+    _update_job,
+    retry_delay,
+)
+
+
+@pytest.fixture
+def jobs(sqlite_db, monkeypatch):
+    """Session factory of the job table the queue works on."""
+    monkeypatch.setattr(ingestion_queue, "SessionLocal", sqlite_db)
+    return sqlite_db
+
+
+@pytest.fixture
+def discarded(monkeypatch):
+    """Library items the queue discards after a job's last attempt failed."""
+    items = []
+    monkeypatch.setattr(ingestion_queue, "discard_library_item", items.append)
+    return items
+
+
+def _add_job(session_factory, **fields) -> int:
+    fields = {"user_id": 1, "kind": "url", "source": "https://example.com", "progress": {}, **fields}
+    db = session_factory()
+    job = IngestionJob(**fields)
+    db.add(job)
+    db.commit()
+    job_id = job.id
+    db.close()
+    return job_id
+
+
+def _load(session_factory, job_id: int) -> IngestionJob:
+    db = session_factory()
+    try:
+        return db.get(IngestionJob, job_id)
+    finally:
+        db.close()
+
+
+def _expire_lease(session_factory, job_id: int) -> None:
+    db = session_factory()
+    db.get(IngestionJob, job_id).lease_expires_at = datetime.utcnow() - timedelta(seconds=1)
+    db.commit()
+    db.close()
+
+
+def test_claims_due_jobs_only(jobs):
+    later = _add_job(jobs, next_attempt_at=datetime.utcnow() + timedelta(minutes=5))
+    due = _add_job(jobs)
+
+    claimed = _claim_next_job()
+
+    assert (claimed.id, claimed.attempts) == (due, 1)
+    row = _load(jobs, due)
+    assert row.status == JobStatus.running.value
+    assert row.lease_expires_at > datetime.utcnow()
+    assert _claim_next_job() is None
+    assert _load(jobs, later).status == JobStatus.queued.value
+
+
+def test_job_with_an_expired_lease_is_reclaimed(jobs):
+    job_id = _add_job(jobs)
+    _claim_next_job()
+    assert _claim_next_job() is None
+
+    _expire_lease(jobs, job_id)
+
+    assert _claim_next_job().attempts == 2
+
+
+def test_stale_worker_updates_are_rejected_once_attempts_moved_on(jobs):
+    job_id = _add_job(jobs)
+    _claim_next_job()
+    _expire_lease(jobs, job_id)
+    _claim_next_job()
+
+    assert not _update_job(job_id, attempt=1, stage="index")
+    assert _load(jobs, job_id).stage is None
+    assert _update_job(job_id, attempt=2, stage="index")
+    assert _load(jobs, job_id).stage == "index"
+
+
+def test_stage_raises_lease_lost_for_a_stale_attempt(jobs):
+    job_id = _add_job(jobs)
+    stale = _claim_next_job()
+    _expire_lease(jobs, job_id)
+    _claim_next_job()
+    tracker = StageTracker(stale)
+
+    async def run_stage():
+        async with tracker.stage("extract"):
+            pass
+
+    with pytest.raises(LeaseLost):
+        asyncio.run(run_stage())
+    assert tracker.lease_lost
+
+
+def test_transient_errors_requeue_with_backoff_until_the_attempt_limit(jobs, discarded):
+    job_id = _add_job(jobs, max_attempts=2, library_item_id=7)
+    pool = IngestionWorkerPool(workers=1, poll_seconds=1)
+
+    job = _claim_next_job()
+    asyncio.run(pool._handle_failure(job, StageTracker(job), TransientJobError("Qdrant unavailable")))
+
+    row = _load(jobs, job_id)
+    assert row.status == JobStatus.queued.value
+    assert row.next_attempt_at > datetime.utcnow()
+    assert row.error == "Qdrant unavailable"
+    assert _claim_next_job() is None
+
+    db = jobs()
+    db.get(IngestionJob, job_id).next_attempt_at = datetime.utcnow()
+    db.commit()
+    db.close()
+    job = _claim_next_job()
+    asyncio.run(pool._handle_failure(job, StageTracker(job), TransientJobError("Qdrant unavailable")))
+
+    row = _load(jobs, job_id)
+    assert (row.status, row.attempts, row.library_item_id) == (JobStatus.failed.value, 2, None)
+    assert discarded == [7]
+
+
+def test_permanent_errors_fail_on_the_first_attempt(jobs, discarded):
+    job_id = _add_job(jobs, max_attempts=4)
+    job = _claim_next_job()
+
+    asyncio.run(IngestionWorkerPool(1, 1)._handle_failure(job, StageTracker(job), PermanentJobError("Empty")))
+
+    assert _load(jobs, job_id).status == JobStatus.failed.value
+    assert discarded == []
+
+
+def test_worker_lost_on_the_last_attempt_fails_the_job(jobs, discarded):
+    job_id = _add_job(jobs, max_attempts=1, library_item_id=7)
+    _claim_next_job()
+    _expire_lease(jobs, job_id)
+
+    assert _claim_next_job() is None
+
+    row = _load(jobs, job_id)
+    assert (row.status, row.error) == (JobStatus.failed.value, "Worker lost while processing")
+    assert discarded == [7]
+
+
+def test_retry_delay_doubles_up_to_the_cap(monkeypatch):
+    monkeypatch.setattr(ingestion_queue.random, "random", lambda: 1.0)
+    monkeypatch.setattr(ingestion_queue.settings, "INGESTION_RETRY_BASE_SECONDS", 10)
+    monkeypatch.setattr(ingestion_queue.settings, "INGESTION_RETRY_MAX_SECONDS", 60)
+
+    assert [retry_delay(n) for n in (1, 2, 3, 4)] == [10, 20, 40, 60]
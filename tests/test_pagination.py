@@ -0,0 +1,27 @@
+from datetime import datetime
+
+import pytest
+from fastapi import HTTPException
+
+from pyapp.utils.pagination import decode_cursor, encode_cursor
+
+
+def test_cursor_round_trips():
+    created_at = datetime(2026, 3, 14, 15, 9, 26, 535897)
+
+    assert decode_cursor(encode_cursor(created_at, 42)) == (created_at, 42)
+
+
+def test_cursor_is_url_safe_and_unpadded():
+    cursor = encode_cursor(datetime(2026, 1, 1), 7)
+
+    assert "=" not in cursor
+    assert set(cursor) <= set("ABCDEFGHIJKLMNOPQRSTUVWXYZabcdefghijklmnopqrstuvwxyz0123456789-_")
+
+
+@pytest.mark.parametrize("cursor", ["", "not a cursor", encode_cursor(datetime(2026, 1, 1), 7)[:-3], "////"])
+def test_malformed_cursor_is_a_400(cursor):
+    with pytest.raises(HTTPException) as error:
+        decode_cursor(cursor)
+
+    assert error.value.status_code == 400
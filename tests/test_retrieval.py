@@ -0,0 +1,64 @@
+import asyncio
+
+import pytest
+from qdrant_client import AsyncQdrantClient
+from qdrant_client.http.models import Distance, FusionQuery, SparseVectorParams, VectorParams
+
+from pyapp.config.settings import settings
+from pyapp.services import collection_schema
+from pyapp.services.collection_schema import SPARSE_VECTOR, check_collection
+from pyapp.services.retrieval import chunk_query
+
+EMBEDDING = [0.1] * 4
+
+
+@pytest.fixture
+def live_collection(monkeypatch):
+    """Checks a fresh in-memory collection as the live one, with or without sparse vectors."""
+    monkeypatch.setattr(collection_schema, "_live_sparse", None)
+    monkeypatch.setattr(settings, "EMBEDDINGS_DIMENSIONS", len(EMBEDDING))
+    monkeypatch.setattr(settings, "QDRANT_SPARSE_VECTORS", True)
+    monkeypatch.setattr(settings, "RETRIEVAL_HYBRID", True)
+
+    def check(sparse: bool) -> None:
+        async def create_and_check():
+            client = AsyncQdrantClient(":memory:")
+            await client.create_collection(
+                "chunks",
+                vectors_config=VectorParams(size=len(EMBEDDING), distance=Distance.COSINE),
+                sparse_vectors_config={SPARSE_VECTOR: SparseVectorParams()} if sparse else None,
+            )
+            assert await check_collection(client, "chunks")
+
+        asyncio.run(create_and_check())
+
+    return check
+
+
+def test_hybrid_query_fuses_dense_and_sparse_search(live_collection):
+    live_collection(sparse=True)
+
+    query = chunk_query("How does the Raft leader replicate?", EMBEDDING, user_id=1, library_item_id=2)
+
+    assert isinstance(query["query"], FusionQuery)
+    dense, sparse = query["prefetch"]
+    assert dense.query == EMBEDDING
+    assert sparse.using == SPARSE_VECTOR
+
+
+def test_collection_without_sparse_vectors_falls_back_to_dense_search(live_collection):
+    live_collection(sparse=False)
+
+    query = chunk_query("How does the Raft leader replicate?", EMBEDDING, user_id=1, library_item_id=2)
+
+    assert "prefetch" not in query
+    assert query["query"] == EMBEDDING
+
+
+def test_stopword_only_question_falls_back_to_dense_search(live_collection):
+    live_collection(sparse=True)
+
+    query = chunk_query("What is it?", EMBEDDING, user_id=1, library_item_id=2)
+
+    assert "prefetch" not in query
+    assert query["query"] == EMBEDDING
@@ -0,0 +1,69 @@
+from pyapp.utils.text_chunker import iter_token_chunks
+
+
+def _words(text):
+    return len(text.split())
+
+
+def _document(paragraphs=12, sentences=6):
+    return "\n\n".join(
+        " ".join(f"Paragraph {p} sentence {s} talks about topic {p * sentences + s}." for s in range(sentences))
+        for p in range(paragraphs)
+    )
+
+
+def test_chunks_stay_within_budget_and_keep_every_sentence():
+    text = _document()
+    chunks = list(iter_token_chunks(text, max_tokens=40, overlap_tokens=10))
+
+    assert len(chunks) > 1
+    assert all(_words(chunk) <= 40 for chunk in chunks)
+    for p in range(12):
+        for s in range(6):
+            sentence = f"Paragraph {p} sentence {s} talks about topic {p * 6 + s}."
+            assert any(sentence in chunk for chunk in chunks)
+
+
+def test_consecutive_chunks_share_whole_trailing_sentences():
+    chunks = list(iter_token_chunks(_document(), max_tokens=40, overlap_tokens=10))
+
+    for first, second in zip(chunks, chunks[1:]):
+        shared = second.split(".")[0] + "."
+        assert shared in first
+        assert _words(shared) <= 10
+
+
+def test_zero_overlap_never_repeats_a_sentence():
+    chunks = list(iter_token_chunks(_document(), max_tokens=40, overlap_tokens=0))
+    sentences = [sentence for chunk in chunks for sentence in chunk.replace("\n\n", " ").split(". ")]
+
+    assert len(sentences) == len(set(sentences))
+
+
+def test_streamed_pieces_give_the_same_chunks_as_the_whole_string():
+    text = _document()
+    pieces = [text[i:i + 37] for i in range(0, len(text), 37)]
+
+    assert list(iter_token_chunks(pieces, max_tokens=40, overlap_tokens=10)) == list(
+        iter_token_chunks(text, max_tokens=40, overlap_tokens=10)
+    )
+
+
+def test_full_chunks_end_at_paragraph_breaks():
+    # Paragraphs of 30 words (35 tokens with separators): above the 75% flush ratio
+    text = "\n\n".join(" ".join(f"Part {p} line {s} of five." for s in range(5)) for p in range(5))
+    chunks = list(iter_token_chunks(text, max_tokens=40, overlap_tokens=0))
+
+    assert chunks == text.split("\n\n")
+
+
+def test_sentence_over_budget_is_split_into_windows():
+    sentence = " ".join(f"w{i}" for i in range(95)) + "."
+    chunks = list(iter_token_chunks(sentence, max_tokens=40, overlap_tokens=0))
+
+    assert [_words(chunk) for chunk in chunks] == [40, 40, 15]
+    assert " ".join(chunks).split() == sentence.split()
+
+
+def test_empty_text_gives_no_chunks():
+    assert list(iter_token_chunks("  \n\n  ", max_tokens=40, overlap_tokens=10)) == []
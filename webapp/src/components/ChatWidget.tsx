@@ -5,6 +5,17 @@ import ReactMarkdown from "react-markdown";
 import { useAuth } from "../contexts/AuthContext";
 
 const BACKEND_URL = import.meta.env.VITE_API_URL || "http://localhost:8000";
+const POLL_INTERVAL_MS = 15000;
+
+type ChatMessage = { role: string; text: string; timestamp?: string };
+
+type HistoryEntry = { question: string; answer: string; timestamp?: string };
+
+const toMessages = (entries: HistoryEntry[]): ChatMessage[] =>
+  entries.flatMap(({ question, answer, timestamp }) => [
+    { role: "user", text: question, timestamp },
+    { role: "assistant", text: answer, timestamp },
+  ]);
 
 const ChatWidget: React.FC<{ libraryItemId: number }> = ({ libraryItemId }) => {
   const { token } = useAuth();
@@ -13,27 +24,43 @@ const ChatWidget: React.FC<{ libraryItemId: number }> = ({ libraryItemId }) => {
   const [input, setInput] = useState("");
   const messagesEndRef = useRef<HTMLDivElement>(null);
 
-  const [messages, setMessages] = useState<
-    { role: string; text: string; timestamp?: string }[]>([]);
+  const [messages, setMessages] = useState<ChatMessage[]>([]);
+  // Paging through history: older pages on demand, newer entries by polling
+  const [beforeCursor, setBeforeCursor] = useState<string | null>(null);
+  const [hasEarlier, setHasEarlier] = useState(false);
+  const latestCursorRef = useRef<string | null>(null);
+  const streamingRef = useRef(false);
 
   const toggleChat = () => setIsOpen(!isOpen);
 
+  const fetchHistory = (params: string) =>
+    fetch(`${BACKEND_URL}/api/chat-history/${libraryItemId}${params}`, {
+      headers: { Authorization: `Bearer ${token}` },
+    }).then(res => {
+      if (!res.ok) throw new Error("Failed to fetch chat history");
+      return res.json();
+    });
+
+  const loadEarlier = async () => {
+    if (!beforeCursor) return;
+    try {
+      const data = await fetchHistory(`?before=${encodeURIComponent(beforeCursor)}`);
+      setMessages((prev) => [...toMessages(data.messages), ...prev]);
+      setBeforeCursor(data.before_cursor);
+      setHasEarlier(data.has_more);
+    } catch (err) {
+      console.error("Fetch error:", err);
+    }
+  };
+
   useEffect(() => {
     if (!isOpen || !libraryItemId) return;
-    fetch(`${BACKEND_URL}/api/chat-history/${libraryItemId}`, {
-      headers: { Authorization: `Bearer ${token}` },
-    })
-      .then(res => {
-        if (!res.ok) throw new Error("Failed to fetch chat history");
-        return res.json();
-      })
+    fetchHistory("")
       .then(data => {
-        // Sort by created_at if available
-        const msgs = data.flatMap(({ question, answer, timestamp }: { question: string; answer: string; timestamp?: string }) => [
-          { role: "user", text: question, timestamp },
-          { role: "assistant", text: answer, timestamp },
-        ]);
-        setMessages(msgs);
+        setMessages(toMessages(data.messages));
+        setBeforeCursor(data.before_cursor);
+        setHasEarlier(data.has_more);
+        latestCursorRef.current = data.latest_cursor;
       })
       .catch(async (err) => {
         console.error("Fetch error:", err);
@@ -49,6 +76,23 @@ const ChatWidget: React.FC<{ libraryItemId: number }> = ({ libraryItemId }) => {
       });
   }, [isOpen, libraryItemId, token]); // These are all primitives or strings — correct
 
+  // Pick up exchanges made elsewhere (another tab or device) while the chat is open
+  useEffect(() => {
+    if (!isOpen || !libraryItemId) return;
+    const timer = setInterval(async () => {
+      if (streamingRef.current || !latestCursorRef.current) return;
+      try {
+        const data = await fetchHistory(`?since=${encodeURIComponent(latestCursorRef.current)}`);
+        if (streamingRef.current || data.messages.length === 0) return;
+        setMessages((prev) => [...prev, ...toMessages(data.messages)]);
+        latestCursorRef.current = data.latest_cursor;
+      } catch (err) {
+        console.error("Poll error:", err);
+      }
+    }, POLL_INTERVAL_MS);
+    return () => clearInterval(timer);
+  }, [isOpen, libraryItemId, token]);
+
   useEffect(() => {
     if (!isOpen) {
       setMessages([]);
@@ -62,8 +106,14 @@ const ChatWidget: React.FC<{ libraryItemId: number }> = ({ libraryItemId }) => {
     setMessages((prev) => [...prev, { role: "user", text: question }]);
     setInput("");
 
+    // Placeholder assistant message that fills in as tokens stream from the server
+    setMessages((prev) => [...prev, { role: "assistant", text: "" }]);
+    const setAnswer = (text: string) =>
+      setMessages((prev) => [...prev.slice(0, -1), { role: "assistant", text }]);
+
+    streamingRef.current = true;
     try {
-      const res = await fetch(`${BACKEND_URL}/api/ask-question`, {
+      const res = await fetch(`${BACKEND_URL}/api/ask-question/stream`, {
         method: "POST",
         headers: {
           "Content-Type": "application/json",
@@ -71,12 +121,44 @@ const ChatWidget: React.FC<{ libraryItemId: number }> = ({ libraryItemId }) => {
         },
         body: JSON.stringify({ question, library_item_id: libraryItemId }),
       });
+      if (!res.ok || !res.body) throw new Error("Failed to ask question");
 
-      const data = await res.json();
-      setMessages((prev) => [...prev, { role: "assistant", text: data.answer }]);
+      const reader = res.body.getReader();
+      const decoder = new TextDecoder();
+      let buffer = "";
+      let answer = "";
+
+      while (true) {
+        const { done, value } = await reader.read();
+        if (done) break;
+        buffer += decoder.decode(value, { stream: true });
+
+        // SSE events are separated by a blank line
+        const events = buffer.split("\n\n");
+        buffer = events.pop() ?? "";
+        for (const raw of events) {
+          const event = raw.match(/^event: (.*)$/m)?.[1];
+          const data = raw.match(/^data: (.*)$/m)?.[1];
+          if (!event || !data) continue;
+          const payload = JSON.parse(data);
+
+          if (event === "token") {
+            answer += payload.text;
+            setAnswer(answer);
+          } else if (event === "done") {
+            setAnswer(payload.answer);
+            // Our own exchange is already on screen; don't fetch it again when polling
+            if (payload.cursor) latestCursorRef.current = payload.cursor;
+          } else if (event === "error") {
+            throw new Error(payload.detail);
+          }
+        }
+      }
     } catch (err) {
       console.error("Chat error:", err);
-      setMessages((prev) => [...prev, { role: "assistant", text: "Something went wrong." }]);
+      setAnswer("Something went wrong.");
+    } finally {
+      streamingRef.current = false;
     }
   };
 
@@ -99,6 +181,13 @@ const ChatWidget: React.FC<{ libraryItemId: number }> = ({ libraryItemId }) => {
             <button onClick={toggleChat}><X className="w-5 h-5" /></button>
           </div>
           <div className="flex-1 overflow-y-auto px-4 py-2 space-y-2 text-sm">
+            {hasEarlier && (
+              <div className="text-center">
+                <button onClick={loadEarlier} className="text-xs text-indigo-600 hover:underline">
+                  Load earlier messages
+                </button>
+              </div>
+            )}
             {messages.map((msg, i) => (
               <div
                 key={i}
@@ -10,6 +10,8 @@ const BACKEND_URL = import.meta.env.VITE_API_URL || "http://localhost:8000";
 const LibraryPage: React.FC = () => {
   const [items, setItems] = useState<LibraryItem[]>([]);
   const [loading, setLoading] = useState(false);
+  const [nextCursor, setNextCursor] = useState<string | null>(null);
+  const [loadingMore, setLoadingMore] = useState(false);
   const [isGenerating, setIsGenerating] = useState(false);
   const token = localStorage.getItem("access_token");
   // const navigate = useNavigate();
@@ -24,11 +26,14 @@ const LibraryPage: React.FC = () => {
     }
   }, []);
 
-  const fetchLibraryItems = async () => {
+  // Pages come newest first; pass the cursor from the previous page to load the next one
+  const fetchLibraryItems = async (cursor: string | null = null) => {
     console.log("fetchLibraryItems called");
-    setLoading(true);
+    if (cursor) setLoadingMore(true);
+    else setLoading(true);
     try {
-      const res = await fetch(`${BACKEND_URL}/api/library`, {
+      const query = cursor ? `?cursor=${encodeURIComponent(cursor)}` : "";
+      const res = await fetch(`${BACKEND_URL}/api/library${query}`, {
         headers: {
           "Content-Type": "application/json",
           Authorization: `Bearer ${token}`,
@@ -38,7 +43,7 @@ const LibraryPage: React.FC = () => {
 
       const data = await res.json();
 
-      const adaptedItems: LibraryItem[] = data.map((item: any) => ({
+      const adaptedItems: LibraryItem[] = data.items.map((item: any) => ({
         id: item.id.toString(),
         title: item.title,
         source: item.source,
@@ -48,11 +53,28 @@ const LibraryPage: React.FC = () => {
         hasQA: false,
       }));
 
-      setItems(adaptedItems);
+      setItems((previous) => (cursor ? [...previous, ...adaptedItems] : adaptedItems));
+      setNextCursor(data.next_cursor);
     } catch (error) {
       console.error(error);
     } finally {
       setLoading(false);
+      setLoadingMore(false);
+    }
+  };
+
+  // Ingestion runs in the background; poll the job until it finishes
+  const waitForJob = async (jobId: number) => {
+    while (true) {
+      await new Promise((resolve) => setTimeout(resolve, 2000));
+      const res = await fetch(`${BACKEND_URL}/api/jobs/${jobId}`, {
+        headers: { Authorization: `Bearer ${token}` },
+      });
+      if (!res.ok) throw new Error("Failed to fetch job status");
+
+      const job = await res.json();
+      if (job.status === "succeeded") return job;
+      if (job.status === "failed") throw new Error(job.error || "Processing failed");
     }
   };
 
@@ -60,8 +82,9 @@ const LibraryPage: React.FC = () => {
     console.log("handleAdd called");
     setIsGenerating(true);
     try {
+      let res: Response;
       if (typeof urlOrFile === "string") {
-        const res = await fetch(`${BACKEND_URL}/api/generate-from-url`, {
+        res = await fetch(`${BACKEND_URL}/api/generate-from-url`, {
           method: "POST",
           headers: {
             "Content-Type": "application/json",
@@ -79,7 +102,7 @@ const LibraryPage: React.FC = () => {
         const formData = new FormData();
         formData.append("file", urlOrFile);
 
-        const res = await fetch(`${BACKEND_URL}/api/upload_pdf/process`, {
+        res = await fetch(`${BACKEND_URL}/api/upload_pdf/process`, {
           method: "POST",
           headers: { Authorization: `Bearer ${token}` },
           body: formData,
@@ -92,10 +115,12 @@ const LibraryPage: React.FC = () => {
         }
       }
 
+      const { job_id } = await res.json();
+      await waitForJob(job_id);
       await fetchLibraryItems();
     } catch (error) {
       console.error("Add failed:", error);
-      alert("Failed to add item");
+      alert("Failed to add item: " + (error instanceof Error ? error.message : ""));
     } finally {
       setIsGenerating(false);
     }
@@ -150,6 +175,17 @@ const LibraryPage: React.FC = () => {
             ))}
           </div>
         )}
+        {!loading && nextCursor && (
+          <div className="text-center">
+            <button
+              onClick={() => fetchLibraryItems(nextCursor)}
+              disabled={loadingMore}
+              className="px-4 py-2 rounded bg-white shadow text-gray-700 hover:bg-gray-50 disabled:opacity-50"
+            >
+              {loadingMore ? "Loading..." : "Load more"}
+            </button>
+          </div>
+        )}
       </main>
 
       {isGenerating && (